@@ -0,0 +1,144 @@
+"""
+Caching
+-------
+Caches for expensive results (reddit + openai pipelines).
+
+TTLCache is a plain in-process cache. ResponseCache stores encoded response
+bodies in redis when REDIS_URL is set, so every worker shares one copy, and
+falls back to a per-process TTLCache otherwise.
+"""
+
+import asyncio
+import logging
+import threading
+import time
+from collections import OrderedDict
+from typing import Any, Awaitable, Callable, Dict, Hashable, Optional
+
+logger = logging.getLogger(__name__)
+
+class TTLCache:
+    """lru cache where entries also expire `ttl` seconds after they were stored"""
+
+    def __init__(self, maxsize: int = 1024, ttl: float = 3600):
+        self.maxsize = maxsize
+        self.ttl = ttl
+        self._data: "OrderedDict[Hashable, tuple]" = OrderedDict()
+        self._lock = threading.Lock()
+
+    def get(self, key: Hashable, default: Any = None) -> Any:
+        """return the cached value, or default if missing/expired"""
+        with self._lock:
+            entry = self._data.get(key)
+            if entry is None:
+                return default
+            expires_at, value = entry
+            if time.monotonic() >= expires_at:
+                del self._data[key]
+                return default
+            self._data.move_to_end(key)
+            return value
+
+    def set(self, key: Hashable, value: Any, ttl: Optional[float] = None) -> None:
+        """store a value, evicting the least recently used entry when full"""
+        with self._lock:
+            self._data[key] = (time.monotonic() + (self.ttl if ttl is None else ttl), value)
+            self._data.move_to_end(key)
+            while len(self._data) > self.maxsize:
+                self._data.popitem(last=False)
+
+    def pop(self, key: Hashable, default: Any = None) -> Any:
+        with self._lock:
+            entry = self._data.pop(key, None)
+            return default if entry is None else entry[1]
+
+    def clear(self) -> None:
+        with self._lock:
+            self._data.clear()
+
+    def __len__(self) -> int:
+        return len(self._data)
+
+class ResponseCache:
+    """
+    async bytes cache for finished endpoint responses. redis errors are logged and
+    treated as misses - a cache outage should slow requests down, not fail them
+    """
+
+    def __init__(self, maxsize: int = 1024):
+        self._redis = None
+        self._local = TTLCache(maxsize=maxsize)
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    async def connect(self, url: Optional[str]) -> None:
+        """connect to redis if a url is configured, otherwise stay in-process"""
+        if not url:
+            logger.info("Response cache: REDIS_URL not set, using in-process cache")
+            return
+        try:
+            # imported here so redis is only needed when it's actually configured
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+            await client.ping()
+            self._redis = client
+            logger.info("✅ Response cache connected to redis")
+        except Exception as e:
+            logger.error(f"Could not connect to redis, using in-process cache instead: {e}")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    async def get(self, key: str) -> Optional[bytes]:
+        if self._redis is None:
+            return self._local.get(key)
+        try:
+            return await self._redis.get(key)
+        except Exception as e:
+            logger.warning(f"Redis get failed for {key}: {e}")
+            return None
+
+    async def set(self, key: str, payload: bytes, ttl: int) -> None:
+        if self._redis is None:
+            self._local.set(key, payload, ttl)
+            return
+        try:
+            await self._redis.setex(key, ttl, payload)
+        except Exception as e:
+            logger.warning(f"Redis set failed for {key}: {e}")
+
+class SingleFlight:
+    """
+    request coalescing: concurrent callers with the same key share one run of the work
+    instead of each repeating it (covers the gap before the response cache is filled)
+    """
+
+    def __init__(self):
+        self._inflight: Dict[Hashable, asyncio.Task] = {}
+
+    def is_running(self, key: Hashable) -> bool:
+        return key in self._inflight
+
+    async def run(self, key: Hashable, work: Callable[[], Awaitable[Any]]) -> Any:
+        """await the in-flight run for key, starting `work()` if there isn't one"""
+        task = self._inflight.get(key)
+        if task is None:
+            task = asyncio.ensure_future(work())
+            self._inflight[key] = task
+            task.add_done_callback(lambda t: self._finish(key, t))
+        # shield so one disconnected caller doesn't cancel the run the others are waiting on
+        return await asyncio.shield(task)
+
+    def _finish(self, key: Hashable, task: asyncio.Task) -> None:
+        if self._inflight.get(key) is task:
+            del self._inflight[key]
+        if not task.cancelled():
+            task.exception()  # mark retrieved - every waiter already got it re-raised
+
+# shared instances - response_cache is connected from the app lifespan
+response_cache = ResponseCache()
+inflight = SingleFlight()
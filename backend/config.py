@@ -1,32 +1,73 @@
-import os
-from dotenv import load_dotenv
+from functools import lru_cache
+from pathlib import Path
+from typing import List, Optional
+from pydantic_settings import BaseSettings, SettingsConfigDict
 
-# load env vars from .env file
-load_dotenv()
+class Config(BaseSettings):
+    # env vars are read (and type-checked) once, from the environment or a .env file
+    model_config = SettingsConfigDict(
+        env_file=(Path(__file__).with_name(".env"), ".env"),
+        case_sensitive=False,
+        extra="ignore",
+        frozen=True,
+    )
+
+    REDDIT_CLIENT_ID: Optional[str] = None
+    REDDIT_CLIENT_SECRET: Optional[str] = None
+    REDDIT_USER_AGENT: str = "repflaws:v1.0.0 (by u/repflaws_user)"
+    # concurrent submission fetches per process - reddit allows ~100 requests/min per oauth client
+    REDDIT_MAX_CONCURRENT_FETCHES: int = 15
+
+    # concurrent rate my professors graphql calls per process
+    RMP_MAX_CONCURRENT_REQUESTS: int = 8
 
-class Config:
-    REDDIT_CLIENT_ID = os.getenv("REDDIT_CLIENT_ID")
-    REDDIT_CLIENT_SECRET = os.getenv("REDDIT_CLIENT_SECRET")
-    REDDIT_USER_AGENT = os.getenv("REDDIT_USER_AGENT", "repflaws:v1.0.0 (by u/repflaws_user)")
-    
     # openai stuff
-    OPENAI_API_KEY = os.getenv("OPENAI_API_KEY")
-    OPENAI_MODEL = os.getenv("OPENAI_MODEL", "gpt-4.1-nano")
+    OPENAI_API_KEY: Optional[str] = None
+    OPENAI_MODEL: str = "gpt-4.1-nano"
+    # concurrent openai calls per process, and how many more may wait before analyses get a 503
+    OPENAI_MAX_CONCURRENT_REQUESTS: int = 8
+    OPENAI_MAX_QUEUED_REQUESTS: int = 32
+    # reuse a structured course analysis when the new prompt embeds almost identically to a cached one
+    OPENAI_SEMANTIC_CACHE: bool = True
+    OPENAI_EMBEDDING_MODEL: str = "text-embedding-3-small"
+
+    # api config
+    API_HOST: str = "0.0.0.0"
+    API_PORT: int = 8000
+    # uvicorn worker processes - progress streams need REDIS_URL to work across more than one
+    WEB_CONCURRENCY: int = 1
+
+    LOG_LEVEL: str = "INFO"
+
+    # optional shared response cache + progress events - leave unset to keep both per process
+    REDIS_URL: Optional[str] = None
+
+    # bearer token for the /api/admin endpoints - they're disabled while this is unset
+    ADMIN_TOKEN: Optional[str] = None
+
+    # cors settings - CORS_ORIGINS is a comma separated override ("*" allows any origin)
+    FRONTEND_URL: str = "http://localhost:3000"
+    CORS_ORIGINS: Optional[str] = None
     
+    @property
+    def cors_origins(self) -> List[str]:
+        """origins the browser may call the api from (the frontend plus the local dev server by default)"""
+        if self.CORS_ORIGINS:
+            return [origin.strip() for origin in self.CORS_ORIGINS.split(",") if origin.strip()]
+        return list(dict.fromkeys([self.FRONTEND_URL.rstrip("/"), "http://localhost:3000"]))
+
     # debug env vars
-    def __init__(self):
+    def model_post_init(self, __context) -> None:
         if not self.OPENAI_API_KEY:
             print("WARNING: OPENAI_API_KEY not found in environment variables!")
         if not self.REDDIT_CLIENT_ID:
             print("WARNING: REDDIT_CLIENT_ID not found in environment variables!")
         if not self.REDDIT_CLIENT_SECRET:
             print("WARNING: REDDIT_CLIENT_SECRET not found in environment variables!")
-    
-    # api config
-    API_HOST = os.getenv("API_HOST", "0.0.0.0")
-    API_PORT = int(os.getenv("API_PORT", 8000))
-    
-    # cors settings
-    FRONTEND_URL = os.getenv("FRONTEND_URL", "http://localhost:3000")
 
-config = Config() 
\ No newline at end of file
+@lru_cache(maxsize=1)
+def get_settings() -> Config:
+    """shared settings instance - env is only read and validated once per process"""
+    return Config()
+
+config = get_settings()
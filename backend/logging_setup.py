@@ -0,0 +1,37 @@
+"""
+Logging Setup
+-------------
+Process-wide logging configuration.
+
+Handlers never run on the event loop: every record goes through a QueueHandler
+(a non-blocking queue put) and a QueueListener thread does the actual
+formatting and writing to stderr. A slow terminal or log collector then can't
+stall request handling.
+"""
+
+import atexit
+import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
+from typing import Optional
+
+_listener: Optional[QueueListener] = None
+
+def setup_logging(level: str = "INFO") -> None:
+    """route root logging through a background listener thread (safe to call more than once)"""
+    global _listener
+    if _listener is not None:
+        return
+
+    log_queue: "queue.SimpleQueue[logging.LogRecord]" = queue.SimpleQueue()
+    stream_handler = logging.StreamHandler()
+    stream_handler.setFormatter(logging.Formatter("%(levelname)s:%(name)s:%(message)s"))
+
+    root = logging.getLogger()
+    root.handlers = [QueueHandler(log_queue)]
+    root.setLevel(level.upper())
+
+    _listener = QueueListener(log_queue, stream_handler, respect_handler_level=True)
+    _listener.start()
+    # flush whatever is still queued on shutdown
+    atexit.register(_listener.stop)
@@ -1,123 +1,224 @@
 import asyncio
+import hashlib
 import logging
-import json
-from typing import List, Dict, Any, Optional
-from fastapi import FastAPI, HTTPException, Query
+import orjson
+import re
+import secrets
+from itertools import islice
+from typing import Awaitable, Callable, List, Dict, Any, Optional, Set
+from fastapi import FastAPI, HTTPException, Query, Request
+from fastapi.exceptions import RequestValidationError
 from fastapi.middleware.cors import CORSMiddleware
-from fastapi.responses import StreamingResponse
-from pydantic import BaseModel
+from fastapi.responses import ORJSONResponse, Response, StreamingResponse
+from pydantic import BaseModel, ConfigDict, ValidationError
 import uuid
+from contextlib import asynccontextmanager
 
-from config import config
-from reddit_service import reddit_service
-from openai_service import openai_service
+from config import get_settings
+from logging_setup import setup_logging
+
+# configure logging before the services are imported - they log when their singletons are created
+setup_logging(get_settings().LOG_LEVEL)
+
+from cache import inflight, response_cache
+from middleware import SelectiveCompressionMiddleware
+from reddit_service import reddit_service, is_main_topic_about_course
+from openai_service import PostsContext, get_openai_service
+from progress import ProgressUpdate, progress_broker, reap_abandoned_sessions
 from sheets_service import SheetsService
-from rmp_service import rmp_service
+from rmp_service import UCR_SCHOOL_NAME, rmp_service
 from professor_extraction_service import professor_extraction_service
 
-# setup logging
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 # create services
 sheets_service = SheetsService()
 
-# progress tracking for real-time updates
-progress_tracker = {}
-
-class ProgressUpdate:
-    def __init__(self, session_id: str):
-        self.session_id = session_id
-        self.events = []
-        progress_tracker[session_id] = self
-    
-    def emit(self, step: str, message: str, progress: int = None):
-        """Emit a progress event"""
-        event = {
-            "step": step,
-            "message": message,
-            "progress": progress,
-            "timestamp": asyncio.get_event_loop().time()
-        }
-        self.events.append(event)
-        logger.info(f"🔔 Progress [{self.session_id}] Step: {step}, Message: {message}, Progress: {progress}%")
-    
-    def cleanup(self):
-        """Clean up progress tracker"""
-        if self.session_id in progress_tracker:
-            del progress_tracker[self.session_id]
+# progress sse: heartbeat while idle, give up after this long without any progress event
+SSE_HEARTBEAT_INTERVAL = 15
+SSE_IDLE_TIMEOUT = 120
+
+# response cache ttls (seconds) - search results go stale quickly, finished analyses don't
+SEARCH_CACHE_TTL = 600
+ANALYSIS_CACHE_TTL = 6 * 3600
+PROFESSOR_CACHE_TTL = 24 * 3600
+CLASSES_CACHE_TTL = 3600
+# rating pages are re-requested on back/retry - the underlying rmp comments are cached for a day already
+RMP_RATINGS_CACHE_TTL = 600
+# what a course code looks like ("CS 100", "math009a") - anything else has to be a class in the ucr sheet
+COURSE_RE = re.compile(r"^[A-Z]{2,4}\s?\d{1,3}[A-Z]?$", re.IGNORECASE)
+# how long browsers/cdns may reuse an idempotent json response without asking again
+HTTP_CACHE_MAX_AGE = 600
+
+class ApiModel(BaseModel):
+    """base for request/response models - build validators at import, not on a worker's first request"""
+    model_config = ConfigDict(defer_build=False, validate_assignment=False, extra="ignore")
 
 # request models
-class PostIdsRequest(BaseModel):
+class ApiRequest(ApiModel):
+    """base for request bodies - strings arrive already stripped"""
+    model_config = ConfigDict(str_strip_whitespace=True)
+
+class PostIdsRequest(ApiRequest):
     post_ids: List[str]
 
-class ProfessorAnalysisRequest(BaseModel):
+class CoursePrecomputeRequest(ApiRequest):
+    courses: List[str]
+    max_posts: int = 50
+    max_comments_per_post: int = 50
+    # false runs the analyses right away through the real-time api (full price)
+    batch: bool = True
+
+class ProfessorAnalysisRequest(ApiRequest):
     professor_name: str
     max_posts: int = 50
     max_comments_per_post: int = 50
 
+# response models
+class CourseRawData(ApiModel):
+    course: str
+    posts: List[Dict[str, Any]]
+    ucr_database: Optional[str] = None
+
+class CourseAnalysisResponse(ApiModel):
+    # failure responses only carry success/error/message, so everything else is optional
+    success: bool
+    posts_analyzed: Optional[int] = None
+    ucr_database_included: Optional[bool] = None
+    raw_data: Optional[CourseRawData] = None
+    ai_analysis: Optional[Dict[str, Any]] = None
+    error: Optional[str] = None
+    message: Optional[str] = None
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    """startup/shutdown hooks for shared resources"""
+    # warm the ucr sheet cache in the background - startup (and health checks) don't wait on google sheets,
+    # but the first analysis usually finds the sheet already downloaded and parsed
+    sheets_warmup = asyncio.create_task(sheets_service.run_blocking(sheets_service.warm_up))
+    # same for the ucr school id every rmp lookup starts from
+    school_warmup = asyncio.create_task(rmp_service.resolve_school(UCR_SCHOOL_NAME))
+    openai_warmup = asyncio.create_task(get_openai_service().warm_up())
+    await response_cache.connect(get_settings().REDIS_URL)
+    await progress_broker.connect(get_settings().REDIS_URL)
+    progress_reaper = asyncio.create_task(reap_abandoned_sessions())
+    
+    yield
+    
+    progress_reaper.cancel()
+    for job in _precompute_jobs:
+        job.cancel()
+    sheets_warmup.cancel()
+    school_warmup.cancel()
+    openai_warmup.cancel()
+    await sheets_service.close()
+    await reddit_service.close()
+    await rmp_service.close()
+    await get_openai_service().close()
+    await response_cache.close()
+    await progress_broker.close()
+
 # create fastapi app
 app = FastAPI(
     title="UCR Course Guide API",
     description="API for leveraging community knowledge about UCR courses from Reddit",
-    version="1.0.0"
+    version="1.0.0",
+    lifespan=lifespan,
+    default_response_class=ORJSONResponse  # orjson is much faster on the large raw_data payloads
 )
 
-# add cors - allow all origins for production deployment flexibility
+# middleware must be pure asgi - see middleware.py
+# add cors - explicit origins/methods/headers are set lookups in starlette, and max_age
+# lets browsers cache preflights for a day instead of sending one before every call
 app.add_middleware(
     CORSMiddleware,
-    allow_origins=["*"],  # Allow all origins for production
-    allow_credentials=False,  # Set to False when using allow_origins=["*"]
-    allow_methods=["*"],
-    allow_headers=["*"],
+    allow_origins=get_settings().cors_origins,
+    allow_credentials=False,
+    allow_methods=["GET", "POST"],
+    allow_headers=["Content-Type", "Authorization"],
+    max_age=86400,
 )
 
+# compress the large post/comment payloads - level 5 keeps cpu cost low
+app.add_middleware(SelectiveCompressionMiddleware, minimum_size=1024, compresslevel=5, brotli_quality=4)
+
+# static probe bodies, encoded once at import instead of on every liveness check
+_ROOT_BODY = orjson.dumps({"message": "UCR Course Guide API is running!", "status": "healthy"})
+_HEALTH_BODY = orjson.dumps({
+    "status": "healthy",
+    "reddit_connection": "ready",
+    "reddit_readonly": True,  # We're always in read-only mode
+    "message": "All systems operational"
+})
+
+def _sse_event(event: Dict[str, Any]) -> bytes:
+    """encode one server-sent event"""
+    return b"data: " + orjson.dumps(event) + b"\n\n"
+
+_SSE_HEARTBEAT = _sse_event({"heartbeat": True})
+
+async def _fetch_filtered_posts(post_ids: List[str], max_comments_per_post: int, course_key: str) -> Dict[str, Any]:
+    """
+    full post content, main-topic filtered - each post is checked as soon as it downloads, so
+    filtering overlaps the slower fetches and the ai analysis can start right after the last one lands
+    """
+    kept = []
+    try:
+        async for index, post_data in reddit_service.iter_posts_for_ai(post_ids, max_comments_per_post):
+            # a few string scans per post - cheap enough to run inline between arrivals
+            if is_main_topic_about_course(post_data, course_key):
+                kept.append((index, post_data))
+    except Exception as e:
+        logger.error(f"Error getting multiple posts: {e}")
+        return {"success": False, "error": str(e), "data": []}
+    
+    # back to search order so the prompt (and the cached result) doesn't depend on fetch timing
+    kept.sort(key=lambda item: item[0])
+    logger.info("Kept %s of %s posts that are actually about '%s'", len(kept), len(post_ids), course_key)
+    return {"success": True, "posts_processed": len(kept), "data": [post_data for _, post_data in kept]}
+
+def _reject_if_busy() -> None:
+    """fast-fail new analyses while the openai queue is already deep - they'd only wait and time out"""
+    if get_openai_service().saturated:
+        raise HTTPException(
+            status_code=503,
+            detail="Analysis service is busy, please try again shortly",
+            headers={"Retry-After": "5"}
+        )
+
+def _cacheable_json(request: Request, body: bytes, max_age: int = HTTP_CACHE_MAX_AGE) -> Response:
+    """
+    json response that browsers/cdns can cache - sends an etag + cache-control and
+    answers a matching If-None-Match with a bodyless 304
+    """
+    # weak etag: the gzip middleware may re-encode the body, which a strong etag doesn't allow
+    etag = f'W/"{hashlib.blake2b(body, digest_size=16).hexdigest()}"'
+    headers = {"ETag": etag, "Cache-Control": f"public, max-age={max_age}"}
+    if_none_match = request.headers.get("if-none-match")
+    if if_none_match and (if_none_match.strip() == "*" or etag in [tag.strip() for tag in if_none_match.split(",")]):
+        return Response(status_code=304, headers=headers)
+    return Response(content=body, media_type="application/json", headers=headers)
+
 @app.get("/")
 async def root():
     """basic health check"""
-    return {"message": "UCR Course Guide API is running!", "status": "healthy"}
+    return Response(content=_ROOT_BODY, media_type="application/json")
 
 @app.get("/api/progress/{session_id}")
 async def get_progress_stream(session_id: str):
     """Stream real-time progress updates for a session"""
     
     async def event_generator():
-        last_event_index = 0
-        timeout_count = 0
-        max_timeout = 120  # 2 minutes timeout
-        session_found = False
-        
         # send initial connection confirmation
-        yield f"data: {json.dumps({'step': 'connected', 'message': 'Connecting...', 'progress': 0})}\n\n"
+        yield _sse_event({'step': 'connected', 'message': 'Connecting...', 'progress': 0})
         
-        while timeout_count < max_timeout:
-            if session_id in progress_tracker:
-                if not session_found:
-                    session_found = True
-                    logger.info(f"📡 SSE session {session_id} found in tracker")
-                
-                tracker = progress_tracker[session_id]
-                
-                # send any new events
-                if len(tracker.events) > last_event_index:
-                    for event in tracker.events[last_event_index:]:
-                        logger.info(f"📤 SSE sending event: {event}")
-                        yield f"data: {json.dumps(event)}\n\n"
-                    last_event_index = len(tracker.events)
-                    timeout_count = 0  # Reset timeout when we send data
-                else:
-                    # send heartbeat
-                    yield f"data: {json.dumps({'heartbeat': True})}\n\n"
-                    timeout_count += 1
+        # events arrive as the analysis emits them (from any worker when redis is configured)
+        async for event in progress_broker.stream(session_id, SSE_HEARTBEAT_INTERVAL, SSE_IDLE_TIMEOUT):
+            if event is None:
+                yield _SSE_HEARTBEAT
             else:
-                # session not found, just send heartbeat
-                yield f"data: {json.dumps({'heartbeat': True})}\n\n"
-                timeout_count += 1
-            
-            await asyncio.sleep(1)  # Check every second
-        
-        # send completion event
-        yield f"data: {json.dumps({'step': 'timeout', 'message': 'Connection timed out'})}\n\n"
+                logger.debug("📤 SSE sending event: %s", event)
+                yield _sse_event(event)
     
     return StreamingResponse(
         event_generator(),
@@ -143,11 +244,11 @@ async def test_progress_stream(session_id: str):
                 "message": f"Test message {i+1}/5",
                 "progress": (i + 1) * 20
             }
-            yield f"data: {json.dumps(event)}\n\n"
+            yield _sse_event(event)
             await asyncio.sleep(2)  # 2 second intervals
         
         # send completion
-        yield f"data: {json.dumps({'step': 'complete', 'message': 'Test complete'})}\n\n"
+        yield _sse_event({'step': 'complete', 'message': 'Test complete'})
     
     return StreamingResponse(
         test_event_generator(),
@@ -163,6 +264,7 @@ async def test_progress_stream(session_id: str):
 
 @app.get("/api/search")
 async def search_course_info(
+    request: Request,
     keyword: str = Query(..., description="Course ID or name to search for"),
     limit: int = Query(default=100, ge=1, le=200, description="Maximum posts to retrieve")
 ) -> Dict[str, Any]:
@@ -170,18 +272,29 @@ async def search_course_info(
     search for posts about ucr courses from r/ucr
     """
     try:
-        logger.info(f"Searching for keyword: {keyword} with limit: {limit}")
+        logger.info("Searching for keyword: %s with limit: %s", keyword, limit)
         
-        if not keyword.strip():
+        kw = keyword.strip()
+        if not kw:
             raise HTTPException(status_code=400, detail="Keyword cannot be empty")
         
+        cache_key = f"search:v1:{kw.lower()}:{limit}"
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return _cacheable_json(request, cached)
+        
         # search reddit using our service
-        results = await reddit_service.search_course_info(keyword.strip(), limit)
+        results = await reddit_service.search_course_info(kw, limit)
         
-        return {
+        payload = orjson.dumps({
             "success": True,
             "data": results
-        }
+        })
+        # failed subreddit searches come back with an error instead of raising - don't pin those
+        if not any("error" in sub for sub in results["subreddits"].values()):
+            await response_cache.set(cache_key, payload, SEARCH_CACHE_TTL)
+            return _cacheable_json(request, payload)
+        return Response(content=payload, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error in search endpoint: {e}")
@@ -196,7 +309,7 @@ async def get_post_comments(
     get comments from a specific reddit post
     """
     try:
-        logger.info(f"Getting comments for post: {post_id}")
+        logger.info("Getting comments for post: %s", post_id)
         
         comments = await reddit_service.get_post_comments(post_id, limit)
         
@@ -214,22 +327,8 @@ async def get_post_comments(
 @app.get("/api/health")
 async def health_check():
     """check if reddit api is working"""
-    try:
-        # simple health check without reddit api call
-        return {
-            "status": "healthy",
-            "reddit_connection": "ready",
-            "reddit_readonly": True,  # We're always in read-only mode
-            "message": "All systems operational"
-        }
-        
-    except Exception as e:
-        logger.error(f"Health check failed: {e}")
-        return {
-            "status": "unhealthy",
-            "reddit_connection": "failed",
-            "error": str(e)
-        }
+    # simple health check without reddit api call
+    return Response(content=_HEALTH_BODY, media_type="application/json")
 
 # test endpoint for reddit connectivity
 @app.get("/api/post/{post_id}/full-content")
@@ -241,7 +340,7 @@ async def get_full_post_for_ai(
     get full post content for ai analysis (no limits on text length)
     """
     try:
-        logger.info(f"Getting full content for AI analysis: {post_id}")
+        logger.info("Getting full content for AI analysis: %s", post_id)
         
         full_content = await reddit_service.get_full_post_content_for_ai(post_id, max_comments)
         
@@ -254,32 +353,429 @@ async def get_full_post_for_ai(
         logger.error(f"Error getting full content for post {post_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get full content: {str(e)}")
 
-@app.post("/api/posts/full-content")
+async def _stream_full_content(full_content: Dict[str, Any]):
+    """
+    encode the {"success": true, "data": {...}} envelope one post at a time
+    so the full multi-post body never has to exist as a single bytes object
+    """
+    posts = full_content.get("data", [])
+    meta = orjson.dumps({k: v for k, v in full_content.items() if k != "data"})
+    yield b'{"success":true,"data":' + meta[:-1] + (b',' if len(meta) > 2 else b'') + b'"data":['
+    for i, post_data in enumerate(posts):
+        yield (b',' if i else b'') + orjson.dumps(post_data)
+    yield b']}}'
+
+# the body is parsed by hand below, so describe it for the openapi docs here
+_POST_IDS_REQUEST_BODY = {
+    "required": True,
+    "content": {"application/json": {"schema": PostIdsRequest.model_json_schema()}},
+}
+
+@app.post("/api/posts/full-content", openapi_extra={"requestBody": _POST_IDS_REQUEST_BODY})
 async def get_multiple_posts_for_ai(
-    request: PostIdsRequest,
+    request: Request,
     max_comments_per_post: int = Query(default=50, ge=1, le=150, description="Max comments per post")
 ):
     """
     get content from multiple posts for ai analysis
     """
+    # validate straight from the raw bytes in pydantic-core (one pass, no intermediate dict)
+    raw_body = await request.body()
     try:
-        post_ids = request.post_ids
-        logger.info(f"Getting full content for {len(post_ids)} posts for AI analysis")
+        body = PostIdsRequest.model_validate_json(raw_body)
+    except ValidationError as e:
+        # same 422 shape fastapi produces for a declared body parameter
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=raw_body)
+    
+    try:
+        post_ids = body.post_ids
+        logger.info("Getting full content for %s posts for AI analysis", len(post_ids))
         
         if len(post_ids) > 100:
             raise HTTPException(status_code=400, detail="Maximum 100 posts allowed per request")
         
         full_content = await reddit_service.get_multiple_posts_for_ai(post_ids, max_comments_per_post)
         
-        return {
-            "success": True,
-            "data": full_content
-        }
+        return StreamingResponse(_stream_full_content(full_content), media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error getting multiple posts for AI: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get multiple posts: {str(e)}")
 
+def _with_raw_data(result: Dict[str, Any], include_raw: bool) -> Dict[str, Any]:
+    """
+    the result as is when include_raw, otherwise a copy minus raw_data - it repeats every post body
+    the analysis was built from, which is most of the response size
+    """
+    if include_raw:
+        return result
+    return {key: value for key, value in result.items() if key != "raw_data"}
+
+# the post/comment fields the frontend actually renders from raw_data - ids, authors and
+# upvote ratios only ever feed the ai prompt, so they're left out of the response
+CLIENT_POST_FIELDS = ("title", "url", "subreddit", "score", "num_comments", "selftext", "created_utc")
+CLIENT_COMMENT_FIELDS = ("body", "score")
+
+def _client_raw_data(raw_data: Dict[str, Any]) -> Dict[str, Any]:
+    """raw_data as sent to the browser - same keys, posts projected down to CLIENT_POST/COMMENT_FIELDS"""
+    posts = [
+        {
+            "post": {field: post_data["post"][field] for field in CLIENT_POST_FIELDS if field in post_data["post"]},
+            "comments": [
+                {field: comment[field] for field in CLIENT_COMMENT_FIELDS if field in comment}
+                for comment in post_data.get("comments", ())
+            ],
+        }
+        for post_data in raw_data.get("posts", ())
+    ]
+    return {**raw_data, "posts": posts}
+
+def _build_enhanced_result(
+    posts: List[Dict[str, Any]],
+    raw_data: Dict[str, Any],
+    structured_data: Optional[Dict[str, Any]],
+    ucr_database_included: bool,
+    rmp_enabled: bool,
+    rmp_data: Dict[str, Any],
+    optimization: str,
+    professor_extraction: Dict[str, Any],
+    metadata_rmp_enabled: Optional[bool] = None
+) -> Dict[str, Any]:
+    """
+    the response every successful exit of the enhanced pipeline returns
+    metadata_rmp_enabled is whether rmp actually ran, when that differs from what was requested (rmp_enabled)
+    """
+    if metadata_rmp_enabled is None:
+        metadata_rmp_enabled = rmp_enabled
+    rmp_professors = rmp_data.get("professors", [])
+    return {
+        "success": True,
+        "posts_analyzed": len(posts),
+        "ucr_database_included": ucr_database_included,
+        "rmp_enabled": rmp_enabled,
+        "raw_data": _client_raw_data(raw_data),
+        "analysis": {
+            "structured_data": structured_data,
+            "analysis_metadata": {
+                "total_posts_analyzed": len(posts),
+                "total_comments_analyzed": sum(len(post_data.get("comments", ())) for post_data in posts),
+                "ucr_database_included": ucr_database_included,
+                "rmp_enabled": metadata_rmp_enabled,
+                "rmp_professors_count": len(rmp_professors),
+                "total_rmp_reviews": sum(prof.get("course_reviews_count", 0) for prof in rmp_professors)
+            }
+        },
+        "optimization": optimization,
+        "professor_extraction": professor_extraction
+    }
+
+async def _structured_analysis(
+    course_data: Dict[str, Any],
+    on_stage: Optional[Callable[[Dict[str, Any]], None]],
+    analysis_pass: str,
+    posts_context: Optional[PostsContext] = None
+) -> Dict[str, Any]:
+    """
+    AsyncOpenAIService.analyze_course_discussions_structured - streamed when there's an on_stage listener,
+    which then also gets {"stage": "partial", "pass": analysis_pass, "delta": ...} as the json is written
+    """
+    if on_stage is None:
+        return await get_openai_service().analyze_course_discussions_structured(course_data, posts_context)
+    result = None
+    async for event in get_openai_service().analyze_course_discussions_structured_stream(course_data, posts_context):
+        if "delta" in event:
+            on_stage({"stage": "partial", "pass": analysis_pass, "delta": event["delta"]})
+        else:
+            result = event["result"]
+    return result
+
+async def _run_enhanced_analysis(
+    course_key: str,
+    max_posts: int,
+    max_comments_per_post: int,
+    include_rmp: bool,
+    school_name: str,
+    session_id: str,
+    progress: ProgressUpdate,
+    cache_key: str,
+    on_stage: Optional[Callable[[Dict[str, Any]], None]] = None
+) -> Dict[str, Any]:
+    """
+    the enhanced analysis pipeline behind get_enhanced_course_analysis - see that endpoint for the steps.
+    on_stage (if given) gets the initial analysis and the rmp results as soon as each is ready,
+    plus the structured json of each analysis pass while openai writes it
+    """
+    # the ucr database lookup doesn't depend on reddit, so start it right away
+    sheets_task = asyncio.create_task(sheets_service.aformat_for_ai_analysis(course_key))
+    # same for the rmp school - step 4 (or the database-only path) awaits it before its rmp lookups
+    school_task = asyncio.create_task(rmp_service.resolve_school(school_name)) if include_rmp else None
+    try:
+        return await _enhanced_analysis_steps(
+            course_key, max_posts, max_comments_per_post, include_rmp, school_name,
+            session_id, progress, cache_key, on_stage, sheets_task, school_task
+        )
+    finally:
+        # early returns (no posts, fetch failed) never await the lookups - don't leave them running for nobody
+        sheets_task.cancel()
+        if school_task:
+            school_task.cancel()
+
+async def _enhanced_analysis_steps(
+    course_key: str,
+    max_posts: int,
+    max_comments_per_post: int,
+    include_rmp: bool,
+    school_name: str,
+    session_id: str,
+    progress: ProgressUpdate,
+    cache_key: str,
+    on_stage: Optional[Callable[[Dict[str, Any]], None]],
+    sheets_task: "asyncio.Task[str]",
+    school_task: "Optional[asyncio.Task[Optional[Dict[str, Any]]]]"
+) -> Dict[str, Any]:
+    """the steps of _run_enhanced_analysis, with the ucr database and rmp school lookups it already started"""
+    # step 1: get reddit and spreadsheet data
+    logger.info("Step 1: Fetching Reddit and UCR database data...")
+    progress.emit("reddit_search", "Searching Reddit discussions...", 10)
+    
+    search_results = await reddit_service.search_course_info(course_key, max_posts)
+    
+    if not search_results or search_results["total_posts"] == 0:
+        ucr_data = await sheets_task
+        if not ucr_data or ucr_data.strip() == "":
+            return {
+                "success": False,
+                "error": "No data found",
+                "message": f"No Reddit posts or UCR database entries found for '{course_key}'"
+            }
+        
+        # analyze with spreadsheet data only using comprehensive approach
+        extraction_course_data = {
+            "course": course_key,
+            "posts": [],
+            "ucr_database": ucr_data
+        }
+        
+        # extract professor names from database data
+        professor_names = await get_openai_service().extract_all_professor_names(extraction_course_data)
+        logger.info("🔍 Extracted %s professor names from database: %s", len(professor_names), professor_names)
+        
+        # Try RMP search if enabled and professors found
+        rmp_data = {"professors": [], "enabled": False}
+        if include_rmp and professor_names:
+            try:
+                if school_task:
+                    await school_task
+                rmp_result = await rmp_service.get_course_specific_professor_data(
+                    course_code=course_key,
+                    extracted_professors=professor_names,
+                    school_name=school_name
+                )
+                if rmp_result["success"]:
+                    rmp_data = {
+                        "enabled": True,
+                        "professors": rmp_result["professors"],
+                        "stats": rmp_result["stats"],
+                        "school": rmp_result.get("school", {})
+                    }
+            except Exception as e:
+                logger.error(f"RMP search failed for database-only analysis: {e}")
+        
+        course_data = {**extraction_course_data, "rmp_data": rmp_data}
+        
+        ai_analysis = await _structured_analysis(course_data, on_stage, "final")
+        
+        result = _build_enhanced_result(
+            posts=[],
+            raw_data=course_data,
+            structured_data=ai_analysis.get("analysis") if ai_analysis.get("success") else None,
+            ucr_database_included=True,
+            rmp_enabled=include_rmp,
+            rmp_data=rmp_data,
+            optimization="ai_comprehensive_database_only",
+            professor_extraction={
+                "method": "ai_comprehensive",
+                "extracted_count": len(professor_names),
+                "rmp_found_count": len(rmp_data.get("professors", []))
+            }
+        )
+        if ai_analysis.get("success"):
+            await response_cache.set(cache_key, orjson.dumps(result), ANALYSIS_CACHE_TTL)
+        return result
+    
+    ucr_posts = search_results["subreddits"].get("ucr", {}).get("posts", [])
+    if not ucr_posts:
+        return {
+            "success": False,
+            "error": "No UCR posts found",
+            "message": f"No posts found in r/ucr for '{course_key}'"
+        }
+    
+    post_ids = [post["id"] for post in islice(ucr_posts, max_posts)]
+    
+    logger.info("Fetching and filtering Reddit full content (UCR database lookup already running)...")
+    
+    full_content_data = await _fetch_filtered_posts(post_ids, max_comments_per_post, course_key)
+    
+    if not full_content_data["success"]:
+        return {
+            "success": False,
+            "error": "Failed to get full Reddit content"
+        }
+    
+    ucr_database_data = await sheets_task
+    
+    filtered_posts_data = full_content_data["data"]
+    
+    # STEP 2: 🎯 FIRST ANALYSIS - Determine actual professors from Reddit + Google Sheets
+    logger.info("Step 2: Running initial analysis to determine actual professors from Reddit + Google Sheets...")
+    progress.emit("initial_analysis", "Analyzing data...", 20)
+    
+    initial_course_data = {
+        "course": course_key,
+        "posts": filtered_posts_data,
+        "ucr_database": ucr_database_data or ""
+    }
+    
+    # both passes analyze the same posts - format and budget them once
+    posts_context = get_openai_service().prepare_posts_context(filtered_posts_data)
+    
+    # Run structured analysis to get professors based on actual data
+    initial_analysis = await _structured_analysis(initial_course_data, on_stage, "initial", posts_context)
+    
+    if not initial_analysis.get("success"):
+        logger.warning("Initial analysis failed, proceeding without RMP data")
+        return _build_enhanced_result(
+            posts=filtered_posts_data,
+            raw_data=initial_course_data,
+            structured_data=initial_analysis.get("analysis"),
+            ucr_database_included=bool(ucr_database_data),
+            rmp_enabled=include_rmp,
+            rmp_data={},
+            optimization="initial_analysis_failed",
+            professor_extraction={
+                "method": "none",
+                "extracted_count": 0,
+                "rmp_found_count": 0
+            },
+            # rmp never ran, whatever was requested
+            metadata_rmp_enabled=False
+        )
+    
+    initial_body = initial_analysis.get("analysis") or {}
+    
+    if on_stage:
+        on_stage({
+            "stage": "initial",
+            "posts_analyzed": len(filtered_posts_data),
+            "ucr_database_included": bool(ucr_database_data),
+            "structured_data": initial_body
+        })
+    
+    # STEP 3: Extract professor names from the initial analysis result
+    finalized_professors = []
+    try:
+        professors_section = initial_body.get("professors", [])
+        
+        for prof in professors_section:
+            prof_name = prof.get("name", "").strip()
+            if prof_name and len(prof_name) > 2:
+                finalized_professors.append(prof_name)
+        
+        logger.info("🎯 Extracted %s finalized professors from analysis: %s", len(finalized_professors), finalized_professors)
+        
+    except Exception as e:
+        logger.error(f"Error extracting professors from initial analysis: {e}")
+        finalized_professors = []
+    
+    # STEP 4: Targeted RMP Search (only if we have finalized professors and RMP is enabled)
+    rmp_data = {"professors": [], "enabled": False}
+    
+    if include_rmp and finalized_professors:
+        logger.info("Step 4: Targeted RMP search for %s finalized professors...", len(finalized_professors))
+        progress.emit("rmp_search", "Searching Rate My Professors...", 60)
+        
+        try:
+            if school_task:
+                await school_task
+            # Much more efficient - only search for professors actually found in data
+            rmp_result = await rmp_service.get_course_specific_professor_data(
+                course_code=course_key,
+                extracted_professors=finalized_professors,  # Only finalized professors
+                school_name=school_name
+            )
+            
+            if rmp_result["success"]:
+                rmp_data = {
+                    "enabled": True,
+                    "professors": rmp_result["professors"],
+                    "stats": rmp_result["stats"],
+                    "school": rmp_result.get("school", {})
+                }
+                logger.info("Retrieved RMP data for %s professors", len(rmp_result['professors']))
+            else:
+                logger.warning("RMP data retrieval failed: %s", rmp_result.get('error', 'Unknown error'))
+                
+        except Exception as e:
+            logger.error(f"Error in targeted RMP search: {e}")
+            rmp_data = {"enabled": True, "error": str(e)}
+    
+    if on_stage:
+        on_stage({"stage": "rmp", "rmp_data": rmp_data})
+    
+    rmp_professors = rmp_data.get("professors", [])
+    
+    # STEP 5: Final Enhanced AI Analysis (if we have RMP data, re-analyze with it)
+    if rmp_professors:
+        logger.info("Step 5: Re-running analysis with RMP data for enhanced results...")
+        progress.emit("final_analysis", "Generating comprehensive analysis...", 80)
+        
+        # same course data as the first pass, plus the rmp results
+        final_course_data = {**initial_course_data, "rmp_data": rmp_data}
+        
+        final_analysis = await _structured_analysis(final_course_data, on_stage, "final", posts_context)
+    else:
+        logger.info("Step 5: No RMP data available, using initial analysis results...")
+        progress.emit("final_analysis", "Finalizing analysis...", 80)
+        final_analysis = initial_analysis
+        final_course_data = initial_course_data
+    
+    final_ok = final_analysis.get("success")
+    if final_ok:
+        logger.info("✅ Final analysis completed successfully")
+    else:
+        logger.warning("⚠️ Final analysis had issues, but continuing...")
+    
+    # Completion event
+    progress.emit("complete", "Analysis complete!", 100)
+    
+    # Return the final analysis result with session_id
+    result = _build_enhanced_result(
+        posts=filtered_posts_data,
+        raw_data=final_course_data,
+        structured_data=final_analysis.get("analysis") if final_ok else None,
+        ucr_database_included=bool(ucr_database_data),
+        rmp_enabled=include_rmp,
+        rmp_data=rmp_data,
+        optimization="finalized_professors_then_rmp" if rmp_professors else "reddit_and_sheets_only",
+        professor_extraction={
+            "method": "analysis_based_finalized",
+            "finalized_count": len(finalized_professors),
+            "rmp_found_count": len(rmp_professors)
+        }
+    )
+    result["session_id"] = session_id
+    
+    # only cache complete analyses - openai/rmp hiccups should be retried next time
+    if final_ok:
+        await response_cache.set(cache_key, orjson.dumps(result), ANALYSIS_CACHE_TTL)
+    
+    # Cleanup progress tracker after successful completion
+    progress.cleanup()
+    return result
+
+
 @app.get("/api/course-analysis-enhanced")
 async def get_enhanced_course_analysis(
     keyword: str = Query(..., description="Course ID or name to analyze"),
@@ -287,7 +783,8 @@ async def get_enhanced_course_analysis(
     max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post"),
     include_rmp: bool = Query(default=True, description="Include Rate My Professor data"),
     school_name: str = Query(default="University of California Riverside", description="School name for RMP lookup"),
-    session_id: str = Query(default=None, description="Session ID for progress tracking")
+    session_id: str = Query(default=None, description="Session ID for progress tracking"),
+    include_raw: bool = Query(default=True, description="Include the raw posts/database data the analysis was built from")
 ):
     """
     🆕 OPTIMIZED ENHANCED WORKFLOW: 
@@ -298,300 +795,415 @@ async def get_enhanced_course_analysis(
     2. Only searches RMP for those finalized professors (not a broad "could be" list) 
     3. Re-runs analysis with RMP data for enhanced results
     """
+    course_key = _normalize_query(keyword)
+    
     # initialize progress tracking
     if not session_id:
         session_id = str(uuid.uuid4())
     
     progress = ProgressUpdate(session_id)
-    progress.emit("starting", f"Starting analysis for {keyword}...", 0)
+    progress.emit("starting", f"Starting analysis for {course_key}...", 0)
     
     # small delay to ensure sse connection can find the session
     await asyncio.sleep(0.1)
     
     try:
-        logger.info(f"🚀 Optimized enhanced analysis for: {keyword}")
+        logger.info("🚀 Optimized enhanced analysis for: %s", course_key)
         
-        if not keyword.strip():
+        if not course_key:
             progress.cleanup()
             raise HTTPException(status_code=400, detail="Course keyword cannot be empty")
         
-        # step 1: get reddit and spreadsheet data
-        logger.info("Step 1: Fetching Reddit and UCR database data...")
-        progress.emit("reddit_search", "Searching Reddit discussions...", 10)
-        
-        search_results = await reddit_service.search_course_info(keyword.strip(), max_posts)
-        
-        if not search_results or search_results["total_posts"] == 0:
-            ucr_data = sheets_service.format_for_ai_analysis(keyword.strip())
-            if not ucr_data or ucr_data.strip() == "":
-                return {
-                    "success": False,
-                    "error": "No data found",
-                    "message": f"No Reddit posts or UCR database entries found for '{keyword}'"
-                }
-            
-            # analyze with spreadsheet data only using comprehensive approach
-            extraction_course_data = {
-                "course": keyword.strip(),
-                "posts": [],
-                "ucr_database": ucr_data
-            }
-            
-            # extract professor names from database data
-            professor_names = await openai_service.extract_all_professor_names(extraction_course_data)
-            logger.info(f"🔍 Extracted {len(professor_names)} professor names from database: {professor_names}")
-            
-            # Try RMP search if enabled and professors found
-            rmp_data = {"professors": [], "enabled": False}
-            if include_rmp and professor_names:
-                try:
-                    rmp_result = await rmp_service.get_course_specific_professor_data(
-                        course_code=keyword.strip(),
-                        extracted_professors=professor_names,
-                        school_name=school_name
-                    )
-                    if rmp_result["success"]:
-                        rmp_data = {
-                            "enabled": True,
-                            "professors": rmp_result["professors"],
-                            "stats": rmp_result["stats"],
-                            "school": rmp_result.get("school", {})
-                        }
-                except Exception as e:
-                    logger.error(f"RMP search failed for database-only analysis: {e}")
-            
-            course_data = {
-                "course": keyword.strip(),
-                "posts": [],
-                "ucr_database": ucr_data,
-                "rmp_data": rmp_data
-            }
-            
-            ai_analysis = await openai_service.analyze_course_discussions_structured(course_data)
-            
-            return {
-                "success": True,
-                "posts_analyzed": 0,
-                "ucr_database_included": True,
-                "rmp_enabled": include_rmp,
-                "raw_data": course_data,
-                "analysis": {
-                    "structured_data": ai_analysis.get("analysis") if ai_analysis.get("success") else None,
-                    "analysis_metadata": {
-                        "total_posts_analyzed": 0,
-                        "total_comments_analyzed": 0,
-                        "ucr_database_included": True,
-                        "rmp_enabled": include_rmp,
-                        "rmp_professors_count": len(rmp_data.get("professors", [])),
-                        "total_rmp_reviews": sum(prof.get("course_reviews_count", 0) for prof in rmp_data.get("professors", []))
-                    }
-                },
-                "optimization": "ai_comprehensive_database_only",
-                "professor_extraction": {
-                    "method": "ai_comprehensive",
-                    "extracted_count": len(professor_names),
-                    "rmp_found_count": len(rmp_data.get("professors", []))
-                }
-            }
-        
-        ucr_posts = search_results["subreddits"].get("ucr", {}).get("posts", [])
-        if not ucr_posts:
-            return {
-                "success": False,
-                "error": "No UCR posts found",
-                "message": f"No posts found in r/ucr for '{keyword}'"
-            }
-        
-        post_ids = [post["id"] for post in ucr_posts[:max_posts]]
-        
-        logger.info("Fetching Reddit full content and UCR database data in parallel...")
-        
-        reddit_task = reddit_service.get_multiple_posts_for_ai(post_ids, max_comments_per_post)
-        sheets_task = asyncio.to_thread(sheets_service.format_for_ai_analysis, keyword.strip())
-        
-        full_content_data, ucr_database_data = await asyncio.gather(reddit_task, sheets_task)
-        
-        if not full_content_data["success"]:
-            return {
-                "success": False,
-                "error": "Failed to get full Reddit content"
-            }
-        
-        posts_data = full_content_data["data"]
-        filtered_posts_data = reddit_service.filter_posts_for_main_topic(posts_data, keyword.strip())
-        
-        # STEP 2: 🎯 FIRST ANALYSIS - Determine actual professors from Reddit + Google Sheets
-        logger.info("Step 2: Running initial analysis to determine actual professors from Reddit + Google Sheets...")
-        progress.emit("initial_analysis", "Analyzing data...", 20)
+        # repeat lookups skip reddit, rmp and openai entirely
+        cache_key = f"enhanced:v1:{course_key.lower()}:{max_posts}:{max_comments_per_post}:{include_rmp}:{school_name.lower()}"
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached enhanced analysis for: %s", course_key)
+            progress.emit("complete", "Analysis complete!", 100)
+            progress.cleanup()
+            result = orjson.loads(cached)
+            if "session_id" in result:
+                result["session_id"] = session_id
+            if not include_raw:
+                result.pop("raw_data", None)
+            return ORJSONResponse(result)
+        
+        leader = not inflight.is_running(cache_key)
+        if leader and get_openai_service().saturated:
+            progress.emit("error", "Analysis service is busy, please try again shortly", 0)
+            progress.cleanup()
+            _reject_if_busy()
+        result = await inflight.run(
+            cache_key,
+            lambda: _run_enhanced_analysis(
+                course_key, max_posts, max_comments_per_post, include_rmp, school_name, session_id, progress, cache_key
+            )
+        )
+        if not leader:
+            # the shared run reported progress to the first caller's session - just close ours out
+            logger.info("🔗 Joined in-flight enhanced analysis for: %s", course_key)
+            progress.emit("complete", "Analysis complete!", 100)
+            progress.cleanup()
+            if "session_id" in result:
+                result = {**result, "session_id": session_id}
+        result = _with_raw_data(result, include_raw)
+        # hand the plain dict straight to orjson - a returned dict would first be walked by jsonable_encoder
+        return ORJSONResponse(result)
         
-        initial_course_data = {
-            "course": keyword.strip(),
-            "posts": filtered_posts_data,
-            "ucr_database": ucr_database_data if ucr_database_data else ""
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Optimized enhanced course analysis failed for {course_key}: {e}")
+        # Cleanup progress tracker on error
+        if 'progress' in locals():
+            progress.emit("error", f"Analysis failed: {str(e)}", 0)
+            progress.cleanup()
+        raise HTTPException(status_code=500, detail=f"Enhanced course analysis failed: {str(e)}")
+
+@app.get("/api/course-analysis-enhanced/stream")
+async def stream_enhanced_course_analysis(
+    keyword: str = Query(..., description="Course ID or name to analyze"),
+    max_posts: int = Query(default=50, ge=1, le=200, description="Maximum posts to analyze"),
+    max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post"),
+    include_rmp: bool = Query(default=True, description="Include Rate My Professor data"),
+    school_name: str = Query(default="University of California Riverside", description="School name for RMP lookup"),
+    session_id: str = Query(default=None, description="Session ID for progress tracking"),
+    include_raw: bool = Query(default=True, description="Include the raw posts/database data the analysis was built from")
+):
+    """
+    same pipeline as /api/course-analysis-enhanced, but each stage is sent as a server-sent event when it's ready
+    so the initial analysis can be shown while rmp and the final pass are still running.
+    events: {"stage": "initial", ...} → {"stage": "rmp", ...} → {"stage": "final", "result": {...}} (or {"stage": "error"}),
+    with {"stage": "partial", "pass": "initial"|"final", "delta": "..."} chunks of each pass's json in between
+    """
+    course_key = _normalize_query(keyword)
+    if not course_key:
+        raise HTTPException(status_code=400, detail="Course keyword cannot be empty")
+    
+    _reject_if_busy()
+    logger.info("Streaming enhanced analysis for: %s", course_key)
+    
+    if not session_id:
+        session_id = str(uuid.uuid4())
+    progress = ProgressUpdate(session_id)
+    progress.emit("starting", f"Starting analysis for {course_key}...", 0)
+    
+    cache_key = f"enhanced:v1:{course_key.lower()}:{max_posts}:{max_comments_per_post}:{include_rmp}:{school_name.lower()}"
+    
+    async def event_generator():
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached enhanced analysis for: %s", course_key)
+            progress.emit("complete", "Analysis complete!", 100)
+            progress.cleanup()
+            result = orjson.loads(cached)
+            if "session_id" in result:
+                result["session_id"] = session_id
+            if not include_raw:
+                result.pop("raw_data", None)
+            yield _sse_event({"stage": "final", "result": result})
+            return
+        
+        # the pipeline pushes its intermediate stages here, then None once it's done
+        stages: asyncio.Queue = asyncio.Queue()
+        task = asyncio.create_task(_run_enhanced_analysis(
+            course_key, max_posts, max_comments_per_post, include_rmp, school_name, session_id, progress, cache_key,
+            on_stage=stages.put_nowait
+        ))
+        task.add_done_callback(lambda _: stages.put_nowait(None))
+        try:
+            while (stage := await stages.get()) is not None:
+                yield _sse_event(stage)
+            try:
+                result = task.result()
+            except Exception as e:
+                logger.error(f"Streaming enhanced analysis failed for {course_key}: {e}")
+                progress.emit("error", f"Analysis failed: {str(e)}", 0)
+                yield _sse_event({"stage": "error", "message": "Analysis temporarily unavailable. Please try again later."})
+                return
+            result = _with_raw_data(result, include_raw)
+            yield _sse_event({"stage": "final", "result": result})
+        finally:
+            # client went away mid-analysis - don't keep paying for openai calls nobody reads
+            if not task.done():
+                task.cancel()
+            progress.cleanup()
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
         }
+    )
+
+# 🔄 LEGACY ENDPOINT: same handler as the enhanced endpoint (whose defaults already include rmp
+# for ucr), registered under the old path so there's no extra call layer or redirect round trip
+app.add_api_route(
+    "/api/course-analysis-structured",
+    get_enhanced_course_analysis,
+    methods=["GET"],
+    summary="Get Structured Course Analysis (legacy alias of /api/course-analysis-enhanced)"
+)
+
+async def _search_reddit_for_professor(
+    actual_professor_name: str,
+    max_posts: int,
+    max_comments_per_post: int,
+    progress: ProgressUpdate
+) -> List[Dict[str, Any]]:
+    """step 2 of the professor analysis - full reddit posts mentioning the professor (empty on any failure)"""
+    logger.info("Step 2: Searching Reddit...")
+    progress.emit("reddit_search", "Searching Reddit posts...", 40)
+    reddit_posts_data = []
+    
+    try:
+        # 🚀 REDDIT SEARCH for professor
+        search_query = actual_professor_name
+        logger.info("🔍 Reddit search for professor: '%s'", search_query)
         
-        # Run structured analysis to get professors based on actual data
-        initial_analysis = await openai_service.analyze_course_discussions_structured(initial_course_data)
+        search_results = await reddit_service.search_course_info(search_query, max_posts)
         
-        if not initial_analysis.get("success"):
-            logger.warning("Initial analysis failed, proceeding without RMP data")
-            return {
-                "success": True,
-                "posts_analyzed": len(filtered_posts_data),
-                "ucr_database_included": bool(ucr_database_data),
-                "rmp_enabled": include_rmp,
-                "raw_data": initial_course_data,
-                "analysis": {
-                    "structured_data": initial_analysis.get("analysis"),
-                    "analysis_metadata": {
-                        "total_posts_analyzed": len(filtered_posts_data),
-                        "total_comments_analyzed": sum(len(post_data.get("comments", [])) for post_data in filtered_posts_data),
-                        "ucr_database_included": bool(ucr_database_data),
-                        "rmp_enabled": False,
-                        "rmp_professors_count": 0,
-                        "total_rmp_reviews": 0
-                    }
-                },
-                "optimization": "initial_analysis_failed",
-                "professor_extraction": {
-                    "method": "none",
-                    "extracted_count": 0,
-                    "rmp_found_count": 0
-                }
-            }
-        
-        # STEP 3: Extract professor names from the initial analysis result
-        finalized_professors = []
-        try:
-            analysis_data = initial_analysis.get("analysis", {})
-            professors_section = analysis_data.get("professors", [])
+        if search_results and search_results["total_posts"] > 0:
+            ucr_posts = search_results["subreddits"].get("ucr", {}).get("posts", [])
             
-            for prof in professors_section:
-                prof_name = prof.get("name", "").strip()
-                if prof_name and len(prof_name) > 2:
-                    finalized_professors.append(prof_name)
-            
-            logger.info(f"🎯 Extracted {len(finalized_professors)} finalized professors from analysis: {finalized_professors}")
-            
-        except Exception as e:
-            logger.error(f"Error extracting professors from initial analysis: {e}")
-            finalized_professors = []
-        
-        # STEP 4: Targeted RMP Search (only if we have finalized professors and RMP is enabled)
-        rmp_data = {"professors": [], "enabled": False}
-        
-        if include_rmp and finalized_professors:
-            logger.info(f"Step 4: Targeted RMP search for {len(finalized_professors)} finalized professors...")
-            progress.emit("rmp_search", "Searching Rate My Professors...", 60)
+            if ucr_posts:
+                post_ids = [post["id"] for post in islice(ucr_posts, max_posts)]
+                full_content_data = await reddit_service.get_multiple_posts_for_ai(post_ids, max_comments_per_post)
+                
+                if full_content_data["success"]:
+                    reddit_posts_data = full_content_data["data"]
+                    logger.info("Found %s Reddit posts mentioning %s", len(reddit_posts_data), actual_professor_name)
+                    
+    except Exception as e:
+        logger.error(f"Reddit search failed for {actual_professor_name}: {e}")
+    
+    return reddit_posts_data
+
+async def _search_ucr_database_for_professor(
+    actual_professor_name: str,
+    ucr_reviews_task: asyncio.Task,
+    progress: ProgressUpdate
+) -> str:
+    """step 3 of the professor analysis - ucr database reviews that mention the professor (empty on any failure)"""
+    logger.info("Step 3: Searching UCR Database...")
+    progress.emit("database_search", "Searching Google Sheets database...", 60)
+    ucr_professor_mentions = ""
+    
+    try:
+        # 🚀 EFFICIENT UCR DATABASE SEARCH
+        # relevant reviews were already being fetched while rmp ran
+        ucr_reviews = await ucr_reviews_task
+        
+        if ucr_reviews:
+            # Format reviews for AI processing
+            formatted_ucr_data = await sheets_service.run_blocking(
+                sheets_service.format_reviews_for_professor_ai,
+                ucr_reviews, 
+                actual_professor_name, 
+                ""
+            )
             
-            try:
-                # Much more efficient - only search for professors actually found in data
-                rmp_result = await rmp_service.get_course_specific_professor_data(
-                    course_code=keyword.strip(),
-                    extracted_professors=finalized_professors,  # Only finalized professors
-                    school_name=school_name
+            # Use AI to filter for professor mentions
+            if formatted_ucr_data:
+                ucr_filter_result = await get_openai_service().filter_ucr_reviews_for_professor(
+                    actual_professor_name,
+                    formatted_ucr_data,
+                    ""
                 )
                 
-                if rmp_result["success"]:
-                    rmp_data = {
-                        "enabled": True,
-                        "professors": rmp_result["professors"],
-                        "stats": rmp_result["stats"],
-                        "school": rmp_result.get("school", {})
-                    }
-                    logger.info(f"Retrieved RMP data for {len(rmp_result['professors'])} professors")
+                if ucr_filter_result.get("success"):
+                    ucr_professor_mentions = ucr_filter_result.get("professor_mentions", "")
+                    if ucr_professor_mentions:
+                        logger.info("Found UCR database mentions for %s", actual_professor_name)
+                    else:
+                        logger.info("No UCR database mentions found for %s", actual_professor_name)
                 else:
-                    logger.warning(f"RMP data retrieval failed: {rmp_result.get('error', 'Unknown error')}")
-                    
-            except Exception as e:
-                logger.error(f"Error in targeted RMP search: {e}")
-                rmp_data = {"enabled": True, "error": str(e)}
+                    logger.warning("UCR filtering failed for %s", actual_professor_name)
+        else:
+            logger.info("No UCR database reviews found for analysis")
+            
+    except Exception as e:
+        logger.error(f"UCR database search failed for {actual_professor_name}: {e}")
+    
+    return ucr_professor_mentions
+
+def _normalize_query(text: str) -> str:
+    """a user-typed professor name or course with surrounding and repeated whitespace removed"""
+    return " ".join(text.split())
+
+def _professor_cache_key(professor_name: str, max_posts: int, max_comments_per_post: int, school_name: str) -> str:
+    """cache key for a finished professor analysis - case and spacing of the name don't matter"""
+    normalized = " ".join(professor_name.lower().split())
+    return f"professor:v1:{normalized}:{max_posts}:{max_comments_per_post}:{school_name.lower()}"
+
+def _cached_professor_result(cached: bytes, name: str, session_id: str) -> Dict[str, Any]:
+    """a cached professor analysis, labelled with this caller's spelling of the name and session"""
+    result = orjson.loads(cached)
+    result["professor_name"] = name
+    result["session_id"] = session_id
+    return result
+
+async def _run_professor_analysis(
+    name: str,
+    max_posts: int,
+    max_comments_per_post: int,
+    school_name: str,
+    session_id: str,
+    progress: ProgressUpdate,
+    cache_key: str
+) -> Dict[str, Any]:
+    """the professor analysis pipeline behind get_professor_analysis (rmp → reddit + ucr database → ai)"""
+    # the ucr review sheet doesn't depend on the professor, so start loading it right away
+    ucr_reviews_task = asyncio.create_task(sheets_service.aget_reviews_for_professor_analysis(""))
+    try:
+        return await _professor_analysis_steps(
+            name, max_posts, max_comments_per_post, school_name, session_id, progress, cache_key, ucr_reviews_task
+        )
+    finally:
+        # early returns (professor not found, cached under the rmp name) never await the reviews - don't leave them loading for nobody
+        ucr_reviews_task.cancel()
+
+async def _professor_analysis_steps(
+    name: str,
+    max_posts: int,
+    max_comments_per_post: int,
+    school_name: str,
+    session_id: str,
+    progress: ProgressUpdate,
+    cache_key: str,
+    ucr_reviews_task: asyncio.Task
+) -> Dict[str, Any]:
+    """the steps of _run_professor_analysis, with the ucr review lookup it already started"""
+    # STEP 1: Search RMP FIRST for fast course validation
+    logger.info("Step 1: Searching Rate My Professors...")
+    progress.emit("rmp_search", "Searching Rate My Professors...", 20)
+    rmp_data = {"professors": [], "enabled": False}
+    
+    try:
+        # Quick RMP lookup for professor data
+        rmp_result = await rmp_service.get_course_specific_professor_data(
+            course_code="",
+            extracted_professors=[name],
+            school_name=school_name
+        )
         
-        # STEP 5: Final Enhanced AI Analysis (if we have RMP data, re-analyze with it)
-        if rmp_data.get("professors"):
-            logger.info("Step 5: Re-running analysis with RMP data for enhanced results...")
-            progress.emit("final_analysis", "Generating comprehensive analysis...", 80)
-            
-            final_course_data = {
-                "course": keyword.strip(),
-                "posts": filtered_posts_data,
-                "ucr_database": ucr_database_data if ucr_database_data else "",
-                "rmp_data": rmp_data
+        if rmp_result["success"] and rmp_result["professors"]:
+            rmp_data = {
+                "enabled": True,
+                "professors": rmp_result["professors"],
+                "stats": rmp_result["stats"],
+                "school": rmp_result.get("school", {})
             }
-            
-            final_analysis = await openai_service.analyze_course_discussions_structured(final_course_data)
-        else:
-            logger.info("Step 5: No RMP data available, using initial analysis results...")
-            progress.emit("final_analysis", "Finalizing analysis...", 80)
-            final_analysis = initial_analysis
-            final_course_data = initial_course_data
-        
-        if final_analysis.get("success"):
-            logger.info("✅ Final analysis completed successfully")
+            # Get the actual professor name from RMP for more accurate searches
+            actual_professor_name = rmp_result["professors"][0].get("name", name)
+            if actual_professor_name != name:
+                logger.info("Found RMP data for '%s' → using correct name: '%s'", name, actual_professor_name)
+            else:
+                logger.info("Found RMP data for %s", name)
         else:
-            logger.warning("⚠️ Final analysis had issues, but continuing...")
-        
-        # Completion event
-        progress.emit("complete", "Analysis complete!", 100)
-        
-        # Return the final analysis result with session_id
-        result = {
-            "success": True,
-            "posts_analyzed": len(filtered_posts_data),
-            "ucr_database_included": bool(ucr_database_data),
-            "rmp_enabled": include_rmp,
-            "raw_data": final_course_data,
-            "analysis": {
-                "structured_data": final_analysis.get("analysis") if final_analysis.get("success") else None,
-                "analysis_metadata": {
-                    "total_posts_analyzed": len(filtered_posts_data),
-                    "total_comments_analyzed": sum(len(post_data.get("comments", [])) for post_data in filtered_posts_data),
-                    "ucr_database_included": bool(ucr_database_data),
-                    "rmp_enabled": include_rmp,
-                    "rmp_professors_count": len(rmp_data.get("professors", [])),
-                    "total_rmp_reviews": sum(prof.get("course_reviews_count", 0) for prof in rmp_data.get("professors", []))
-                }
-            },
-            "optimization": "finalized_professors_then_rmp" if rmp_data.get("professors") else "reddit_and_sheets_only",
-            "professor_extraction": {
-                "method": "analysis_based_finalized", 
-                "finalized_count": len(finalized_professors),
-                "rmp_found_count": len(rmp_data.get("professors", []))
-            },
-            "session_id": session_id
-        }
-        
-        # Cleanup progress tracker after successful completion
-        progress.cleanup()
-        return result
-        
+            actual_professor_name = name
+            logger.warning("No RMP data found for %s", name)
+            
     except Exception as e:
-        logger.error(f"Optimized enhanced course analysis failed for {keyword}: {e}")
-        # Cleanup progress tracker on error
-        if 'progress' in locals():
-            progress.emit("error", f"Analysis failed: {str(e)}", 0)
+        actual_professor_name = name
+        logger.error(f"RMP search failed for {name}: {e}")
+    
+    # Skip course validation - analyzing all professor data
+    
+    # Strict validation: Require RMP data to confirm this is a real professor
+    # UCR database and Reddit alone can be too noisy for nonsensical searches,
+    # so don't search them (or pay for the ucr filter call) without it
+    if not rmp_data.get("professors"):
+        logger.warning("No data found for professor %s from any source", actual_professor_name)
+        return {
+            "success": False,
+            "error": "professor_not_found",
+            "message": f"Professor '{actual_professor_name}' not found in our databases. Please double-check the professor name spelling.",
+            "professor_name": name,  # Keep original for frontend display
+            "course_filter": None,
+            "suggestion": "Try searching with a different spelling.",
+            "data_sources_checked": {
+                "rmp": "No professors found",
+                "reddit": "No posts found", 
+                "ucr_database": "No mentions found"
+            }
+        }
+    
+    # another spelling may already have been analyzed under the name rmp resolved to
+    actual_cache_key = _professor_cache_key(actual_professor_name, max_posts, max_comments_per_post, school_name)
+    if actual_cache_key != cache_key:
+        cached = await response_cache.get(actual_cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached professor analysis for '%s' (as '%s')", name, actual_professor_name)
+            await response_cache.set(cache_key, cached, PROFESSOR_CACHE_TTL)
+            progress.emit("complete", "Professor analysis complete!", 100)
             progress.cleanup()
-        raise HTTPException(status_code=500, detail=f"Enhanced course analysis failed: {str(e)}")
-
-@app.get("/api/course-analysis-structured")
-async def get_structured_course_analysis(
-    keyword: str = Query(..., description="Course ID or name to analyze"),
-    max_posts: int = Query(default=50, ge=1, le=200, description="Maximum posts to analyze"),
-    max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post"),
-    session_id: str = Query(default=None, description="Session ID for progress tracking")
-):
-    """
-    🔄 LEGACY ENDPOINT: Redirects to enhanced endpoint for backward compatibility
-    """
-    # Call the enhanced endpoint with RMP enabled by default
-    return await get_enhanced_course_analysis(
-        keyword=keyword,
-        max_posts=max_posts,
-        max_comments_per_post=max_comments_per_post,
-        include_rmp=True,
-        school_name="University of California Riverside",
-        session_id=session_id
+            return _cached_professor_result(cached, name, session_id)
+    
+    # STEPS 2 + 3: reddit and the ucr database both search by the corrected name, but not on each other
+    reddit_posts_data, ucr_professor_mentions = await asyncio.gather(
+        _search_reddit_for_professor(actual_professor_name, max_posts, max_comments_per_post, progress),
+        _search_ucr_database_for_professor(actual_professor_name, ucr_reviews_task, progress)
+    )
+    
+    # STEP 4: Use all data (no course filtering)
+    filtered_reddit_data = reddit_posts_data
+    filtered_sheets_data = ucr_professor_mentions
+    
+    # STEP 5: Comprehensive AI Analysis (only with real data)
+    logger.info("Step 5: Running comprehensive professor analysis...")
+    progress.emit("final_analysis", "Generating professor profile...", 80)
+    
+    analysis_data = {
+        "professor_name": actual_professor_name,
+        "course_filter": "",
+        "posts": filtered_reddit_data,
+        "ucr_database": filtered_sheets_data,
+        "rmp_data": rmp_data
+    }
+    
+    analysis_result = await get_openai_service().analyze_professor_comprehensive(analysis_data)
+    
+    # Calculate accurate data source stats (once - the log summary and the response share them)
+    rmp_professors = rmp_data["professors"]
+    total_rmp_course_reviews = sum(prof.get("course_reviews_count", 0) for prof in rmp_professors)
+    total_reddit_comments = sum(len(post_data.get("comments") or ()) for post_data in filtered_reddit_data)
+    
+    progress.emit("complete", "Professor analysis complete!", 100)
+    
+    # one record instead of five
+    logger.info(
+        "📊 Data Sources Summary: RMP Professors Found: %s, RMP Course Reviews: %s, Reddit Posts: %s, UCR Database: %s",
+        len(rmp_professors), total_rmp_course_reviews, len(filtered_reddit_data), "Yes" if filtered_sheets_data else "No"
     )
+    
+    result = {
+        "success": True,
+        "professor_name": name,  # Keep original for frontend display
+        "actual_professor_name": actual_professor_name,  # Add corrected name for reference
+        "course_filter": None,
+        "data_sources": {
+            "rmp_professors_found": len(rmp_professors),
+            "reddit_posts_analyzed": len(filtered_reddit_data),
+            "reddit_comments_analyzed": total_reddit_comments,
+            "ucr_database_included": bool(filtered_sheets_data),
+            "total_rmp_reviews": total_rmp_course_reviews  # Use course-specific count
+        },
+        "raw_data": analysis_data,
+        "analysis": analysis_result,
+        "session_id": session_id
+    }
+    
+    # only cache complete analyses, under both the searched and the rmp spelling of the name
+    if analysis_result.get("success"):
+        payload = orjson.dumps(result)
+        for key in {cache_key, actual_cache_key}:
+            await response_cache.set(key, payload, PROFESSOR_CACHE_TTL)
+    
+    progress.cleanup()
+    return result
 
 @app.get("/api/professor-analysis")
 async def get_professor_analysis(
@@ -599,256 +1211,178 @@ async def get_professor_analysis(
     max_posts: int = Query(default=50, ge=1, le=200, description="Maximum posts to analyze"),
     max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post"),
     school_name: str = Query(default="University of California Riverside", description="School name for RMP lookup"),
-    session_id: str = Query(default=None, description="Session ID for progress tracking")
+    session_id: str = Query(default=None, description="Session ID for progress tracking"),
+    include_raw: bool = Query(default=False, description="Also return the rmp/reddit/database data the analysis was built from")
 ):
     """
     🆕 PROFESSOR ANALYSIS: Comprehensive professor review analysis
     Searches RMP, Reddit, and Google Sheets for a specific professor
     """
+    # normalized once - used for display, logs, the rmp/reddit searches and (lowercased) the cache key
+    name = _normalize_query(professor_name)
+    
     # Initialize progress tracking for professor analysis
     if not session_id:
         session_id = str(uuid.uuid4())
     
     progress = ProgressUpdate(session_id)
-    progress.emit("starting", f"Starting professor analysis for {professor_name}...", 0)
+    progress.emit("starting", f"Starting professor analysis for {name}...", 0)
     
     try:
-        logger.info(f"🎓 Professor analysis for: {professor_name}")
+        logger.info("🎓 Professor analysis for: %s", name)
         
-        if not professor_name.strip():
+        if not name:
             progress.cleanup()
             raise HTTPException(status_code=400, detail="Professor name cannot be empty")
         
-        # STEP 1: Search RMP FIRST for fast course validation
-        logger.info("Step 1: Searching Rate My Professors...")
-        progress.emit("rmp_search", "Searching Rate My Professors...", 20)
-        rmp_data = {"professors": [], "enabled": False}
-        
-        try:
-            # Quick RMP lookup for professor data
-            rmp_result = await rmp_service.get_course_specific_professor_data(
-                course_code="",
-                extracted_professors=[professor_name.strip()],
-                school_name=school_name
+        # repeat lookups (in any capitalization/spacing) skip rmp, reddit and openai entirely
+        cache_key = _professor_cache_key(name, max_posts, max_comments_per_post, school_name)
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached professor analysis for: %s", name)
+            progress.emit("complete", "Professor analysis complete!", 100)
+            progress.cleanup()
+            result = _cached_professor_result(cached, name, session_id)
+            return ORJSONResponse(_with_raw_data(result, include_raw))
+        
+        # identical concurrent lookups share one run of the pipeline
+        inflight_key = cache_key
+        leader = not inflight.is_running(inflight_key)
+        if leader and get_openai_service().saturated:
+            progress.emit("error", "Analysis service is busy, please try again shortly", 0)
+            progress.cleanup()
+            _reject_if_busy()
+        result = await inflight.run(
+            inflight_key,
+            lambda: _run_professor_analysis(
+                name, max_posts, max_comments_per_post, school_name, session_id, progress, cache_key
             )
-            
-            if rmp_result["success"] and rmp_result["professors"]:
-                rmp_data = {
-                    "enabled": True,
-                    "professors": rmp_result["professors"],
-                    "stats": rmp_result["stats"],
-                    "school": rmp_result.get("school", {})
-                }
-                # Get the actual professor name from RMP for more accurate searches
-                actual_professor_name = rmp_result["professors"][0].get("name", professor_name.strip())
-                if actual_professor_name != professor_name.strip():
-                    logger.info(f"Found RMP data for '{professor_name}' → using correct name: '{actual_professor_name}'")
-                else:
-                    logger.info(f"Found RMP data for {professor_name}")
-            else:
-                actual_professor_name = professor_name.strip()
-                logger.warning(f"No RMP data found for {professor_name}")
-                
-        except Exception as e:
-            actual_professor_name = professor_name.strip()
-            logger.error(f"RMP search failed for {professor_name}: {e}")
-        
-        # Skip course validation - analyzing all professor data
-        
-        # STEP 2: Search Reddit for the professor
-        logger.info("Step 2: Searching Reddit...")
-        progress.emit("reddit_search", "Searching Reddit posts...", 40)
-        reddit_posts_data = []
-        
-        try:
-            # 🚀 REDDIT SEARCH for professor
-            search_query = actual_professor_name
-            logger.info(f"🔍 Reddit search for professor: '{search_query}'")
-            
-            search_results = await reddit_service.search_course_info(search_query, max_posts)
-            
-            if search_results and search_results["total_posts"] > 0:
-                ucr_posts = search_results["subreddits"].get("ucr", {}).get("posts", [])
-                
-                if ucr_posts:
-                    post_ids = [post["id"] for post in ucr_posts[:max_posts]]
-                    full_content_data = await reddit_service.get_multiple_posts_for_ai(post_ids, max_comments_per_post)
-                    
-                    if full_content_data["success"]:
-                        reddit_posts_data = full_content_data["data"]
-                        logger.info(f"Found {len(reddit_posts_data)} Reddit posts mentioning {actual_professor_name}")
-                        
-        except Exception as e:
-            logger.error(f"Reddit search failed for {actual_professor_name}: {e}")
-            
-        # STEP 3: Search UCR Database for the professor (OPTIMIZED)
-        logger.info("Step 3: Searching UCR Database...")
-        progress.emit("database_search", "Searching Google Sheets database...", 60)
-        ucr_professor_mentions = ""
-        
-        try:
-            # 🚀 EFFICIENT UCR DATABASE SEARCH
-            # Get relevant reviews for professor analysis
-            ucr_reviews = sheets_service.get_reviews_for_professor_analysis("")
-            
-            if ucr_reviews:
-                # Format reviews for AI processing
-                formatted_ucr_data = sheets_service.format_reviews_for_professor_ai(
-                    ucr_reviews, 
-                    actual_professor_name, 
-                    ""
-                )
-                
-                # Use AI to filter for professor mentions
-                if formatted_ucr_data:
-                    ucr_filter_result = await openai_service.filter_ucr_reviews_for_professor(
-                        actual_professor_name,
-                        formatted_ucr_data,
-                        ""
-                    )
-                    
-                    if ucr_filter_result.get("success"):
-                        ucr_professor_mentions = ucr_filter_result.get("professor_mentions", "")
-                        if ucr_professor_mentions:
-                            logger.info(f"Found UCR database mentions for {actual_professor_name}")
-                        else:
-                            logger.info(f"No UCR database mentions found for {actual_professor_name}")
-                    else:
-                        logger.warning(f"UCR filtering failed for {actual_professor_name}")
-            else:
-                logger.info(f"No UCR database reviews found for analysis")
-                
-        except Exception as e:
-            logger.error(f"UCR database search failed for {actual_professor_name}: {e}")
-            
-        # STEP 4: Use all data (no course filtering)
-        filtered_reddit_data = reddit_posts_data
-        filtered_sheets_data = ucr_professor_mentions
-        
-        # STEP 5: Validate we have REAL data before AI analysis
-        has_rmp_data = rmp_data.get("professors") and len(rmp_data.get("professors", [])) > 0
-        has_reddit_data = filtered_reddit_data and len(filtered_reddit_data) > 0
-        has_sheets_data = filtered_sheets_data and (isinstance(filtered_sheets_data, str) and filtered_sheets_data.strip())
-        
-        # Strict validation: Require RMP data to confirm this is a real professor
-        # UCR database and Reddit alone can be too noisy for nonsensical searches
-        if not has_rmp_data:
-            logger.warning(f"No data found for professor {actual_professor_name} from any source")
-            return {
-                "success": False,
-                "error": "professor_not_found",
-                "message": f"Professor '{actual_professor_name}' not found in our databases. Please double-check the professor name spelling.",
-                "professor_name": professor_name.strip(),  # Keep original for frontend display
-                "course_filter": None,
-                "suggestion": "Try searching with a different spelling.",
-                "data_sources_checked": {
-                    "rmp": "No professors found",
-                    "reddit": "No posts found", 
-                    "ucr_database": "No mentions found"
-                }
-            }
-        
-        # STEP 5: Comprehensive AI Analysis (only with real data)
-        logger.info("Step 5: Running comprehensive professor analysis...")
-        progress.emit("final_analysis", "Generating professor profile...", 80)
-        
-        analysis_data = {
-            "professor_name": actual_professor_name,
-            "course_filter": "",
-            "posts": filtered_reddit_data,
-            "ucr_database": filtered_sheets_data,
-            "rmp_data": rmp_data
-        }
-        
-        analysis_result = await openai_service.analyze_professor_comprehensive(analysis_data)
-        
-        # Calculate accurate data source stats
-        total_rmp_course_reviews = sum(prof.get("course_reviews_count", 0) for prof in rmp_data.get("professors", []))
-        
-        progress.emit("complete", "Professor analysis complete!", 100)
-        
-        logger.info(f"📊 Data Sources Summary:")
-        logger.info(f"  - RMP Professors Found: {len(rmp_data.get('professors', []))}")
-        logger.info(f"  - RMP Course Reviews: {total_rmp_course_reviews}")
-        logger.info(f"  - Reddit Posts: {len(filtered_reddit_data)}")
-        logger.info(f"  - UCR Database: {'Yes' if filtered_sheets_data else 'No'}")
-        
-        result = {
-            "success": True,
-            "professor_name": professor_name.strip(),  # Keep original for frontend display
-            "actual_professor_name": actual_professor_name,  # Add corrected name for reference
-            "course_filter": None,
-            "data_sources": {
-                "rmp_professors_found": len(rmp_data.get("professors", [])),
-                "reddit_posts_analyzed": len(filtered_reddit_data),
-                "reddit_comments_analyzed": sum(len(post_data.get("comments", [])) for post_data in filtered_reddit_data),
-                "ucr_database_included": bool(filtered_sheets_data),
-                "total_rmp_reviews": total_rmp_course_reviews  # Use course-specific count
-            },
-            "raw_data": analysis_data,
-            "analysis": analysis_result,
-            "session_id": session_id
-        }
-        
-        progress.cleanup()
-        return result
+        )
+        if not leader:
+            # the shared run reported progress to the first caller's session - just close ours out
+            logger.info("🔗 Joined in-flight professor analysis for: %s", name)
+            progress.emit("complete", "Professor analysis complete!", 100)
+            progress.cleanup()
+            if "session_id" in result:
+                result = {**result, "session_id": session_id}
+        # the frontend only renders the analysis - raw_data is for debugging
+        result = _with_raw_data(result, include_raw)
+        # plain dict straight to orjson, skipping jsonable_encoder's walk over raw_data
+        return ORJSONResponse(result)
         
+    except HTTPException:
+        raise
     except Exception as e:
-        logger.error(f"Professor analysis failed for {professor_name}: {e}")
+        logger.error(f"Professor analysis failed for {name}: {e}")
         if 'progress' in locals():
             progress.emit("error", f"Professor analysis failed: {str(e)}", 0)
             progress.cleanup()
         raise HTTPException(status_code=500, detail=f"Professor analysis failed: {str(e)}")
 
-@app.get("/api/course-analysis")
-async def get_complete_course_analysis(
-    keyword: str = Query(..., description="Course ID or name to analyze"),
+@app.get("/api/professor-analysis/stream")
+async def stream_professor_analysis(
+    professor_name: str = Query(..., description="Professor name to analyze"),
     max_posts: int = Query(default=50, ge=1, le=200, description="Maximum posts to analyze"),
-    max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post")
+    max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post"),
+    school_name: str = Query(default="University of California Riverside", description="School name for RMP lookup"),
+    session_id: str = Query(default=None, description="Session ID for progress tracking"),
+    include_raw: bool = Query(default=False, description="Also return the rmp/reddit/database data the analysis was built from")
 ):
     """
-    🎯 the main endpoint: search course → get content → get ucr database → ai analysis
+    same pipeline as /api/professor-analysis, but the progress events and the result come back on this
+    one connection as server-sent events (no separate /api/progress stream needed).
+    events: {"step": ..., "message": ..., "progress": ...} per step → {"step": "result", "result": {...}} (or {"step": "error"})
+    """
+    name = _normalize_query(professor_name)
+    if not name:
+        raise HTTPException(status_code=400, detail="Professor name cannot be empty")
+    
+    _reject_if_busy()
+    logger.info("🎓 Streaming professor analysis for: %s", name)
+    
+    if not session_id:
+        session_id = str(uuid.uuid4())
+    progress = ProgressUpdate(session_id)
+    progress.emit("starting", f"Starting professor analysis for {name}...", 0)
+    
+    cache_key = _professor_cache_key(name, max_posts, max_comments_per_post, school_name)
+    
+    async def run() -> Dict[str, Any]:
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached professor analysis for: %s", name)
+            progress.emit("complete", "Professor analysis complete!", 100)
+            return _cached_professor_result(cached, name, session_id)
+        return await _run_professor_analysis(
+            name, max_posts, max_comments_per_post, school_name, session_id, progress, cache_key
+        )
+    
+    async def event_generator():
+        task = asyncio.create_task(run())
+        # closes the session however the pipeline ends, which wakes the loop below for the last time
+        task.add_done_callback(lambda _: progress.cleanup())
+        sent = 0
+        try:
+            while True:
+                for event in progress.events_since(sent):
+                    yield _sse_event(event)
+                sent = progress.emitted
+                if progress.closed and progress.emitted == sent:
+                    break
+                if not await progress.wait(SSE_HEARTBEAT_INTERVAL):
+                    yield _SSE_HEARTBEAT
+            try:
+                result = await task
+            except Exception as e:
+                logger.error(f"Streaming professor analysis failed for {name}: {e}")
+                yield _sse_event({"step": "error", "message": "Professor analysis temporarily unavailable. Please try again later."})
+                return
+            yield _sse_event({"step": "result", "result": _with_raw_data(result, include_raw)})
+        finally:
+            # client went away mid-analysis - stop the pipeline
+            if not task.done():
+                task.cancel()
+            progress.cleanup()
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        }
+    )
+
+async def _gather_course_data(course_key: str, max_posts: int, max_comments_per_post: int) -> Dict[str, Any]:
+    """
+    search → full content → ucr database for one course
+    returns {"success": True, "course_data": ...} or the error response to send back
     """
+    # the ucr database lookup doesn't depend on reddit, so start it right away
+    sheets_task = asyncio.create_task(sheets_service.aformat_for_ai_analysis(course_key))
     try:
-        logger.info(f"Complete course analysis for: {keyword}")
-        
-        if not keyword.strip():
-            raise HTTPException(status_code=400, detail="Course keyword cannot be empty")
-        
         # step 1: search reddit for posts about this course
-        search_results = await reddit_service.search_course_info(keyword.strip(), max_posts)
+        search_results = await reddit_service.search_course_info(course_key, max_posts)
         
         if not search_results or search_results["total_posts"] == 0:
             # no reddit posts found, try ucr database only
-            ucr_data = sheets_service.format_for_ai_analysis(keyword.strip())
+            ucr_data = await sheets_task
             
             if not ucr_data or ucr_data.strip() == "":
                 return {
                     "success": False,
                     "error": "No data found",
-                    "message": f"No Reddit posts or UCR database entries found for '{keyword}'"
+                    "message": f"No Reddit posts or UCR database entries found for '{course_key}'"
                 }
             
             # we have ucr database data but no reddit posts
-            course_data = {
-                "course": keyword.strip(),
-                "posts": [],
-                "ucr_database": ucr_data
-            }
-            
-            # run ai analysis with just database data
-            ai_analysis = await openai_service.analyze_course_discussions(course_data)
-            
             return {
                 "success": True,
-                "posts_analyzed": 0,
-                "ucr_database_included": True,
-                "raw_data": {
-                    "course": keyword.strip(),
+                "course_data": {
+                    "course": course_key,
                     "posts": [],
                     "ucr_database": ucr_data
-                },
-                "ai_analysis": ai_analysis
+                }
             }
         
         # step 2: get full content from reddit posts for ai
@@ -858,18 +1392,16 @@ async def get_complete_course_analysis(
             return {
                 "success": False,
                 "error": "No UCR posts found",
-                "message": f"No posts found in r/ucr for '{keyword}'"
+                "message": f"No posts found in r/ucr for '{course_key}'"
             }
         
         # get post ids from search results
-        post_ids = [post["id"] for post in ucr_posts[:max_posts]]
-        
-        # step 2 & 3: 🚀 PARALLEL DATA GATHERING - Fetch Reddit full content AND Sheets data simultaneously!
-        logger.info("Fetching Reddit full content and UCR database data in parallel...")
-        reddit_task = reddit_service.get_multiple_posts_for_ai(post_ids, max_comments_per_post)
-        sheets_task = asyncio.to_thread(sheets_service.format_for_ai_analysis, keyword.strip())
+        post_ids = [post["id"] for post in islice(ucr_posts, max_posts)]
         
-        full_content_data, ucr_database_data = await asyncio.gather(reddit_task, sheets_task)
+        # step 2 & 3: 🚀 PARALLEL DATA GATHERING - Sheets lookup has been running since the start
+        # step 4: 🎯 FILTER POSTS FOR MAIN TOPIC RELEVANCE (before AI analysis) - each post as it arrives
+        logger.info("Fetching and filtering Reddit full content (UCR database lookup already running)...")
+        full_content_data = await _fetch_filtered_posts(post_ids, max_comments_per_post, course_key)
         
         if not full_content_data["success"]:
             return {
@@ -878,36 +1410,149 @@ async def get_complete_course_analysis(
                 "message": "Could not retrieve full post content for analysis"
             }
         
-        posts_data = full_content_data["data"]
+        ucr_database_data = await sheets_task
         
-        # step 4: 🎯 FILTER POSTS FOR MAIN TOPIC RELEVANCE (before AI analysis)
-        filtered_posts_data = reddit_service.filter_posts_for_main_topic(posts_data, keyword.strip())
+        filtered_posts_data = full_content_data["data"]
         
         # step 5: combine data for ai analysis
-        course_data = {
-            "course": keyword.strip(),
-            "posts": filtered_posts_data,  # Use filtered posts for AI analysis
-            "ucr_database": ucr_database_data if ucr_database_data else ""
-        }
-        
-        # step 6: run ai analysis
-        ai_analysis = await openai_service.analyze_course_discussions(course_data)
-        
         return {
             "success": True,
-            "posts_analyzed": len(filtered_posts_data),
-            "ucr_database_included": bool(ucr_database_data),
-            "raw_data": {
-                "course": keyword.strip(),
-                "posts": filtered_posts_data,  # Send filtered posts to frontend
-                "ucr_database": ucr_database_data
-            },
-            "ai_analysis": ai_analysis
+            "course_data": {
+                "course": course_key,
+                "posts": filtered_posts_data,  # Use filtered posts for AI analysis
+                "ucr_database": ucr_database_data if ucr_database_data else ""
+            }
         }
+    finally:
+        # the early returns never await the lookup - don't leave it running for nobody
+        sheets_task.cancel()
+
+async def _run_course_analysis(course_key: str, max_posts: int, max_comments_per_post: int, cache_key: str) -> Dict[str, Any]:
+    """search → full content → ucr database → ai analysis for /api/course-analysis (full result, raw_data included)"""
+    gathered = await _gather_course_data(course_key, max_posts, max_comments_per_post)
+    if not gathered["success"]:
+        return gathered
+    course_data = gathered["course_data"]
+    
+    # step 6: run ai analysis
+    ai_analysis = await get_openai_service().analyze_course_discussions(course_data)
+    
+    result = {
+        "success": True,
+        "posts_analyzed": len(course_data["posts"]),
+        "ucr_database_included": bool(course_data["ucr_database"]),
+        "raw_data": _client_raw_data(course_data),  # filtered posts sent to frontend
+        "ai_analysis": ai_analysis
+    }
+    # only cache good analyses - openai/reddit hiccups should be retried next time
+    if ai_analysis.get("success"):
+        await response_cache.set(cache_key, _course_analysis_json(result), ANALYSIS_CACHE_TTL)
+    return result
+
+def _course_analysis_json(result: Dict[str, Any]) -> bytes:
+    """a course analysis serialized through CourseAnalysisResponse - the raw Responses skip response_model"""
+    return CourseAnalysisResponse.model_validate(result).model_dump_json(exclude_unset=True).encode()
+
+@app.get("/api/course-analysis", response_model=CourseAnalysisResponse, response_model_exclude_unset=True)
+async def get_complete_course_analysis(
+    request: Request,
+    keyword: str = Query(..., description="Course ID or name to analyze"),
+    max_posts: int = Query(default=50, ge=1, le=200, description="Maximum posts to analyze"),
+    max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post"),
+    include_raw: bool = Query(default=False, description="Also return the filtered posts and ucr database text the analysis was built from")
+):
+    """
+    🎯 the main endpoint: search course → get content → get ucr database → ai analysis
+    """
+    course_key = _normalize_query(keyword)
+    try:
+        logger.info("Complete course analysis for: %s", course_key)
+        
+        if not course_key:
+            raise HTTPException(status_code=400, detail="Course keyword cannot be empty")
+        # noise ("a", "asdf") would still cost a reddit search + sheet lookup - reject it up front, but only
+        # against a class set that's already loaded (no sheet yet means no reason to turn anything away)
+        if not COURSE_RE.match(course_key) and sheets_service.has_class(course_key) is False:
+            raise HTTPException(status_code=400, detail=f"'{course_key}' doesn't look like a UCR course code")
+        
+        # repeat lookups skip reddit + openai entirely
+        cache_key = f"course:v1:{course_key.lower()}:{max_posts}:{max_comments_per_post}"
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached course analysis for: %s", course_key)
+            if include_raw:
+                # the cached bytes are already the full response - skip decode/re-encode
+                return _cacheable_json(request, cached)
+            return _cacheable_json(request, _course_analysis_json(_with_raw_data(orjson.loads(cached), include_raw)))
+        
+        if not inflight.is_running(cache_key):
+            _reject_if_busy()
+        result = await inflight.run(
+            cache_key,
+            lambda: _run_course_analysis(course_key, max_posts, max_comments_per_post, cache_key)
+        )
+        result = _with_raw_data(result, include_raw)
+        if result["success"] and result["ai_analysis"].get("success"):
+            return _cacheable_json(request, _course_analysis_json(result))
+        return result
         
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Complete course analysis failed for {course_key}: {e}")
+        raise HTTPException(status_code=500, detail=f"Course analysis failed: {str(e)}")
+
+@app.get("/api/course-analysis/stream")
+async def stream_course_analysis(
+    keyword: str = Query(..., description="Course ID or name to analyze"),
+    max_posts: int = Query(default=50, ge=1, le=200, description="Maximum posts to analyze"),
+    max_comments_per_post: int = Query(default=50, ge=1, le=200, description="Max comments per post")
+):
+    """
+    same pipeline as /api/course-analysis, but the ai summary is sent as server-sent events while openai writes it
+    events: {"step": "metadata", ...} → {"delta": "..."} per chunk → {"step": "complete"} (or {"step": "error"})
+    """
+    course_key = _normalize_query(keyword)
+    if not course_key:
+        raise HTTPException(status_code=400, detail="Course keyword cannot be empty")
+    
+    _reject_if_busy()
+    logger.info("Streaming course analysis for: %s", course_key)
+    
+    # gather reddit + ucr database data up front so lookup failures come back as a normal json response
+    try:
+        gathered = await _gather_course_data(course_key, max_posts, max_comments_per_post)
     except Exception as e:
-        logger.error(f"Complete course analysis failed for {keyword}: {e}")
+        logger.error(f"Streaming course analysis failed for {course_key}: {e}")
         raise HTTPException(status_code=500, detail=f"Course analysis failed: {str(e)}")
+    if not gathered["success"]:
+        return gathered
+    course_data = gathered["course_data"]
+    
+    async def event_generator():
+        yield _sse_event({
+            "step": "metadata",
+            "course": course_key,
+            "posts_analyzed": len(course_data["posts"]),
+            "ucr_database_included": bool(course_data["ucr_database"])
+        })
+        try:
+            async for delta in get_openai_service().analyze_course_discussions_stream(course_data):
+                yield _sse_event({"delta": delta})
+        except Exception as e:
+            logger.error(f"Streaming OpenAI analysis failed for {course_key}: {e}")
+            yield _sse_event({"step": "error", "message": "Analysis temporarily unavailable. Please try again later."})
+            return
+        yield _sse_event({"step": "complete"})
+    
+    return StreamingResponse(
+        event_generator(),
+        media_type="text/event-stream",
+        headers={
+            "Cache-Control": "no-cache",
+            "X-Accel-Buffering": "no",  # Disable nginx buffering
+        }
+    )
 
 @app.get("/api/test-sheets")
 async def test_sheets_data(
@@ -917,20 +1562,19 @@ async def test_sheets_data(
     test endpoint to check if google sheets integration works
     """
     try:
-        logger.info(f"Testing Google Sheets integration for course: {course}")
-        
-        # get class reviews
-        reviews = sheets_service.get_class_reviews(course.upper())
-        
-        # get formatted data for ai
-        ai_formatted_data = sheets_service.format_for_ai_analysis(course.upper())
-        
-        # get summary
-        summary = sheets_service.get_class_summary(course.upper())
+        logger.info("Testing Google Sheets integration for course: %s", course)
+        course_key = course.strip().upper()
+        
+        # class reviews, formatted ai data and summary all read the same cached sheet, so run them together
+        reviews, ai_formatted_data, summary = await asyncio.gather(
+            sheets_service.run_blocking(sheets_service.get_class_reviews, course_key),
+            sheets_service.aformat_for_ai_analysis(course_key),
+            sheets_service.run_blocking(sheets_service.get_class_summary, course_key)
+        )
         
         return {
             "success": True,
-            "course": course.upper(),
+            "course": course_key,
             "reviews_count": len(reviews),
             "reviews": reviews[:15],  # increased for better professor analysis
             "ai_formatted_preview": ai_formatted_data[:500] if ai_formatted_data else "No data",
@@ -941,21 +1585,109 @@ async def test_sheets_data(
         logger.error(f"Error testing sheets for {course}: {e}")
         raise HTTPException(status_code=500, detail=f"Sheets test failed: {str(e)}")
 
+def _require_admin(request: Request) -> None:
+    """404 unless ADMIN_TOKEN is configured, 401 unless the request carries it as a bearer token"""
+    token = get_settings().ADMIN_TOKEN
+    if not token:
+        raise HTTPException(status_code=404, detail="Not Found")
+    scheme, _, credentials = request.headers.get("authorization", "").partition(" ")
+    if scheme.lower() != "bearer" or not secrets.compare_digest(credentials.encode(), token.encode()):
+        raise HTTPException(status_code=401, detail="Invalid admin token", headers={"WWW-Authenticate": "Bearer"})
+
+@app.post("/api/admin/refresh-sheets")
+async def refresh_sheets(request: Request):
+    """
+    re-download the ucr sheet and rebuild the per-class index right away instead of waiting for the hourly refresh
+    (only refreshes the worker that handles the request)
+    """
+    _require_admin(request)
+    try:
+        classes_indexed = await sheets_service.refresh()
+        logger.info("🔄 UCR sheet refreshed, %s classes indexed", classes_indexed)
+        return {"success": True, "classes_indexed": classes_indexed}
+    except Exception as e:
+        logger.error(f"UCR sheet refresh failed: {e}")
+        raise HTTPException(status_code=502, detail=f"Sheet refresh failed: {str(e)}")
+
+# running precompute jobs - kept referenced so a batch that takes hours isn't garbage collected
+_precompute_jobs: Set[asyncio.Task] = set()
+
+_PRECOMPUTE_REQUEST_BODY = {
+    "required": True,
+    "content": {"application/json": {"schema": CoursePrecomputeRequest.model_json_schema()}},
+}
+
+async def _precompute_course_analyses(course_keys: List[str], max_posts: int, max_comments_per_post: int, batch: bool) -> None:
+    """gather reddit + ucr database data for each course and analyze them all - in one openai batch unless batch is off"""
+    gathered = await asyncio.gather(
+        *(_gather_course_data(course_key, max_posts, max_comments_per_post) for course_key in course_keys),
+        return_exceptions=True
+    )
+    course_data_list = []
+    for course_key, result in zip(course_keys, gathered):
+        if isinstance(result, Exception) or not result["success"]:
+            logger.warning("Skipping %s in the precompute: %s", course_key, result if isinstance(result, Exception) else result["message"])
+            continue
+        course_data_list.append(result["course_data"])
+    
+    try:
+        results = await get_openai_service().analyze_many(course_data_list, batch=batch)
+    except Exception as e:
+        logger.error(f"Course analysis precompute failed: {e}")
+        return
+    succeeded = sum(1 for result in results if result.get("success"))
+    logger.info("📦 Precomputed %s of %s course analyses", succeeded, len(course_keys))
+
+@app.post("/api/admin/precompute-courses", status_code=202, openapi_extra={"requestBody": _PRECOMPUTE_REQUEST_BODY})
+async def precompute_courses(request: Request):
+    """
+    analyze a list of courses in the background, e.g. nightly - through openai's batch api (half price, up to 24h)
+    unless the body sets "batch": false.
+    the answers land in the completion cache, so the analysis endpoints reuse them while the course data is unchanged.
+    (the job runs on the worker that handles the request and is dropped if that worker restarts)
+    """
+    _require_admin(request)
+    raw_body = await request.body()
+    try:
+        body = CoursePrecomputeRequest.model_validate_json(raw_body)
+    except ValidationError as e:
+        errors = [{**error, "loc": ("body", *error["loc"])} for error in e.errors(include_url=False)]
+        raise RequestValidationError(errors, body=raw_body)
+    
+    course_keys = list(dict.fromkeys(filter(None, map(_normalize_query, body.courses))))
+    if not course_keys:
+        raise HTTPException(status_code=400, detail="No courses to precompute")
+    
+    job = asyncio.create_task(_precompute_course_analyses(course_keys, body.max_posts, body.max_comments_per_post, body.batch))
+    _precompute_jobs.add(job)
+    job.add_done_callback(_precompute_jobs.discard)
+    logger.info("📦 Precompute started for %s courses", len(course_keys))
+    return {"success": True, "courses": course_keys}
+
 @app.get("/api/available-classes")
-async def get_available_classes():
+async def get_available_classes(request: Request):
     """
     get list of all classes in the ucr database
     """
     try:
+        cached = await response_cache.get("classes:v1")
+        if cached is not None:
+            return _cacheable_json(request, cached)
+        
         logger.info("Getting list of available classes from UCR database")
         
-        available_classes = sheets_service.get_available_classes()
+        available_classes = await sheets_service.run_blocking(sheets_service.get_available_classes)
         
-        return {
+        payload = orjson.dumps({
             "success": True,
             "classes_count": len(available_classes),
             "classes": available_classes
-        }
+        })
+        # an empty list means the sheet couldn't be loaded - don't pin that for an hour
+        if available_classes:
+            await response_cache.set("classes:v1", payload, CLASSES_CACHE_TTL)
+            return _cacheable_json(request, payload)
+        return Response(content=payload, media_type="application/json")
         
     except Exception as e:
         logger.error(f"Error getting available classes: {e}")
@@ -990,7 +1722,7 @@ async def test_enhanced_workflow(
     🧪 Test endpoint for the enhanced workflow integration
     """
     try:
-        logger.info(f"Testing enhanced workflow for course: {course}")
+        logger.info("Testing enhanced workflow for course: %s", course)
         
         # Test professor extraction
         professor_names = [name.strip() for name in sample_professors.split(",")]
@@ -1039,7 +1771,7 @@ async def search_schools(q: str = Query(..., description="School name to search
     Search for schools on Rate My Professor
     """
     try:
-        logger.info(f"RMP: Searching schools for: {q}")
+        logger.info("RMP: Searching schools for: %s", q)
         schools = await rmp_service.search_schools(q)
         
         return {
@@ -1062,7 +1794,7 @@ async def search_professors_in_school(
     Search for professors within a specific school
     """
     try:
-        logger.info(f"RMP: Searching professors in school {school_id} for: {q}")
+        logger.info("RMP: Searching professors in school %s for: %s", school_id, q)
         professors = await rmp_service.search_professors(school_id, q)
         
         return {
@@ -1083,7 +1815,7 @@ async def get_professor_details(prof_id: str):
     Get detailed information about a specific professor
     """
     try:
-        logger.info(f"RMP: Getting details for professor: {prof_id}")
+        logger.info("RMP: Getting details for professor: %s", prof_id)
         professor = await rmp_service.get_professor_summary(prof_id)
         
         if not professor:
@@ -1100,8 +1832,21 @@ async def get_professor_details(prof_id: str):
         logger.error(f"RMP professor details failed: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to get professor details: {str(e)}")
 
+async def _cached_ratings_page(request: Request, cache_key: str, build: Callable[[], Awaitable[Dict[str, Any]]]) -> Response:
+    """serve a ratings page from the response cache, building and caching it on a miss (empty pages aren't cached)"""
+    cached = await response_cache.get(cache_key)
+    if cached is not None:
+        return _cacheable_json(request, cached)
+    result = await build()
+    payload = orjson.dumps(result)
+    if result["ratings"]:
+        await response_cache.set(cache_key, payload, RMP_RATINGS_CACHE_TTL)
+        return _cacheable_json(request, payload)
+    return Response(content=payload, media_type="application/json")
+
 @app.get("/api/rmp/professors/{prof_id}/ratings")
 async def get_professor_ratings(
+    request: Request,
     prof_id: str,
     limit: int = Query(default=50, ge=1, le=100, description="Number of ratings to retrieve"),
     cursor: str = Query(default=None, description="Pagination cursor")
@@ -1110,16 +1855,19 @@ async def get_professor_ratings(
     Get paginated ratings for a professor (all courses)
     """
     try:
-        logger.info(f"RMP: Getting ratings for professor {prof_id}")
-        ratings_data = await rmp_service.get_professor_ratings(prof_id, limit, cursor)
+        logger.info("RMP: Getting ratings for professor %s", prof_id)
         
-        return {
-            "success": True,
-            "professor_id": prof_id,
-            "ratings": ratings_data["ratings"],
-            "pageInfo": ratings_data["pageInfo"],
-            "count": len(ratings_data["ratings"])
-        }
+        async def build() -> Dict[str, Any]:
+            ratings_data = await rmp_service.get_professor_ratings(prof_id, limit, cursor)
+            return {
+                "success": True,
+                "professor_id": prof_id,
+                "ratings": ratings_data["ratings"],
+                "pageInfo": ratings_data["pageInfo"],
+                "count": len(ratings_data["ratings"])
+            }
+        
+        return await _cached_ratings_page(request, f"rmp:ratings:v1:{prof_id}:{limit}:{cursor or ''}", build)
         
     except Exception as e:
         logger.error(f"RMP ratings fetch failed: {e}")
@@ -1127,6 +1875,7 @@ async def get_professor_ratings(
 
 @app.get("/api/rmp/professors/{prof_id}/ratings/course")
 async def get_professor_course_ratings(
+    request: Request,
     prof_id: str,
     course: str = Query(..., description="Course name/code to filter by"),
     limit: int = Query(default=50, ge=1, le=100, description="Number of ratings to retrieve"),
@@ -1136,17 +1885,21 @@ async def get_professor_course_ratings(
     Get ratings for a professor filtered by specific course
     """
     try:
-        logger.info(f"RMP: Getting course ratings for professor {prof_id}, course: {course}")
-        ratings_data = await rmp_service.get_ratings_by_course(prof_id, course, limit, cursor)
+        logger.info("RMP: Getting course ratings for professor %s, course: %s", prof_id, course)
         
-        return {
-            "success": True,
-            "professor_id": prof_id,
-            "course": course,
-            "ratings": ratings_data["ratings"],
-            "pageInfo": ratings_data["pageInfo"],
-            "count": len(ratings_data["ratings"])
-        }
+        async def build() -> Dict[str, Any]:
+            ratings_data = await rmp_service.get_ratings_by_course(prof_id, course, limit, cursor)
+            return {
+                "success": True,
+                "professor_id": prof_id,
+                "course": course,
+                "ratings": ratings_data["ratings"],
+                "pageInfo": ratings_data["pageInfo"],
+                "count": len(ratings_data["ratings"])
+            }
+        
+        # course goes in as sent - it's echoed back in the response
+        return await _cached_ratings_page(request, f"rmp:ratings:v1:{prof_id}:{course}:{limit}:{cursor or ''}", build)
         
     except Exception as e:
         logger.error(f"RMP course ratings fetch failed: {e}")
@@ -1161,7 +1914,7 @@ async def get_professor_courses(
     Get all distinct courses a professor has taught (with rating counts)
     """
     try:
-        logger.info(f"RMP: Getting courses for professor {prof_id}")
+        logger.info("RMP: Getting courses for professor %s", prof_id)
         courses = await rmp_service.get_professor_courses(prof_id, sample)
         
         return {
@@ -1181,7 +1934,7 @@ async def get_professor_comments(prof_id: str):
     🆕 Get all student reviews/comments for a professor
     """
     try:
-        logger.info(f"RMP: Getting comments for professor {prof_id}")
+        logger.info("RMP: Getting comments for professor %s", prof_id)
         comments = await rmp_service.get_professor_comments(prof_id)
         
         return {
@@ -1201,7 +1954,7 @@ async def get_all_professors_at_school(school_id: str):
     🆕 Get complete list of all professors at a school
     """
     try:
-        logger.info(f"RMP: Getting all professors at school {school_id}")
+        logger.info("RMP: Getting all professors at school %s", school_id)
         professors = await rmp_service.get_all_professors_at_school(school_id)
         
         return {
@@ -1224,7 +1977,7 @@ async def get_professor_id(
     🆕 Get professor ID given name and school
     """
     try:
-        logger.info(f"RMP: Getting professor ID for {professor_name} at school {school_id}")
+        logger.info("RMP: Getting professor ID for %s at school %s", professor_name, school_id)
         prof_id = await rmp_service.get_professor_id(professor_name, school_id)
         
         if not prof_id:
@@ -1252,7 +2005,7 @@ async def test_rmp_connection():
         logger.info("Testing RMP API connection")
         
         # Test by searching for UCR
-        schools = await rmp_service.search_schools("University of California Riverside")
+        schools = await rmp_service.search_schools(UCR_SCHOOL_NAME)
         
         rmp_status = "operational" if schools else "no_results"
         
@@ -1270,4 +2023,25 @@ async def test_rmp_connection():
 
 if __name__ == "__main__":
     import uvicorn
-    uvicorn.run(app, host=config.API_HOST, port=config.API_PORT) 
\ No newline at end of file
+    settings = get_settings()
+    # uvloop + httptools ship with uvicorn[standard]; pin them instead of relying on "auto",
+    # except on windows where uvloop doesn't exist
+    try:
+        import uvloop  # noqa: F401
+        loop = "uvloop"
+    except ImportError:
+        loop = "asyncio"
+    if settings.WEB_CONCURRENCY > 1 and not settings.REDIS_URL:
+        logger.warning(
+            f"Starting {settings.WEB_CONCURRENCY} workers without REDIS_URL - progress streams only work "
+            "when the progress request lands on the same worker as the analysis"
+        )
+    uvicorn.run(
+        "main:app",
+        host=settings.API_HOST,
+        port=settings.API_PORT,
+        loop=loop,
+        http="httptools",
+        workers=settings.WEB_CONCURRENCY,
+        timeout_keep_alive=30,
+    )
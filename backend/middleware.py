@@ -0,0 +1,134 @@
+"""
+ASGI Middleware
+---------------
+Middleware for the FastAPI app.
+
+Everything in here is written as plain ASGI (a class with
+`async def __call__(self, scope, receive, send)`) or subclasses Starlette's
+pure-ASGI middleware. Do not use starlette.middleware.base.BaseHTTPMiddleware:
+it wraps every response body in an extra task and memory stream, which roughly
+halves throughput and breaks streaming responses like the SSE progress feed.
+"""
+
+from typing import Dict, Optional
+
+from starlette.datastructures import Headers, MutableHeaders
+from starlette.middleware.gzip import GZipMiddleware
+from starlette.types import ASGIApp, Message, Receive, Scope, Send
+
+try:
+    import brotli
+except ImportError:  # optional - without it every compressed response is gzip
+    brotli = None
+
+# server-sent event streams - these have to flush every event immediately
+SSE_PATH_PREFIXES = (
+    "/api/progress/",
+    "/api/course-analysis/stream",
+    "/api/course-analysis-enhanced/stream",
+    "/api/professor-analysis/stream",
+)
+
+def _accepted_codings(accept_encoding: str) -> Dict[str, float]:
+    """content-coding -> q-value from an Accept-Encoding header (q defaults to 1, unparseable q counts as 0)"""
+    codings = {}
+    for item in accept_encoding.split(","):
+        coding, *params = [part.strip() for part in item.split(";")]
+        if not coding:
+            continue
+        q = 1.0
+        for param in params:
+            name, _, value = param.partition("=")
+            if name.strip().lower() == "q":
+                try:
+                    q = float(value)
+                except ValueError:
+                    q = 0.0
+        codings[coding.lower()] = q
+    return codings
+
+class BrotliResponder:
+    """
+    brotli counterpart of starlette's GZipResponder - same size threshold, streaming and passthrough of
+    responses that already have a content-encoding, written against the asgi messages only
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int, quality: int = 4) -> None:
+        self.app = app
+        self.minimum_size = minimum_size
+        self.quality = quality
+        self.send: Optional[Send] = None
+        self.initial_message: Message = {}
+        self.started = False
+        self.passthrough = False
+        self.compressor = None
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        self.send = send
+        await self.app(scope, receive, self.send_with_brotli)
+    
+    async def send_with_brotli(self, message: Message) -> None:
+        if message["type"] == "http.response.start":
+            # held back until the first body chunk decides whether to compress
+            self.initial_message = message
+            self.passthrough = "content-encoding" in Headers(raw=message["headers"])
+            return
+        if message["type"] != "http.response.body":
+            await self.send(message)
+            return
+        
+        body = message.get("body", b"")
+        more_body = message.get("more_body", False)
+        if not self.started:
+            self.started = True
+            if self.passthrough or (len(body) < self.minimum_size and not more_body):
+                self.passthrough = True
+                await self.send(self.initial_message)
+                await self.send(message)
+                return
+            self.compressor = brotli.Compressor(quality=self.quality)
+            headers = MutableHeaders(raw=self.initial_message["headers"])
+            headers["Content-Encoding"] = "br"
+            headers.add_vary_header("Accept-Encoding")
+            if more_body:
+                del headers["Content-Length"]
+            else:
+                body = self.compressor.process(body) + self.compressor.finish()
+                headers["Content-Length"] = str(len(body))
+                await self.send(self.initial_message)
+                await self.send({**message, "body": body})
+                return
+            await self.send(self.initial_message)
+        elif self.passthrough:
+            await self.send(message)
+            return
+        
+        # streaming: flush what the compressor has so far with every chunk
+        compressed = self.compressor.process(body) + (self.compressor.flush() if more_body else self.compressor.finish())
+        await self.send({**message, "body": compressed})
+
+class SelectiveCompressionMiddleware(GZipMiddleware):
+    """
+    brotli (when installed and accepted) or gzip for every response except the sse streams
+    brotli gets text json ~15-25% smaller than gzip at similar cpu cost
+    """
+    
+    def __init__(self, app: ASGIApp, minimum_size: int = 500, compresslevel: int = 9, brotli_quality: int = 4) -> None:
+        super().__init__(app, minimum_size=minimum_size, compresslevel=compresslevel)
+        self.brotli_quality = brotli_quality
+    
+    async def __call__(self, scope: Scope, receive: Receive, send: Send) -> None:
+        if scope["type"] == "http" and scope["path"].startswith(SSE_PATH_PREFIXES):
+            await self.app(scope, receive, send)
+            return
+        if scope["type"] == "http":
+            codings = _accepted_codings(Headers(scope=scope).get("Accept-Encoding", ""))
+            if brotli is not None and codings.get("br", 0) > 0:
+                responder = BrotliResponder(self.app, self.minimum_size, quality=self.brotli_quality)
+                await responder(scope, receive, send)
+                return
+            if codings.get("gzip", 0) <= 0:
+                # gzip;q=0 is a refusal too - starlette only checks that "gzip" appears in the header
+                await self.app(scope, receive, send)
+                return
+        await super().__call__(scope, receive, send)
@@ -1,129 +1,642 @@
-from openai import AsyncOpenAI
-from typing import Dict, Any, List
+import asyncio
+import hashlib
+import math
+import time
+from dataclasses import dataclass
+from functools import lru_cache
+from typing import Dict, Any, List, AsyncIterator, Awaitable, Callable, Optional, Tuple
+from cache import TTLCache, response_cache
 from config import config
+import httpx
 import logging
-import json
+import orjson
 from datetime import datetime
 
-logging.basicConfig(level=logging.INFO)
+try:
+    import h2  # noqa: F401 - httpx needs it for http2=True
+    HTTP2_AVAILABLE = True
+except ImportError:  # optional - without it the client stays on http/1.1 keep-alive
+    HTTP2_AVAILABLE = False
+
+try:
+    import tiktoken
+except ImportError:  # optional - without it prompt inputs are budgeted by characters instead of tokens
+    tiktoken = None
+
 logger = logging.getLogger(__name__)
 
+# identical prompts (same model, messages and sampling settings) reuse the completion for a day
+COMPLETION_CACHE_TTL = 24 * 3600
+# semantic cache: cosine similarity that counts as "the same prompt", completions kept per bucket,
+# and the chunk size long prompts are split into for embedding (well under the model's 8k token input limit)
+SEMANTIC_CACHE_THRESHOLD = 0.95
+SEMANTIC_CACHE_PER_BUCKET = 8
+EMBEDDING_CHUNK_CHARS = 16000
+# where the data sections start in every analysis prompt - only what follows is embedded, the rubric and
+# instructions before it are the same for every prompt of a kind and would pull all similarities up
+SEMANTIC_DATA_MARKER = "### REDDIT DATA:"
+
+# batch api jobs take minutes to hours - no point checking on them more often than this
+BATCH_POLL_INTERVAL = 60
+BATCH_FINAL_STATUSES = frozenset({"completed", "failed", "expired", "cancelled"})
+# bulk real-time analyses retry rate limits and timeouts (on top of the sdk's own retries), backing off 1s, 2s, 4s...
+BULK_MAX_RETRIES = 4
+BULK_RETRY_MAX_DELAY = 30
+
+# token budgets for each data source in the course analysis prompts - popular courses can bring far more
+# than the model needs (and would otherwise be billed for). CHARS_PER_TOKEN is the fallback estimate
+MAX_REDDIT_TOKENS = 12000
+MAX_DATABASE_TOKENS = 8000
+MAX_RMP_TOKENS = 8000
+CHARS_PER_TOKEN = 4
+
+@dataclass(frozen=True)
+class PostsContext:
+    """a course's posts as the analysis prompts use them - see AsyncOpenAIService.prepare_posts_context"""
+    formatted: str
+    total_comments: int
+
 class AsyncOpenAIService:
     def __init__(self):
-        """setup async openai client"""
+        """setup async openai service - the client is created on first use"""
+        self._client = None
+        # tiktoken encoding for the model - None until first use, False if it couldn't be loaded
+        self._encoding = None
+        self.model = config.OPENAI_MODEL
+        # admission control - a burst of analyses queues here instead of tripping openai's rate limit
+        self.max_concurrent_requests = config.OPENAI_MAX_CONCURRENT_REQUESTS
+        self._request_slots = asyncio.Semaphore(self.max_concurrent_requests)
+        self._waiting = 0
+        # bucket (model + system prompt + settings + course) -> [(stored_at, unit embedding, completion text)]
+        self._semantic_cache = TTLCache(maxsize=256, ttl=COMPLETION_CACHE_TTL)
+        # background semantic-cache embeddings - referenced until they finish
+        self._background_tasks = set()
+        logger.info("AsyncOpenAIService created with model: %s - will initialize client on first use", self.model)
+    
+    @property
+    def client(self):
+        """Initialize the OpenAI client if not already done (the sdk import alone is ~0.4s)"""
+        if self._client is None:
+            try:
+                from openai import AsyncOpenAI, DefaultAsyncHttpxClient
+                # sdk defaults (timeouts, redirects) plus http/2, so concurrent analyses share one warm connection
+                self._client = AsyncOpenAI(
+                    api_key=config.OPENAI_API_KEY,
+                    http_client=DefaultAsyncHttpxClient(
+                        http2=HTTP2_AVAILABLE,
+                        limits=httpx.Limits(max_connections=100, max_keepalive_connections=50)
+                    )
+                )
+                logger.info("Async OpenAI client initialized with model: %s", self.model)
+            except Exception as e:
+                logger.error(f"Failed to initialize Async OpenAI client: {e}")
+                raise
+        return self._client
+    
+    async def warm_up(self) -> None:
+        """
+        import the sdk and open the connection to openai ahead of the first analysis - run once at startup
+        (models.list is a cheap authenticated call, so the tls session is ready for the first completion)
+        """
+        if not config.OPENAI_API_KEY:
+            return
         try:
-            self.client = AsyncOpenAI(api_key=config.OPENAI_API_KEY)
-            self.model = config.OPENAI_MODEL
-            logger.info(f"Async OpenAI client initialized with model: {self.model}")
+            # the sdk import is slow, keep it off the event loop
+            client = await asyncio.to_thread(lambda: self.client)
+            # the encoding's bpe file is read (downloaded the first time) from disk
+            await asyncio.to_thread(lambda: self.encoding)
+            await client.with_options(max_retries=0).models.list()
+            logger.info("✅ OpenAI connection warmed up")
         except Exception as e:
-            logger.error(f"Failed to initialize Async OpenAI client: {e}")
-            raise
+            logger.warning(f"OpenAI warm-up failed, the first analysis will connect instead: {e}")
+    
+    @property
+    def encoding(self):
+        """tiktoken encoding for the model, loaded on first use - None without tiktoken"""
+        if self._encoding is None and tiktoken is not None:
+            try:
+                self._encoding = tiktoken.encoding_for_model(self.model)
+            except KeyError:
+                # models newer than the installed tiktoken - every current openai model uses o200k
+                self._encoding = tiktoken.get_encoding("o200k_base")
+            except Exception as e:
+                logger.warning(f"Could not load the tiktoken encoding, budgeting prompt inputs by characters: {e}")
+                self._encoding = False
+        return self._encoding or None
+    
+    def _truncate_tokens(self, text: str, max_tokens: int) -> str:
+        """text cut down to max_tokens of the model's tokenizer (about max_tokens * CHARS_PER_TOKEN characters without it)"""
+        encoding = self.encoding
+        if encoding is None:
+            limit = max_tokens * CHARS_PER_TOKEN
+            if len(text) <= limit:
+                return text
+            # don't end mid-word
+            head = text[:limit]
+            return head if head[-1].isspace() or text[limit].isspace() else head.rsplit(None, 1)[0]
+        tokens = encoding.encode(text, disallowed_special=())
+        if len(tokens) <= max_tokens:
+            return text
+        logger.info("Truncating prompt input from %s to %s tokens", len(tokens), max_tokens)
+        return encoding.decode(tokens[:max_tokens])
+    
+    async def close(self):
+        """Close the openai client's connection pool"""
+        if self._client is not None:
+            await self._client.close()
+            self._client = None
+    
+    @property
+    def saturated(self) -> bool:
+        """true when enough calls are already queued that new analyses should be turned away"""
+        return self._waiting >= config.OPENAI_MAX_QUEUED_REQUESTS
     
-    async def analyze_course_discussions_structured(self, course_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def _acquire_slot(self) -> None:
+        self._waiting += 1
+        try:
+            await self._request_slots.acquire()
+        finally:
+            self._waiting -= 1
+    
+    async def _chat_completion(self, **kwargs):
+        """chat.completions.create, limited to max_concurrent_requests in flight per process"""
+        await self._acquire_slot()
+        try:
+            return await self.client.chat.completions.create(**kwargs)
+        finally:
+            self._request_slots.release()
+    
+    async def _cached_completion_text(
+        self,
+        valid: Optional[Callable[[str], bool]] = None,
+        semantic_bucket: Optional[str] = None,
+        **kwargs
+    ) -> str:
+        """
+        message text of a chat completion, served from the response cache when the exact same request
+        (model, messages, temperature, ...) was answered before. only complete answers that pass
+        `valid` are cached, so a truncated or malformed one is retried next time.
+        with a semantic_bucket, an exact miss also checks (per process) for a near-identical user prompt
+        in that bucket - e.g. the same course with one new comment
+        """
+        cached, store = await self._completion_cache_lookup(semantic_bucket, kwargs)
+        if cached is not None:
+            return cached
+        
+        response = await self._chat_completion(**kwargs)
+        choice = response.choices[0]
+        text = choice.message.content or ""
+        if text and choice.finish_reason == "stop" and (valid is None or valid(text)):
+            await store(text)
+        return text
+    
+    async def _completion_cache_lookup(
+        self,
+        semantic_bucket: Optional[str],
+        kwargs: Dict[str, Any]
+    ) -> Tuple[Optional[str], Callable[[str], Awaitable[None]]]:
+        """
+        (cached completion text or None, store) for a chat completion request - call store(text) with a
+        complete, valid answer to cache it for the next identical (or semantically near-identical) request
+        """
+        cache_key = "openai:v1:" + hashlib.sha256(orjson.dumps(kwargs, option=orjson.OPT_SORT_KEYS)).hexdigest()
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            logger.info("⚡ Serving cached OpenAI completion")
+            return cached.decode(), self._no_store
+        
+        embedding = None
+        bucket = None
+        if semantic_bucket is not None and config.OPENAI_SEMANTIC_CACHE:
+            user_prompt = "\n".join(m["content"] for m in kwargs["messages"] if m["role"] == "user")
+            instructions, user_prompt = self._split_prompt_data(user_prompt)
+            # the system message, settings and prompt instructions are part of the bucket, so only the data is compared
+            bucket = hashlib.sha256(orjson.dumps(
+                {
+                    **kwargs,
+                    "messages": [m for m in kwargs["messages"] if m["role"] != "user"],
+                    "instructions": instructions,
+                    "bucket": semantic_bucket
+                },
+                option=orjson.OPT_SORT_KEYS
+            )).hexdigest()
+            # only embed up front when there's something to compare with - a new course (or a fresh
+            # process) would pay an extra openai round trip before the completion for nothing
+            if self._semantic_bucket_live(bucket):
+                embedding = await self._embed(user_prompt)
+            if embedding is not None:
+                similarity, text = self._semantic_lookup(bucket, embedding)
+                if text is not None:
+                    logger.info("⚡ Serving semantically cached OpenAI completion (similarity %.3f)", similarity)
+                    return text, self._no_store
+        
+        async def store(text: str) -> None:
+            await response_cache.set(cache_key, text.encode(), COMPLETION_CACHE_TTL)
+            if embedding is not None:
+                self._semantic_store(bucket, embedding, text)
+            elif bucket is not None:
+                # first answer in the bucket - embed it in the background, the response doesn't wait
+                task = asyncio.create_task(self._embed_and_store(bucket, user_prompt, text))
+                self._background_tasks.add(task)
+                task.add_done_callback(self._background_tasks.discard)
+        
+        return None, store
+    
+    @staticmethod
+    async def _no_store(text: str) -> None:
+        return None
+    
+    @staticmethod
+    def _split_prompt_data(user_prompt: str) -> Tuple[str, str]:
+        """(instructions, data sections) of a user prompt - all data when there's no SEMANTIC_DATA_MARKER"""
+        start = user_prompt.find(SEMANTIC_DATA_MARKER)
+        if start == -1:
+            return "", user_prompt
+        return user_prompt[:start], user_prompt[start:]
+    
+    async def _embed(self, text: str) -> Optional[List[float]]:
+        """
+        unit-length embedding of a prompt of any size - long prompts are embedded in chunks (one request)
+        and the chunk vectors averaged by length. None if the embeddings call fails
+        """
+        chunks = [text[i:i + EMBEDDING_CHUNK_CHARS] for i in range(0, len(text), EMBEDDING_CHUNK_CHARS)] or [""]
+        try:
+            # no retries and a short timeout - the cache is an optimization, it must not slow the analysis down
+            response = await self.client.with_options(max_retries=0, timeout=10).embeddings.create(
+                model=config.OPENAI_EMBEDDING_MODEL, input=chunks
+            )
+        except Exception as e:
+            logger.warning(f"Prompt embedding failed, skipping the semantic cache: {e}")
+            return None
+        
+        total = [0.0] * len(response.data[0].embedding)
+        for chunk, item in zip(chunks, response.data):
+            weight = len(chunk)
+            for i, value in enumerate(item.embedding):
+                total[i] += value * weight
+        norm = math.sqrt(sum(value * value for value in total)) or 1.0
+        return [value / norm for value in total]
+    
+    def _semantic_bucket_live(self, bucket: str) -> bool:
+        """whether the bucket holds any unexpired completion"""
+        cutoff = time.monotonic() - COMPLETION_CACHE_TTL
+        return any(stored_at >= cutoff for stored_at, _, _ in self._semantic_cache.get(bucket, ()))
+    
+    async def _embed_and_store(self, bucket: str, prompt: str, text: str) -> None:
+        embedding = await self._embed(prompt)
+        if embedding is not None:
+            self._semantic_store(bucket, embedding, text)
+    
+    def _semantic_lookup(self, bucket: str, embedding: List[float]) -> Tuple[float, Optional[str]]:
+        """best (similarity, text) in a bucket - text is None unless it clears SEMANTIC_CACHE_THRESHOLD"""
+        cutoff = time.monotonic() - COMPLETION_CACHE_TTL
+        best, best_text = 0.0, None
+        for stored_at, vector, text in self._semantic_cache.get(bucket, ()):
+            if stored_at < cutoff:
+                continue
+            # both vectors are unit length, so the dot product is the cosine similarity
+            similarity = math.fsum(a * b for a, b in zip(embedding, vector))
+            if similarity > best:
+                best, best_text = similarity, text
+        return (best, best_text) if best >= SEMANTIC_CACHE_THRESHOLD else (best, None)
+    
+    def _semantic_store(self, bucket: str, embedding: List[float], text: str) -> None:
+        entries = self._semantic_cache.get(bucket, [])
+        # newest last, oldest dropped once the bucket is full
+        self._semantic_cache.set(bucket, [*entries, (time.monotonic(), embedding, text)][-SEMANTIC_CACHE_PER_BUCKET:])
+    
+    @staticmethod
+    def _is_json(text: str) -> bool:
+        # the structured prompt always asks for a single object - anything else isn't worth parsing
+        if not text.rstrip().endswith("}"):
+            return False
+        try:
+            orjson.loads(text)
+            return True
+        except orjson.JSONDecodeError:
+            return False
+    
+    async def analyze_course_discussions_structured(
+        self,
+        course_data: Dict[str, Any],
+        posts_context: Optional[PostsContext] = None
+    ) -> Dict[str, Any]:
         """
         🆕 ENHANCED: Analyze course discussions with RMP integration
+        (posts_context: the course_data posts already prepared, when several passes analyze the same posts)
         """
+        course = course_data.get("course", "Unknown Course")
         try:
+            return await self._analyze_structured(course_data, posts_context)
+        except Exception as e:
+            logger.error(f"Enhanced structured analysis failed for course {course}: {e}")
+            return {
+                "success": False,
+                "error": str(e),
+                "course": course
+            }
+    
+    async def _analyze_structured(self, course_data: Dict[str, Any], posts_context: Optional[PostsContext] = None) -> Dict[str, Any]:
+        """analyze_course_discussions_structured without the error handling - openai errors are raised"""
+        course = course_data.get("course", "Unknown Course")
+        request = self._structured_analysis_request(course_data, posts_context)
+        if request is None:
+            return {
+                "success": False,
+                "error": "No data to analyze"
+            }
+        
+        # Call OpenAI API (or reuse the answer to an identical prompt)
+        ai_response = await self._cached_completion_text(
+            valid=self._is_json,
+            semantic_bucket=course.upper(),
+            **request
+        )
+        if not self._is_json(ai_response):
+            ai_response = await self._retry_structured(course, request)
+        
+        return {
+            "success": True,
+            "course": course,
+            "analysis": self._parse_structured_response(ai_response)
+        }
+    
+    async def analyze_many(
+        self,
+        course_data_list: List[Dict[str, Any]],
+        concurrency: int = 10,
+        batch: bool = False
+    ) -> List[Dict[str, Any]]:
+        """
+        structured analyses for several courses, returned in input order. real-time calls run up to `concurrency`
+        at a time (and still share the per-process openai slots with interactive requests), retrying rate limits
+        and timeouts with exponential backoff. batch=True sends them all through analyze_courses_batch instead
+        """
+        if batch:
+            results = await self.analyze_courses_batch(course_data_list)
+            return [results[course_data.get("course", "Unknown Course")] for course_data in course_data_list]
+        
+        from openai import APITimeoutError, RateLimitError
+        semaphore = asyncio.Semaphore(concurrency)
+        
+        async def analyze(course_data: Dict[str, Any]) -> Dict[str, Any]:
             course = course_data.get("course", "Unknown Course")
-            posts = course_data.get("posts", [])
-            ucr_database = course_data.get("ucr_database", "")
-            rmp_data = course_data.get("rmp_data", {})
-            
-            if not posts and not ucr_database and not rmp_data.get("professors"):
-                return {
-                    "success": False,
-                    "error": "No data to analyze"
-                }
-            
-            logger.info(f"🚀 Enhanced analysis: {len(posts)} Reddit posts + UCR database + {len(rmp_data.get('professors', []))} RMP professors for course: {course}")
-            
-            # Format data for AI
-            formatted_reddit_data = self._format_posts_for_ai(posts) if posts else ""
-            formatted_rmp_data = self._format_rmp_data_for_ai(rmp_data) if rmp_data.get("enabled") else ""
-            
-            # Use enhanced prompt if we have RMP data, otherwise use basic prompt
-            if formatted_rmp_data:
-                prompt = self._create_enhanced_structured_analysis_prompt(course, formatted_reddit_data, ucr_database, formatted_rmp_data)
-                system_content = "You are an expert UCR academic advisor who analyzes student discussions, database reviews, and Rate My Professors data to provide comprehensive course insights. You MUST merge all data sources (Reddit, UCR Database, RMP) into a unified analysis. CRITICAL: You must return ONLY valid JSON - no markdown, no explanations, no text outside the JSON object."
-            else:
-                prompt = self._create_structured_analysis_prompt(course, formatted_reddit_data, ucr_database)
-                system_content = "You are an expert UCR academic advisor who analyzes student discussions to provide structured course data. CRITICAL: You must return ONLY valid JSON - no markdown, no explanations, no text outside the JSON object."
-            
-            # Call OpenAI API
-            response = await self.client.chat.completions.create(
-                model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": system_content
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
-                temperature=0.1,  # Lower temperature for more consistent JSON output
-                max_tokens=12000  # Increased to ensure advice section isn't truncated
-            )
+            # the slot is kept through the backoff - a rate limited bulk run should slow down, not queue more
+            async with semaphore:
+                for attempt in range(BULK_MAX_RETRIES + 1):
+                    try:
+                        return await self._analyze_structured(course_data)
+                    except (APITimeoutError, RateLimitError) as e:
+                        if attempt == BULK_MAX_RETRIES:
+                            error = e
+                            break
+                        delay = min(2 ** attempt, BULK_RETRY_MAX_DELAY)
+                        logger.warning("OpenAI %s for %s, retrying in %ss", type(e).__name__, course, delay)
+                        await asyncio.sleep(delay)
+                    except Exception as e:
+                        error = e
+                        break
+            logger.error(f"Enhanced structured analysis failed for course {course}: {error}")
+            return {
+                "success": False,
+                "error": str(error),
+                "course": course
+            }
+        
+        return await asyncio.gather(*(analyze(course_data) for course_data in course_data_list))
+    
+    async def analyze_course_discussions_structured_stream(
+        self,
+        course_data: Dict[str, Any],
+        posts_context: Optional[PostsContext] = None
+    ) -> AsyncIterator[Dict[str, Any]]:
+        """
+        same analysis as analyze_course_discussions_structured, but yields {"delta": text} while openai
+        writes the json, then {"result": ...} with exactly what the non-streaming method would return.
+        a cache hit yields just the result. errors end up in the result, like the non-streaming method
+        """
+        course = course_data.get("course", "Unknown Course")
+        try:
+            request = self._structured_analysis_request(course_data, posts_context)
+            if request is None:
+                yield {"result": {"success": False, "error": "No data to analyze"}}
+                return
             
-            # Parse JSON response
-            try:
-                ai_response = response.choices[0].message.content
-                structured_data = json.loads(ai_response)
-            except json.JSONDecodeError as e:
-                # Log the actual response that failed to parse for debugging
-                logger.error(f"JSON parsing failed: {e}")
-                logger.error(f"AI Response (first 500 chars): {response.choices[0].message.content[:500]}")
-                logger.error(f"AI Response (last 500 chars): {response.choices[0].message.content[-500:]}")
-                
-                # Try to clean the JSON and parse again
-                cleaned_response = ai_response.strip()
-                
-                # Remove any markdown code blocks if present
-                if cleaned_response.startswith("```json"):
-                    cleaned_response = cleaned_response[7:]
-                if cleaned_response.startswith("```"):
-                    cleaned_response = cleaned_response[3:]
-                if cleaned_response.endswith("```"):
-                    cleaned_response = cleaned_response[:-3]
-                
-                cleaned_response = cleaned_response.strip()
-                
+            ai_response, store = await self._completion_cache_lookup(course.upper(), request)
+            if ai_response is None:
+                # chunks are collected in a list and joined once - not concatenated per token
+                chunks = []
+                finish_reason = None
+                # the slot is held until the stream finishes - that's how long the request is open at openai
+                await self._acquire_slot()
                 try:
-                    structured_data = json.loads(cleaned_response)
-                    logger.info("Successfully parsed JSON after cleaning")
-                except json.JSONDecodeError:
-                    logger.warning("JSON cleaning failed, returning minimal structured response")
-                    # Return minimal structured response instead of falling back
-                    structured_data = {
-                        "overall_sentiment": "Unable to analyze - please try again",
-                        "difficulty": {"rank": "Unknown", "reasons": ["Analysis failed"]},
-                        "professors": [],
-                        "advice": {
-                            "course_specific_tips": ["Unable to generate tips - please try searching again"],
-                            "resources": [],
-                            "minority_opinions": []
-                        },
-                        "common_pitfalls": ["Analysis unavailable"]
-                    }
+                    stream = await self.client.chat.completions.create(**request, stream=True)
+                    async for chunk in stream:
+                        if not chunk.choices:
+                            continue
+                        choice = chunk.choices[0]
+                        if choice.delta.content:
+                            chunks.append(choice.delta.content)
+                            yield {"delta": choice.delta.content}
+                        if choice.finish_reason:
+                            finish_reason = choice.finish_reason
+                finally:
+                    self._request_slots.release()
+                
+                ai_response = "".join(chunks)
+                if ai_response and finish_reason == "stop" and self._is_json(ai_response):
+                    await store(ai_response)
+            if not self._is_json(ai_response):
+                # not streamed - the result event replaces whatever partial json the listener got
+                ai_response = await self._retry_structured(course, request)
             
-            return {
+            result = {
                 "success": True,
                 "course": course,
-                "analysis": structured_data
+                "analysis": self._parse_structured_response(ai_response)
             }
-            
         except Exception as e:
             logger.error(f"Enhanced structured analysis failed for course {course}: {e}")
-            return {
+            result = {
                 "success": False,
                 "error": str(e),
                 "course": course
             }
+        yield {"result": result}
+    
+    async def analyze_courses_batch(
+        self,
+        course_data_list: List[Dict[str, Any]],
+        poll_interval: float = BATCH_POLL_INTERVAL
+    ) -> Dict[str, Dict[str, Any]]:
+        """
+        structured analyses for many courses through openai's batch api - half the price of the real-time api,
+        but a batch can take up to 24h, so this is for bulk precomputes only (interactive requests never wait on it).
+        courses already in the completion cache are skipped and every complete answer is cached, so the
+        analysis endpoints serve the precomputed answer while the course's data hasn't changed.
+        returns course -> what analyze_course_discussions_structured would have returned
+        """
+        results: Dict[str, Dict[str, Any]] = {}
+        requests: Dict[str, Dict[str, Any]] = {}
+        for course_data in course_data_list:
+            course = course_data.get("course", "Unknown Course")
+            request = self._structured_analysis_request(course_data)
+            if request is None:
+                results[course] = {"success": False, "error": "No data to analyze", "course": course}
+            else:
+                requests[course] = request
+        
+        lookups = await asyncio.gather(*(
+            self._completion_cache_lookup(course.upper(), request) for course, request in requests.items()
+        ))
+        pending: Dict[str, Callable[[str], Awaitable[None]]] = {}
+        lines = []
+        for (course, request), (cached, store) in zip(requests.items(), lookups):
+            if cached is not None:
+                results[course] = {"success": True, "course": course, "analysis": self._parse_structured_response(cached)}
+                continue
+            pending[course] = store
+            lines.append(orjson.dumps({"custom_id": course, "method": "POST", "url": "/v1/chat/completions", "body": request}))
+        if not pending:
+            return results
+        
+        batch_file = await self.client.files.create(file=("course-analyses.jsonl", b"\n".join(lines)), purpose="batch")
+        batch = await self.client.batches.create(
+            input_file_id=batch_file.id,
+            endpoint="/v1/chat/completions",
+            completion_window="24h"
+        )
+        logger.info("📦 Submitted OpenAI batch %s with %s course analyses", batch.id, len(pending))
+        while batch.status not in BATCH_FINAL_STATUSES:
+            await asyncio.sleep(poll_interval)
+            batch = await self.client.batches.retrieve(batch.id)
+        logger.info("📦 OpenAI batch %s finished: %s", batch.id, batch.status)
+        
+        if batch.output_file_id:
+            output = await self.client.files.content(batch.output_file_id)
+            for line in output.content.splitlines():
+                item = orjson.loads(line)
+                course = item["custom_id"]
+                store = pending.pop(course, None)
+                if store is None:
+                    continue
+                response = item.get("response") or {}
+                if response.get("status_code") != 200:
+                    results[course] = {"success": False, "error": f"OpenAI returned {response.get('status_code')}", "course": course}
+                    continue
+                choice = response["body"]["choices"][0]
+                ai_response = choice["message"]["content"] or ""
+                if ai_response and choice.get("finish_reason") == "stop" and self._is_json(ai_response):
+                    await store(ai_response)
+                results[course] = {"success": True, "course": course, "analysis": self._parse_structured_response(ai_response)}
+        
+        # failed requests only show up in the batch's error file
+        for course in pending:
+            results[course] = {"success": False, "error": f"Batch {batch.status} without an answer for this course", "course": course}
+        return results
+    
+    def _structured_analysis_request(self, course_data: Dict[str, Any], posts_context: Optional[PostsContext] = None) -> Optional[Dict[str, Any]]:
+        """chat completion arguments for the structured course analysis - None when there's nothing to analyze"""
+        course = course_data.get("course", "Unknown Course")
+        posts = course_data.get("posts", [])
+        ucr_database = course_data.get("ucr_database", "")
+        rmp_data = course_data.get("rmp_data", {})
+        
+        if not posts and not ucr_database and not rmp_data.get("professors"):
+            return None
+        
+        logger.info("🚀 Enhanced analysis: %s Reddit posts + UCR database + %s RMP professors for course: %s", len(posts), len(rmp_data.get('professors', [])), course)
+        
+        # Format data for AI, each source within its token budget
+        formatted_reddit_data = (posts_context or self.prepare_posts_context(posts)).formatted if posts else ""
+        formatted_rmp_data = self._truncate_tokens(self._format_rmp_data_for_ai(rmp_data), MAX_RMP_TOKENS) if rmp_data.get("enabled") else ""
+        ucr_database = self._truncate_tokens(ucr_database, MAX_DATABASE_TOKENS) if ucr_database else ""
+        
+        # Use enhanced prompt if we have RMP data, otherwise use basic prompt
+        if formatted_rmp_data:
+            prompt = self._create_enhanced_structured_analysis_prompt(course, formatted_reddit_data, ucr_database, formatted_rmp_data)
+            system_content = "You are an expert UCR academic advisor who analyzes student discussions, database reviews, and Rate My Professors data to provide comprehensive course insights. You MUST merge all data sources (Reddit, UCR Database, RMP) into a unified analysis. CRITICAL: You must return ONLY valid JSON - no markdown, no explanations, no text outside the JSON object."
+        else:
+            prompt = self._create_structured_analysis_prompt(course, formatted_reddit_data, ucr_database)
+            system_content = "You are an expert UCR academic advisor who analyzes student discussions to provide structured course data. CRITICAL: You must return ONLY valid JSON - no markdown, no explanations, no text outside the JSON object."
+        
+        return {
+            "model": self.model,
+            "messages": [
+                {
+                    "role": "system", 
+                    "content": system_content
+                },
+                {
+                    "role": "user", 
+                    "content": prompt
+                }
+            ],
+            "temperature": 0.1,  # Lower temperature for more consistent JSON output
+            "max_tokens": 12000,  # Increased to ensure advice section isn't truncated
+            # json mode - the model can only answer with a json object (the prompt asks for json, which it requires)
+            "response_format": {"type": "json_object"}
+        }
+    
+    async def _retry_structured(self, course: str, request: Dict[str, Any]) -> str:
+        """one more try at temperature 0 for an answer that didn't parse (in json mode that's a truncated answer)"""
+        logger.warning("Structured analysis for %s wasn't valid JSON, retrying once at temperature 0", course)
+        return await self._cached_completion_text(
+            valid=self._is_json,
+            semantic_bucket=course.upper(),
+            **{**request, "temperature": 0}
+        )
+    
+    def _parse_structured_response(self, ai_response: str) -> Dict[str, Any]:
+        """the structured analysis json - cleaned of markdown fences if needed, or a minimal placeholder"""
+        try:
+            return orjson.loads(ai_response)
+        except orjson.JSONDecodeError as e:
+            # Log the actual response that failed to parse for debugging
+            logger.error(f"JSON parsing failed: {e}")
+            logger.error(f"AI Response (first 500 chars): {ai_response[:500]}")
+            logger.error(f"AI Response (last 500 chars): {ai_response[-500:]}")
+            
+            # Try to clean the JSON and parse again
+            cleaned_response = ai_response.strip()
+            
+            # Remove any markdown code blocks if present
+            if cleaned_response.startswith("```json"):
+                cleaned_response = cleaned_response[7:]
+            if cleaned_response.startswith("```"):
+                cleaned_response = cleaned_response[3:]
+            if cleaned_response.endswith("```"):
+                cleaned_response = cleaned_response[:-3]
+            
+            cleaned_response = cleaned_response.strip()
+            
+            try:
+                structured_data = orjson.loads(cleaned_response)
+                logger.info("Successfully parsed JSON after cleaning")
+                return structured_data
+            except orjson.JSONDecodeError:
+                logger.warning("JSON cleaning failed, returning minimal structured response")
+                # Return minimal structured response instead of falling back
+                return {
+                    "overall_sentiment": "Unable to analyze - please try again",
+                    "difficulty": {"rank": "Unknown", "reasons": ["Analysis failed"]},
+                    "professors": [],
+                    "advice": {
+                        "course_specific_tips": ["Unable to generate tips - please try searching again"],
+                        "resources": [],
+                        "minority_opinions": []
+                    },
+                    "common_pitfalls": ["Analysis unavailable"]
+                }
 
-    async def analyze_course_discussions(self, course_data: Dict[str, Any]) -> Dict[str, Any]:
+    async def analyze_course_discussions(
+        self,
+        course_data: Dict[str, Any],
+        posts_context: Optional[PostsContext] = None
+    ) -> Dict[str, Any]:
         """
         analyze ucr course discussions using gpt
+        (posts_context: the course_data posts already prepared, e.g. for the structured analysis too)
         """
         try:
             course = course_data.get("course", "Unknown Course")
@@ -137,36 +650,20 @@ class AsyncOpenAIService:
                     "summary": f"No discussions or database entries found for {course}"
                 }
             
-            logger.info(f"Analyzing {len(posts)} Reddit posts + UCR database for course: {course}")
+            logger.info("Analyzing %s Reddit posts + UCR database for course: %s", len(posts), course)
+            posts_context = posts_context or self.prepare_posts_context(posts)
             
-            # format reddit data for ai
-            formatted_reddit_data = self._format_posts_for_ai(posts) if posts else ""
-            
-            # create the prompt
-            prompt = self._create_analysis_prompt(course, formatted_reddit_data, ucr_database)
-            
-            # call openai api (async)
-            response = await self.client.chat.completions.create(
+            # call openai api (async) - or reuse the answer to an identical prompt
+            ai_summary = await self._cached_completion_text(
                 model=self.model,
-                messages=[
-                    {
-                        "role": "system", 
-                        "content": "You are an expert UCR academic advisor who analyzes student discussions to provide comprehensive course insights."
-                    },
-                    {
-                        "role": "user", 
-                        "content": prompt
-                    }
-                ],
+                messages=self._course_analysis_messages(course, posts_context, ucr_database),
                 temperature=0.3,  # keep it consistent
                 max_tokens=6000   # much higher for very detailed analysis (up to 4000+ words)
             )
             
-            ai_summary = response.choices[0].message.content
-            
             # count posts and comments
             total_posts = len(posts)
-            total_comments = sum(len(post_data.get("comments", [])) for post_data in posts)
+            total_comments = posts_context.total_comments
             
             return {
                 "success": True,
@@ -190,30 +687,91 @@ class AsyncOpenAIService:
                 "ai_summary": "Analysis temporarily unavailable. Please try again later."
             }
     
+    async def analyze_course_discussions_stream(
+        self,
+        course_data: Dict[str, Any],
+        posts_context: Optional[PostsContext] = None
+    ) -> AsyncIterator[str]:
+        """
+        same analysis as analyze_course_discussions, but yields the summary text as openai generates it
+        errors are raised to the caller (nothing useful to fall back to mid-stream)
+        """
+        course = course_data.get("course", "Unknown Course")
+        posts = course_data.get("posts", [])
+        ucr_database = course_data.get("ucr_database", "")
+        
+        logger.info("Streaming analysis of %s Reddit posts + UCR database for course: %s", len(posts), course)
+        
+        # the slot is held until the stream finishes - that's how long the request is open at openai
+        await self._acquire_slot()
+        try:
+            stream = await self.client.chat.completions.create(
+                model=self.model,
+                messages=self._course_analysis_messages(course, posts_context or self.prepare_posts_context(posts), ucr_database),
+                temperature=0.3,
+                max_tokens=6000,
+                stream=True
+            )
+            async for chunk in stream:
+                if chunk.choices and chunk.choices[0].delta.content:
+                    yield chunk.choices[0].delta.content
+        finally:
+            self._request_slots.release()
+    
+    def _course_analysis_messages(self, course: str, posts_context: PostsContext, ucr_database: str) -> List[Dict[str, str]]:
+        """chat messages for the free-text course analysis"""
+        # reddit data is already formatted in posts_context, the database text gets its token budget here
+        formatted_reddit_data = posts_context.formatted
+        ucr_database = self._truncate_tokens(ucr_database, MAX_DATABASE_TOKENS) if ucr_database else ""
+        
+        # create the prompt
+        prompt = self._create_analysis_prompt(course, formatted_reddit_data, ucr_database)
+        
+        return [
+            {
+                "role": "system", 
+                "content": "You are an expert UCR academic advisor who analyzes student discussions to provide comprehensive course insights."
+            },
+            {
+                "role": "user", 
+                "content": prompt
+            }
+        ]
+    
+    def prepare_posts_context(self, posts: List[Dict[str, Any]]) -> PostsContext:
+        """
+        format and token-budget a course's posts (and count their comments) once - pass the result to every
+        analysis of the same posts (initial + final pass, structured + markdown) instead of redoing it each time
+        """
+        total_comments = 0
+        for post_data in posts:
+            total_comments += len(post_data.get("comments", ()))
+        formatted = self._truncate_tokens(self._format_posts_for_ai(posts), MAX_REDDIT_TOKENS) if posts else ""
+        return PostsContext(formatted=formatted, total_comments=total_comments)
+    
     def _format_posts_for_ai(self, posts: List[Dict[str, Any]]) -> str:
         """format reddit posts and comments for ai analysis"""
-        formatted_posts = []
+        # every line is appended to one list and joined once - repeated += copies the growing text
+        parts = []
+        append = parts.append
         
-        for i, post_data in enumerate(posts, 1):
+        for post_data in posts:
             post = post_data.get("post", {})
-            comments = post_data.get("comments", [])
             
             # format post
-            score = post.get('score', 0)
-            post_text = f"POST: {post.get('title', 'No title')} [▲{score}] (created_utc={post.get('created_utc', 'Unknown')})\n"
+            append(f"POST: {post.get('title', 'No title')} [▲{post.get('score', 0)}] (created_utc={post.get('created_utc', 'Unknown')})\n")
             
-            if post.get('selftext'):
-                post_text += f"{post['selftext']}\n"
+            if selftext := post.get('selftext'):
+                append(selftext)
+                append("\n")
             
             # format comments
-            for comment in comments:
-                comment_score = comment.get('score', 0)
-                post_text += f"COMMENT: [▲{comment_score}] (created_utc={comment.get('created_utc', 'Unknown')}) {comment.get('body', '')}\n"
+            for comment in post_data.get("comments", ()):
+                append(f"COMMENT: [▲{comment.get('score', 0)}] (created_utc={comment.get('created_utc', 'Unknown')}) {comment.get('body', '')}\n")
             
-            post_text += "\n"
-            formatted_posts.append(post_text)
+            append("\n")
         
-        return "".join(formatted_posts)
+        return "".join(parts)
     
     def _format_rmp_data_for_ai(self, rmp_data: Dict[str, Any]) -> str:
         """Format RMP data for AI analysis"""
@@ -221,41 +779,41 @@ class AsyncOpenAIService:
             if not rmp_data.get("enabled") or not rmp_data.get("professors"):
                 return ""
             
-            formatted_data = "RATE MY PROFESSORS DATA:\n\n"
+            parts = ["RATE MY PROFESSORS DATA:\n\n"]
             
             for prof in rmp_data["professors"]:
-                formatted_data += f"PROFESSOR: {prof['name']}\n"
-                formatted_data += f"Department: {prof['department']}\n"
-                formatted_data += f"Overall Rating: {prof['overall_rating']}/5.0\n"
-                formatted_data += f"Difficulty: {prof['difficulty']}/5.0\n"
-                formatted_data += f"Would Take Again: {prof['would_take_again_percent']}%\n"
-                formatted_data += f"Total Reviews: {prof['num_ratings']}\n"
-                formatted_data += f"Course-Specific Reviews: {prof['course_reviews_count']}\n"
-                formatted_data += f"RMP Profile: {prof['link']}\n\n"
+                parts.append(f"PROFESSOR: {prof['name']}\n")
+                parts.append(f"Department: {prof['department']}\n")
+                parts.append(f"Overall Rating: {prof['overall_rating']}/5.0\n")
+                parts.append(f"Difficulty: {prof['difficulty']}/5.0\n")
+                parts.append(f"Would Take Again: {prof['would_take_again_percent']}%\n")
+                parts.append(f"Total Reviews: {prof['num_ratings']}\n")
+                parts.append(f"Course-Specific Reviews: {prof['course_reviews_count']}\n")
+                parts.append(f"RMP Profile: {prof['link']}\n\n")
                 
                 # Add course-specific reviews
                 if prof.get("course_specific_reviews"):
-                    formatted_data += "COURSE-SPECIFIC REVIEWS:\n"
+                    parts.append("COURSE-SPECIFIC REVIEWS:\n")
                     for j, review in enumerate(prof["course_specific_reviews"]):
                         if isinstance(review, str):
                             logger.warning(f"Skipping string review at index {j}")
                             continue
-                        formatted_data += f"Review {j+1}:\n"
-                        formatted_data += f"Date: {review.get('date', 'Unknown')}\n"
-                        formatted_data += f"Class: {review.get('class', 'Unknown')}\n"
-                        formatted_data += f"Rating: {review.get('rating', 0)}/5\n"
-                        formatted_data += f"Difficulty: {review.get('difficulty', 0)}/5\n"
+                        parts.append(f"Review {j+1}:\n")
+                        parts.append(f"Date: {review.get('date', 'Unknown')}\n")
+                        parts.append(f"Class: {review.get('class', 'Unknown')}\n")
+                        parts.append(f"Rating: {review.get('rating', 0)}/5\n")
+                        parts.append(f"Difficulty: {review.get('difficulty', 0)}/5\n")
                         if review.get('grade'):
-                            formatted_data += f"Grade Received: {review['grade']}\n"
+                            parts.append(f"Grade Received: {review['grade']}\n")
                         if review.get('would_take_again') is not None:
-                            formatted_data += f"Would Take Again: {review['would_take_again']}\n"
+                            parts.append(f"Would Take Again: {review['would_take_again']}\n")
                         if review.get('tags'):
-                            formatted_data += f"Tags: {review['tags']}\n"
-                        formatted_data += f"Comment: {review.get('text', 'No comment')}\n\n"
+                            parts.append(f"Tags: {review['tags']}\n")
+                        parts.append(f"Comment: {review.get('text', 'No comment')}\n\n")
                 
-                formatted_data += "---\n\n"
+                parts.append("---\n\n")
             
-            return formatted_data
+            return "".join(parts)
             
         except Exception as e:
             logger.error(f"_format_rmp_data_for_ai failed: {e}")
@@ -274,7 +832,7 @@ class AsyncOpenAIService:
             if not posts and not ucr_database:
                 return []
             
-            logger.info(f"🔍 AI-powered professor extraction for {course}")
+            logger.info("🔍 AI-powered professor extraction for %s", course)
             
             # Format data for AI analysis
             formatted_reddit_data = self._format_posts_for_ai(posts) if posts else ""
@@ -321,7 +879,7 @@ UCR DATABASE REVIEWS:
 EXTRACT ALL PROFESSOR NAMES AS JSON ARRAY:"""
 
             # Call OpenAI for professor extraction
-            response = await self.client.chat.completions.create(
+            response = await self._chat_completion(
                 model=self.model,
                 messages=[
                     {
@@ -339,8 +897,7 @@ EXTRACT ALL PROFESSOR NAMES AS JSON ARRAY:"""
             
             # Parse the response
             try:
-                import json
-                extracted_names = json.loads(response.choices[0].message.content)
+                extracted_names = orjson.loads(response.choices[0].message.content)
                 if isinstance(extracted_names, list):
                     # Clean and filter names
                     cleaned_names = []
@@ -350,13 +907,13 @@ EXTRACT ALL PROFESSOR NAMES AS JSON ARRAY:"""
                             if cleaned_name not in cleaned_names:
                                 cleaned_names.append(cleaned_name)
                     
-                    logger.info(f"✅ AI extracted {len(cleaned_names)} professor names: {cleaned_names}")
+                    logger.info("✅ AI extracted %s professor names: %s", len(cleaned_names), cleaned_names)
                     return cleaned_names
                 else:
                     logger.warning("AI returned non-list format for professor names")
                     return []
                     
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse AI professor extraction response: {e}")
                 return []
                 
@@ -375,7 +932,7 @@ EXTRACT ALL PROFESSOR NAMES AS JSON ARRAY:"""
             posts = filter_data.get("posts", [])
             sheets_data = filter_data.get("sheets_data", "")
             
-            logger.info(f"🔍 Filtering professor {professor_name} data for course {course_filter}")
+            logger.info("🔍 Filtering professor %s data for course %s", professor_name, course_filter)
             
             # Format data for AI analysis
             formatted_reddit_data = self._format_posts_for_ai(posts) if posts else ""
@@ -428,7 +985,7 @@ RETURN FILTERED DATA AS JSON:
 **IMPORTANT:** Escape all quotes in text as \" and replace newlines with spaces."""
 
             # Call OpenAI for filtering
-            response = await self.client.chat.completions.create(
+            response = await self._chat_completion(
                 model=self.model,
                 messages=[
                     {
@@ -446,8 +1003,8 @@ RETURN FILTERED DATA AS JSON:
             
             # Parse the response
             try:
-                filtered_result = json.loads(response.choices[0].message.content)
-                logger.info(f"✅ Successfully filtered data for {professor_name} + {course_filter}")
+                filtered_result = orjson.loads(response.choices[0].message.content)
+                logger.info("✅ Successfully filtered data for %s + %s", professor_name, course_filter)
                 return {
                     "success": True,
                     "filtered_posts": filtered_result.get("filtered_posts", []),
@@ -455,7 +1012,7 @@ RETURN FILTERED DATA AS JSON:
                     "filtering_summary": filtered_result.get("filtering_summary", "")
                 }
                 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse AI filtering response: {e}")
                 return {
                     "success": False,
@@ -491,7 +1048,7 @@ RETURN FILTERED DATA AS JSON:
                 }
             
             context = f" teaching {course_filter}" if course_filter else ""
-            logger.info(f"🔍 Filtering UCR database reviews for professor {professor_name}{context}")
+            logger.info("🔍 Filtering UCR database reviews for professor %s%s", professor_name, context)
             
             # Create filtering prompt
             prompt = f"""You are a review filtering specialist. Your job is to find all reviews in the UCR Class Database that mention Professor {professor_name}{context}.
@@ -527,7 +1084,7 @@ RETURN FILTERED RESULTS AS JSON:
 **CRITICAL:** All text must have quotes escaped as \" and no newlines."""
 
             # Call OpenAI for filtering
-            response = await self.client.chat.completions.create(
+            response = await self._chat_completion(
                 model=self.model,
                 messages=[
                     {
@@ -546,8 +1103,8 @@ RETURN FILTERED RESULTS AS JSON:
             # Parse the response
             try:
                 ai_response = response.choices[0].message.content
-                filtered_result = json.loads(ai_response)
-                logger.info(f"✅ Successfully filtered UCR reviews for {professor_name}")
+                filtered_result = orjson.loads(ai_response)
+                logger.info("✅ Successfully filtered UCR reviews for %s", professor_name)
                 return {
                     "success": True,
                     "professor_mentions": filtered_result.get("professor_mentions", ""),
@@ -555,7 +1112,7 @@ RETURN FILTERED RESULTS AS JSON:
                     "courses_mentioned": filtered_result.get("courses_mentioned", [])
                 }
                 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse AI UCR filtering response: {e}")
                 logger.error(f"UCR Filter Response (first 500 chars): {response.choices[0].message.content[:500]}")
                 logger.error(f"UCR Filter Response (last 500 chars): {response.choices[0].message.content[-500:]}")
@@ -585,7 +1142,7 @@ RETURN FILTERED RESULTS AS JSON:
             ucr_database = professor_data.get("ucr_database", "")
             rmp_data = professor_data.get("rmp_data", {})
             
-            logger.info(f"🎓 Comprehensive analysis for Professor {professor_name}" + (f" (course: {course_filter})" if course_filter else ""))
+            logger.info("🎓 Comprehensive analysis for Professor %s%s", professor_name, f" (course: {course_filter})" if course_filter else "")
             
             # Format data for AI
             try:
@@ -621,7 +1178,7 @@ RETURN FILTERED RESULTS AS JSON:
             
             # Call OpenAI API
             try:
-                response = await self.client.chat.completions.create(
+                response = await self._chat_completion(
                     model=self.model,
                     messages=[
                         {
@@ -642,7 +1199,7 @@ RETURN FILTERED RESULTS AS JSON:
             
             # Parse JSON response
             try:
-                analysis_result = json.loads(response.choices[0].message.content)
+                analysis_result = orjson.loads(response.choices[0].message.content)
                 
                 return {
                     "success": True,
@@ -651,7 +1208,7 @@ RETURN FILTERED RESULTS AS JSON:
                     "analysis": analysis_result
                 }
                 
-            except json.JSONDecodeError as e:
+            except orjson.JSONDecodeError as e:
                 logger.error(f"Failed to parse professor analysis JSON: {e}")
                 return {
                     "success": False,
@@ -667,14 +1224,9 @@ RETURN FILTERED RESULTS AS JSON:
                 "professor_name": professor_name
             }
 
-    def _create_structured_analysis_prompt(self, course: str, formatted_reddit_data: str, ucr_database_data: str = "", formatted_rmp_data: str = "") -> str:
-        """create prompt for structured JSON data output"""
-        return f"""You are an assistant that analyzes UCR course data and returns structured JSON.
-
-### Context
-Course ID: {course}
-Reddit data: {formatted_reddit_data[:1000] if formatted_reddit_data.strip() else "No Reddit data"}...
-UCR Database: {ucr_database_data[:1000] if ucr_database_data.strip() else "No database data"}...
+    # static rubrics that open the course analysis prompts. openai caches a prompt prefix once it passes
+    # 1024 tokens, so everything course-specific goes after these and every course reuses the same prefix
+    _STATIC_RUBRIC_STRUCTURED = """You are an assistant that analyzes UCR course data and returns structured JSON.
 
 ### Task
 IMPORTANT INSTRUCTIONS:
@@ -715,44 +1267,44 @@ For the "difficulty" explanation array:
 
 Analyze the data and return ONLY valid JSON in this exact format:
 
-{{
-    "overall_sentiment": {{
+{
+    "overall_sentiment": {
         "summary": "One sentence overall vibe",
-        "workload": {{
+        "workload": {
             "hours_per_week": "2-4 hours",
             "assignments": "Weekly quizzes, 2 midterms, final",
             "time_commitment": "Low to moderate"
-        }},
+        },
         "minority_opinions": ["Any contrarian views about course overall"]
-    }},
-    "difficulty": {{
+    },
+    "difficulty": {
         "rank": "Easy",
         "rating": 2.5,
         "max_rating": 10,
         "explanation": ["\"CS111 is one of the hardest classes with lots of proofs and tight quizzes\"", "Heavy coding assignments with unrealistic deadlines", "Professor moves through material too quickly"],
         "minority_opinions": ["Any contrarian difficulty opinions"]
-    }},
+    },
     "professors": [
-        {{
+        {
             "name": "Professor Name",
             "rating": 2.3,
             "max_rating": 5,
             "reviews": [
-                {{"source": "database", "date": "2024-01-15", "text": "Review text here"}},
-                {{"source": "reddit", "date": "2024-02-20", "text": "Review text here"}},
-                {{"source": "database", "date": "2024-03-10", "text": "Another review"}},
-                {{"source": "reddit", "date": "2024-04-15", "text": "More review text"}}
+                {"source": "database", "date": "2024-01-15", "text": "Review text here"},
+                {"source": "reddit", "date": "2024-02-20", "text": "Review text here"},
+                {"source": "database", "date": "2024-03-10", "text": "Another review"},
+                {"source": "reddit", "date": "2024-04-15", "text": "More review text"}
             ],
             "minority_opinions": ["Any contrarian opinions about this prof"]
-        }}
+        }
     ],
-    "advice": {{
+    "advice": {
         "course_specific_tips": ["Tip 1", "Tip 2", "Tip 3"],
         "resources": ["Resource 1", "Resource 2"],
         "minority_opinions": ["Alternative study strategies"]
-    }},
+    },
     "common_pitfalls": ["Pitfall 1", "Pitfall 2", "Pitfall 3"]
-}}
+}
 
 ### 🚨 MANDATORY: ALL SECTIONS REQUIRED
 You MUST include ALL sections in your JSON response:
@@ -772,19 +1324,11 @@ You MUST include ALL sections in your JSON response:
 
 Return ONLY the JSON object, no other text.
 
-### REDDIT DATA:
-{formatted_reddit_data if formatted_reddit_data.strip() else "No Reddit discussions found."}
+"""
 
-### UCR DATABASE DATA:
-{ucr_database_data if ucr_database_data.strip() else "No UCR database entries found."}"""
-
-    def _create_analysis_prompt(self, course: str, formatted_reddit_data: str, ucr_database_data: str = "") -> str:
-        """create the prompt for openai"""
-        return f"""You are an assistant that turns crowd-sourced information about a UCR course into a clear, student-friendly cheat-sheet.
+    _STATIC_RUBRIC_MARKDOWN = """You are an assistant that turns crowd-sourced information about a UCR course into a clear, student-friendly cheat-sheet.
 
 ### Context
-Course ID: {course}
-
 1. **Reddit data** – every relevant post and top-level comment pulled from r/UCR.  
    • Each block starts with "POST:" or "COMMENT:".  
    • Up-votes are in square brackets, e.g. [▲123] or [+45].  
@@ -851,21 +1395,9 @@ Top 3 mistakes students warn about.
 - **NO main title or heading at the top - start directly with the first section.**
 - **MINORITY OPINIONS: If you find genuine minority opinions, integrate them into the appropriate sections using this format: "*Minority opinion: [opinion text]*" - only include when there are actual minority views, don't force them.**
 
-### REDDIT DATA:
-{formatted_reddit_data if formatted_reddit_data.strip() else "No Reddit discussions found for this course."}
+"""
 
-### UCR DATABASE DATA:
-{ucr_database_data if ucr_database_data.strip() else "No UCR database entries found for this course."}"""
-
-    def _create_enhanced_structured_analysis_prompt(self, course: str, formatted_reddit_data: str, ucr_database_data: str = "", formatted_rmp_data: str = "") -> str:
-        """Create enhanced prompt with RMP data integration"""
-        return f"""You are an assistant that analyzes UCR course data and returns structured JSON.
-
-### Context
-Course ID: {course}
-Reddit data: {formatted_reddit_data[:800] if formatted_reddit_data.strip() else "No Reddit data"}...
-UCR Database: {ucr_database_data[:800] if ucr_database_data.strip() else "No database data"}...
-RMP Data: {formatted_rmp_data[:800] if formatted_rmp_data.strip() else "No RMP data"}...
+    _STATIC_RUBRIC_ENHANCED = """You are an assistant that analyzes UCR course data and returns structured JSON.
 
 ### Task
 CRITICAL INSTRUCTIONS:
@@ -933,50 +1465,50 @@ Analyze the data and return ONLY valid JSON in this exact format:
 - NO trailing commas
 - NO comments in JSON
 
-{{
-    "overall_sentiment": {{
+{
+    "overall_sentiment": {
         "summary": "One sentence honest overall vibe",
-        "workload": {{
+        "workload": {
             "hours_per_week": "2-4 hours",
             "assignments": "Weekly quizzes, 2 midterms, final",
             "time_commitment": "Low to moderate"
-        }},
+        },
         "minority_opinions": ["Any contrarian views about course overall"]
-    }},
-    "difficulty": {{
+    },
+    "difficulty": {
         "rank": "Easy",
         "rating": 2.5,
         "max_rating": 10,
         "explanation": ["\"CS111 is one of the hardest classes with lots of proofs\"", "Heavy coding assignments with tight deadlines", "Professor moves through material too quickly"],
         "minority_opinions": ["Any contrarian difficulty opinions"]
-    }},
+    },
     "professors": [
-        {{
+        {
             "name": "Professor Name",
             "rating": 2.1,
             "max_rating": 5,
             "rmp_overall_rating": 2.1,
             "rmp_link": "Use the RMP Profile link from the data",
             "department": "Computer Science",
-            "sentiment_distribution": {{"positive": 20, "neutral": 10, "negative": 70}},
+            "sentiment_distribution": {"positive": 20, "neutral": 10, "negative": 70},
             "total_reviews_analyzed": 100,
             "reviews": [
-                {{"source": "rmp", "date": "2024-01-15", "text": "Worst professor I've ever had. Unclear lectures, doesn't help students.", "rating": 1, "class": "CS111"}},
-                {{"source": "rmp", "date": "2024-02-20", "text": "Avoid at all costs. Teaching style is confusing and grading is unfair.", "rating": 1, "class": "CS111"}},
-                {{"source": "reddit", "date": "2024-03-10", "text": "Elena is not great at explaining concepts, very rushed", "rating": 2}},
-                {{"source": "rmp", "date": "2024-03-15", "text": "Difficult class but she's helpful in office hours if you ask.", "rating": 3, "class": "CS111"}},
-                {{"source": "database", "date": "2024-04-01", "text": "Some people like her but I found her teaching unclear", "rating": 2}}
+                {"source": "rmp", "date": "2024-01-15", "text": "Worst professor I've ever had. Unclear lectures, doesn't help students.", "rating": 1, "class": "CS111"},
+                {"source": "rmp", "date": "2024-02-20", "text": "Avoid at all costs. Teaching style is confusing and grading is unfair.", "rating": 1, "class": "CS111"},
+                {"source": "reddit", "date": "2024-03-10", "text": "Elena is not great at explaining concepts, very rushed", "rating": 2},
+                {"source": "rmp", "date": "2024-03-15", "text": "Difficult class but she's helpful in office hours if you ask.", "rating": 3, "class": "CS111"},
+                {"source": "database", "date": "2024-04-01", "text": "Some people like her but I found her teaching unclear", "rating": 2}
             ],
             "minority_opinions": ["Some students appreciate her office hours help"]
-        }}
+        }
     ],
-    "advice": {{
+    "advice": {
         "course_specific_tips": ["Tip 1", "Tip 2", "Tip 3"],
         "resources": ["Resource 1", "Resource 2"],
         "minority_opinions": ["Alternative study strategies"]
-    }},
+    },
     "common_pitfalls": ["Pitfall 1", "Pitfall 2", "Pitfall 3"]
-}}
+}
 
 **CRITICAL REMINDERS:**
 - If professor has low rating (below 3.0), show mostly negative reviews
@@ -986,6 +1518,35 @@ Analyze the data and return ONLY valid JSON in this exact format:
 - Never artificially balance reviews if reality is skewed
 - Students deserve honest information to make informed decisions
 
+"""
+
+    def _create_structured_analysis_prompt(self, course: str, formatted_reddit_data: str, ucr_database_data: str = "", formatted_rmp_data: str = "") -> str:
+        """create prompt for structured JSON data output"""
+        return self._STATIC_RUBRIC_STRUCTURED + f"""### Context
+Course ID: {course}
+
+### REDDIT DATA:
+{formatted_reddit_data if formatted_reddit_data.strip() else "No Reddit discussions found."}
+
+### UCR DATABASE DATA:
+{ucr_database_data if ucr_database_data.strip() else "No UCR database entries found."}"""
+
+    def _create_analysis_prompt(self, course: str, formatted_reddit_data: str, ucr_database_data: str = "") -> str:
+        """create the prompt for openai"""
+        return self._STATIC_RUBRIC_MARKDOWN + f"""### Course
+Course ID: {course}
+
+### REDDIT DATA:
+{formatted_reddit_data if formatted_reddit_data.strip() else "No Reddit discussions found for this course."}
+
+### UCR DATABASE DATA:
+{ucr_database_data if ucr_database_data.strip() else "No UCR database entries found for this course."}"""
+
+    def _create_enhanced_structured_analysis_prompt(self, course: str, formatted_reddit_data: str, ucr_database_data: str = "", formatted_rmp_data: str = "") -> str:
+        """Create enhanced prompt with RMP data integration"""
+        return self._STATIC_RUBRIC_ENHANCED + f"""### Context
+Course ID: {course}
+
 **🚨 ABSOLUTELY CRITICAL - COURSE-SPECIFIC PROFESSOR FILTERING 🚨**
 Before including ANY professor in the "professors" array, verify they have ACTUAL {course} data:
 
@@ -1032,23 +1593,16 @@ Return ONLY the JSON object, no other text.
 ### RATE MY PROFESSORS DATA:
 {formatted_rmp_data if formatted_rmp_data.strip() else "No Rate My Professors data found."}"""
 
-    def _create_professor_analysis_prompt(self, professor_name: str, course_filter: str, formatted_reddit_data: str, ucr_database_data: str = "", formatted_rmp_data: str = "") -> str:
-        """Create professor-focused analysis prompt"""
-        course_context = f" for course {course_filter}" if course_filter else " across all courses"
-        
-        # Ensure all data parameters are strings to avoid .strip() errors
-        reddit_data_safe = str(formatted_reddit_data) if formatted_reddit_data else ""
-        ucr_data_safe = str(ucr_database_data) if ucr_database_data else ""
-        rmp_data_safe = str(formatted_rmp_data) if formatted_rmp_data else ""
-        
-        return f"""You are a professor analysis specialist that creates comprehensive professor profiles.
+    # the professor prompt as a str.format_map template, only the fields below are filled in per call
+    # ({{ and }} are the json example's literal braces)
+    _PROFESSOR_PROMPT_TEMPLATE = """You are a professor analysis specialist that creates comprehensive professor profiles.
 
 ### Context
 Professor: {professor_name}
-Course Focus: {course_filter if course_filter else "All Courses"}
-Reddit Data: {reddit_data_safe[:800] if reddit_data_safe.strip() else "No Reddit data"}...
-UCR Database: {ucr_data_safe[:800] if ucr_data_safe.strip() else "No database data"}...
-RMP Data: {rmp_data_safe[:800] if rmp_data_safe.strip() else "No RMP data"}...
+Course Focus: {course_focus}
+Reddit Data: {reddit_preview}...
+UCR Database: {ucr_preview}...
+RMP Data: {rmp_preview}...
 
 ### Task: Create Comprehensive Professor Profile
 Analyze ALL available data about Professor {professor_name}{course_context} and create a detailed, honest profile.
@@ -1058,7 +1612,7 @@ Analyze ALL available data about Professor {professor_name}{course_context} and
 - **BE BRUTALLY HONEST**: Don't favor positive over negative reviews
 - **RECENT PRIORITY**: Weight recent reviews more heavily
 - **COMPREHENSIVE COVERAGE**: Include ALL review sources (RMP, Reddit, Sheets)
-- **COURSE CONTEXT**: {f"Focus on {course_filter}-specific content" if course_filter else "Include all course contexts"}
+- **COURSE CONTEXT**: {course_context_rule}
 
 ### PROFESSOR ANALYSIS REQUIREMENTS:
 
@@ -1076,7 +1630,7 @@ Analyze ALL available data about Professor {professor_name}{course_context} and
      * If Reddit data exists → Include Reddit post/comment reviews  
      * If UCR Database data exists → Include database reviews
      * DO NOT show only RMP reviews when other sources have data
-   - **Course-specific**: {f"Only include {course_filter} reviews" if course_filter else "Include various courses taught"}
+   - **Course-specific**: {course_review_rule}
 
 3. **TEACHING ANALYSIS**:
    - Teaching style and effectiveness
@@ -1088,7 +1642,7 @@ Analyze ALL available data about Professor {professor_name}{course_context} and
 {{
     "professor_info": {{
         "name": "{professor_name}",
-        "course_focus": "{course_filter if course_filter else 'All Courses'}",
+        "course_focus": "{course_focus}",
         "primary_rating": 3.2,
         "rating_source": "rmp" or "calculated",
         "max_rating": 5,
@@ -1108,7 +1662,7 @@ Analyze ALL available data about Professor {professor_name}{course_context} and
         {{
             "source": "rmp",
             "date": "2024-01-15",
-            "course": "{course_filter if course_filter else 'BUS010'}",
+            "course": "{example_course}",
             "rating": 2,
             "text": "RMP review text here",
             "tags": ["Tough Grader", "Unclear"]
@@ -1116,21 +1670,21 @@ Analyze ALL available data about Professor {professor_name}{course_context} and
         {{
             "source": "reddit", 
             "date": "2024-02-20",
-            "course": "{course_filter if course_filter else 'BUS010'}",
+            "course": "{example_course}",
             "rating": 4,
             "text": "Reddit post/comment text about professor here"
         }},
         {{
             "source": "database", 
             "date": "2024-03-10",
-            "course": "{course_filter if course_filter else 'BUS010'}",
+            "course": "{example_course}",
             "rating": 3,
             "text": "UCR database review text here"
         }}
     ],
     "course_breakdown": {{
         "courses_taught": ["CS111", "CS141"],
-        "most_reviewed_course": "{course_filter if course_filter else 'CS111'}",
+        "most_reviewed_course": "{most_reviewed_course}",
         "course_specific_notes": "Any course-specific observations"
     }},
     "student_advice": {{
@@ -1147,18 +1701,48 @@ Analyze ALL available data about Professor {professor_name}{course_context} and
 - Include negative reviews if they're prevalent
 - **MUST INCLUDE ALL SOURCE TYPES**: If Reddit data exists, include Reddit reviews. If UCR database exists, include database reviews. DO NOT only show RMP reviews.
 - Focus on helping students make informed decisions
-- {f"Only analyze {course_filter} content" if course_filter else "Include all course contexts"}
+- {course_only_rule}
 
 ### REDDIT POSTS AND COMMENTS:
-{reddit_data_safe if reddit_data_safe.strip() else "No Reddit data available"}
+{reddit_data}
 
 ### UCR DATABASE REVIEWS:
-{ucr_data_safe if ucr_data_safe.strip() else "No database data available"}
+{ucr_data}
 
 ### RATE MY PROFESSORS DATA:
-{rmp_data_safe if rmp_data_safe.strip() else "No RMP data available"}
+{rmp_data}
 
 ANALYZE AND RETURN PROFESSOR PROFILE AS JSON:"""
 
-# create a global instance
-openai_service = AsyncOpenAIService() 
\ No newline at end of file
+    def _create_professor_analysis_prompt(self, professor_name: str, course_filter: str, formatted_reddit_data: str, ucr_database_data: str = "", formatted_rmp_data: str = "") -> str:
+        """Create professor-focused analysis prompt"""
+        # Ensure all data parameters are strings to avoid .strip() errors
+        reddit_data_safe = str(formatted_reddit_data) if formatted_reddit_data else ""
+        ucr_data_safe = str(ucr_database_data) if ucr_database_data else ""
+        rmp_data_safe = str(formatted_rmp_data) if formatted_rmp_data else ""
+        
+        return self._PROFESSOR_PROMPT_TEMPLATE.format_map({
+            "professor_name": professor_name,
+            "course_focus": course_filter if course_filter else "All Courses",
+            "course_context": f" for course {course_filter}" if course_filter else " across all courses",
+            "course_context_rule": f"Focus on {course_filter}-specific content" if course_filter else "Include all course contexts",
+            "course_review_rule": f"Only include {course_filter} reviews" if course_filter else "Include various courses taught",
+            "course_only_rule": f"Only analyze {course_filter} content" if course_filter else "Include all course contexts",
+            "example_course": course_filter if course_filter else "BUS010",
+            "most_reviewed_course": course_filter if course_filter else "CS111",
+            "reddit_preview": reddit_data_safe[:800] if reddit_data_safe.strip() else "No Reddit data",
+            "ucr_preview": ucr_data_safe[:800] if ucr_data_safe.strip() else "No database data",
+            "rmp_preview": rmp_data_safe[:800] if rmp_data_safe.strip() else "No RMP data",
+            "reddit_data": reddit_data_safe if reddit_data_safe.strip() else "No Reddit data available",
+            "ucr_data": ucr_data_safe if ucr_data_safe.strip() else "No database data available",
+            "rmp_data": rmp_data_safe if rmp_data_safe.strip() else "No RMP data available",
+        })
+
+@lru_cache(maxsize=1)
+def get_openai_service() -> AsyncOpenAIService:
+    """
+    the shared service, created on first call rather than at import (the sdk client and tokenizer
+    load even later, on first use). call sites go through this, so get_openai_service.cache_clear()
+    gives the next caller a fresh instance
+    """
+    return AsyncOpenAIService()
@@ -12,7 +12,6 @@ import logging
 from difflib import SequenceMatcher
 from config import config
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
 class ProfessorExtractionService:
@@ -114,7 +113,7 @@ class ProfessorExtractionService:
                 comment_body = comment.get('body', '')
                 all_names.update(self.extract_professor_names_from_text(comment_body))
         
-        logger.info(f"Extracted {len(all_names)} potential professor names from Reddit data")
+        logger.info("Extracted %s potential professor names from Reddit data", len(all_names))
         return all_names
     
     def extract_from_spreadsheet_data(self, spreadsheet_data: str) -> Set[str]:
@@ -131,7 +130,7 @@ class ProfessorExtractionService:
                 comment_text = line.split('Comments:', 1)[1].strip()
                 all_names.update(self.extract_professor_names_from_text(comment_text))
         
-        logger.info(f"Extracted {len(all_names)} potential professor names from spreadsheet data")
+        logger.info("Extracted %s potential professor names from spreadsheet data", len(all_names))
         return all_names
     
     def clean_and_normalize_names(self, raw_names: Set[str]) -> List[str]:
@@ -165,7 +164,7 @@ class ProfessorExtractionService:
                 unique_names.append(name)
                 seen.add(name.lower())
         
-        logger.info(f"Cleaned names: {len(raw_names)} -> {len(unique_names)}")
+        logger.info("Cleaned names: %s -> %s", len(raw_names), len(unique_names))
         return unique_names
     
     def expand_partial_names(self, names: List[str], rmp_professors: List[Dict[str, Any]]) -> List[str]:
@@ -220,7 +219,7 @@ class ProfessorExtractionService:
                 unique_expanded.append(name)
                 seen.add(name.lower())
         
-        logger.info(f"Expanded names: {len(names)} -> {len(unique_expanded)}")
+        logger.info("Expanded names: %s -> %s", len(names), len(unique_expanded))
         return unique_expanded
     
     def fuzzy_match_with_rmp(self, extracted_names: List[str], rmp_professors: List[Dict[str, Any]], threshold: float = 0.7) -> Dict[str, Dict[str, Any]]:
@@ -254,7 +253,7 @@ class ProfessorExtractionService:
                     'match_type': 'fuzzy'
                 }
         
-        logger.info(f"Fuzzy matched {len(matched_professors)} professors out of {len(extracted_names)} extracted names")
+        logger.info("Fuzzy matched %s professors out of %s extracted names", len(matched_professors), len(extracted_names))
         return matched_professors
     
     async def extract_all_professor_names(self, reddit_data: List[Dict[str, Any]], spreadsheet_data: str, rmp_professors: List[Dict[str, Any]]) -> Dict[str, Any]:
@@ -0,0 +1,257 @@
+"""
+Progress Tracking
+-----------------
+Per-session progress events for the analysis endpoints, streamed to the browser over sse.
+
+Without redis the events only live in the process that runs the analysis, so the sse
+request has to land on the same worker. When REDIS_URL is set every event is also appended
+to a short-lived redis list (backlog for late connectors) and published on a per-session
+channel, so any worker can serve the stream.
+
+Sessions are normally closed by the endpoint that created them. Anything left behind by a
+cancelled request or a crash is closed by reap_abandoned_sessions after SESSION_MAX_AGE.
+"""
+
+import asyncio
+import logging
+from collections import deque
+from typing import Any, AsyncIterator, Dict, List, Optional
+
+import orjson
+
+logger = logging.getLogger(__name__)
+
+# progress tracking for real-time updates
+progress_tracker: Dict[str, "ProgressUpdate"] = {}
+# sse connections that opened before their session's analysis started, woken when it does
+progress_waiters: Dict[str, asyncio.Event] = {}
+
+# redis backlog list lives a little longer than any analysis takes
+PROGRESS_LOG_TTL = 300
+
+# sessions older than this are treated as abandoned - no analysis takes anywhere near 10 minutes
+SESSION_MAX_AGE = 600
+SESSION_REAP_INTERVAL = 60
+# events kept per session for late sse connectors - a normal analysis emits fewer than ten
+MAX_EVENTS_PER_SESSION = 256
+
+TIMEOUT_EVENT = {"step": "timeout", "message": "Connection timed out"}
+
+def _channel(session_id: str) -> str:
+    return f"progress:{session_id}"
+
+def _log_key(session_id: str) -> str:
+    return f"progress:{session_id}:log"
+
+class ProgressUpdate:
+    def __init__(self, session_id: str):
+        self.session_id = session_id
+        # progress objects are only created inside request handlers, so there's always a running loop
+        self._loop = asyncio.get_running_loop()
+        self.created_at = self._loop.time()
+        self.events = deque(maxlen=MAX_EVENTS_PER_SESSION)
+        # total emitted, including events that fell off the front of the deque
+        self.emitted = 0
+        self.closed = False
+        # set on every emit/cleanup so sse streams only wake up when there's something to send
+        self._wakeup = asyncio.Event()
+        # last pending redis publish - each one waits for the previous so events stay in order
+        self._publishing: Optional[asyncio.Task] = None
+        progress_tracker[session_id] = self
+        waiter = progress_waiters.pop(session_id, None)
+        if waiter is not None:
+            waiter.set()
+
+    def emit(self, step: str, message: str, progress: int = None):
+        """Emit a progress event"""
+        event = {
+            "step": step,
+            "message": message,
+            "progress": progress,
+            "timestamp": self._loop.time()
+        }
+        self.events.append(event)
+        self.emitted += 1
+        self._wakeup.set()
+        progress_broker.publish(self, event)
+        # per-event logs are debug and lazily formatted - nothing is built unless debug logging is on
+        logger.debug("🔔 Progress [%s] Step: %s, Message: %s, Progress: %s%%", self.session_id, step, message, progress)
+
+    def cleanup(self):
+        """Clean up progress tracker"""
+        if progress_tracker.get(self.session_id) is self:
+            del progress_tracker[self.session_id]
+        if not self.closed:
+            self.closed = True
+            self._wakeup.set()
+            progress_broker.publish(self, None)
+
+    def events_since(self, seen: int) -> List[Dict[str, Any]]:
+        """events emitted after the first `seen` (the ones still buffered)"""
+        new = min(self.emitted - seen, len(self.events))
+        return list(self.events)[-new:] if new > 0 else []
+
+    async def wait(self, timeout: float) -> bool:
+        """wait for the next emit/cleanup - False if nothing happened within timeout"""
+        try:
+            await asyncio.wait_for(self._wakeup.wait(), timeout)
+        except asyncio.TimeoutError:
+            return False
+        self._wakeup.clear()
+        return True
+
+class ProgressBroker:
+    """
+    delivers progress events to sse streams - straight from progress_tracker in memory mode,
+    through redis (backlog list + pub/sub channel) once connected. redis errors are logged,
+    never raised into the analysis that emitted the event
+    """
+
+    def __init__(self):
+        self._redis = None
+
+    @property
+    def backend(self) -> str:
+        return "redis" if self._redis is not None else "memory"
+
+    async def connect(self, url: Optional[str]) -> None:
+        """connect to redis if a url is configured, otherwise stay in-process"""
+        if not url:
+            return
+        try:
+            # imported here so redis is only needed when it's actually configured
+            import redis.asyncio as redis
+            client = redis.from_url(url)
+            await client.ping()
+            self._redis = client
+            logger.info("✅ Progress events shared through redis")
+        except Exception as e:
+            logger.error(f"Could not connect to redis, progress streams stay per-process: {e}")
+
+    async def close(self) -> None:
+        if self._redis is not None:
+            await self._redis.close()
+            self._redis = None
+
+    def publish(self, progress: ProgressUpdate, event: Optional[Dict[str, Any]]) -> None:
+        """forward an event to redis in the background (None marks the session finished)"""
+        if self._redis is None:
+            return
+        progress._publishing = progress._loop.create_task(
+            self._publish(progress.session_id, event, progress._publishing)
+        )
+
+    async def _publish(self, session_id: str, event: Optional[Dict[str, Any]], previous: Optional[asyncio.Task]) -> None:
+        if previous is not None:
+            await asyncio.wait([previous])
+        try:
+            async with self._redis.pipeline(transaction=True) as pipe:
+                pipe.rpush(_log_key(session_id), orjson.dumps(event))
+                pipe.expire(_log_key(session_id), PROGRESS_LOG_TTL)
+                length, _ = await pipe.execute()
+            # seq lets a subscriber skip events it already read from the backlog
+            await self._redis.publish(_channel(session_id), orjson.dumps({"seq": length - 1, "event": event}))
+        except Exception as e:
+            logger.warning(f"Could not publish progress for {session_id}: {e}")
+
+    def stream(self, session_id: str, heartbeat: float, idle_timeout: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        """
+        a session's events as they happen, None whenever `heartbeat` seconds pass quietly.
+        ends after the session is cleaned up, or with TIMEOUT_EVENT after idle_timeout without events
+        """
+        if self._redis is None:
+            return self._stream_local(session_id, heartbeat, idle_timeout)
+        return self._stream_redis(session_id, heartbeat, idle_timeout)
+
+    async def _stream_local(self, session_id: str, heartbeat: float, idle_timeout: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        deadline = loop.time() + idle_timeout
+
+        # the browser usually connects before the analysis request has created the session
+        tracker = progress_tracker.get(session_id)
+        if tracker is None:
+            waiter = progress_waiters.setdefault(session_id, asyncio.Event())
+            try:
+                while tracker is None and loop.time() < deadline:
+                    try:
+                        await asyncio.wait_for(waiter.wait(), min(heartbeat, deadline - loop.time()))
+                    except asyncio.TimeoutError:
+                        yield None
+                    tracker = progress_tracker.get(session_id)
+            finally:
+                if progress_waiters.get(session_id) is waiter:
+                    del progress_waiters[session_id]
+
+        if tracker is not None:
+            logger.debug("📡 SSE session %s found in tracker", session_id)
+            sent = 0
+            while True:
+                # send any new events (that are still buffered)
+                if tracker.emitted > sent:
+                    for event in tracker.events_since(sent):
+                        yield event
+                    sent = tracker.emitted
+                    deadline = loop.time() + idle_timeout  # reset timeout when we send data
+                if tracker.closed:
+                    return
+                if loop.time() >= deadline:
+                    break
+                # sleep until the analysis emits something - heartbeat if it's been quiet a while
+                if not await tracker.wait(min(heartbeat, deadline - loop.time())):
+                    yield None
+
+        yield TIMEOUT_EVENT
+
+    async def _stream_redis(self, session_id: str, heartbeat: float, idle_timeout: float) -> AsyncIterator[Optional[Dict[str, Any]]]:
+        loop = asyncio.get_running_loop()
+        # the subscribe handshake counts against the idle timeout too
+        deadline = loop.time() + idle_timeout
+        pubsub = self._redis.pubsub()
+        try:
+            # subscribe (and wait for the confirmation) before reading the backlog, so nothing
+            # published in between is missed - duplicates are skipped by seq instead
+            await pubsub.subscribe(_channel(session_id))
+            await pubsub.get_message(timeout=min(heartbeat, idle_timeout))
+
+            seen = 0
+            for raw in await self._redis.lrange(_log_key(session_id), 0, -1):
+                event = orjson.loads(raw)
+                seen += 1
+                if event is None:
+                    return
+                yield event
+            if seen:
+                deadline = loop.time() + idle_timeout  # reset timeout when we send data
+
+            while loop.time() < deadline:
+                message = await pubsub.get_message(ignore_subscribe_messages=True, timeout=min(heartbeat, deadline - loop.time()))
+                if message is None:
+                    yield None
+                    continue
+                data = orjson.loads(message["data"])
+                if data["seq"] < seen:
+                    continue
+                seen = data["seq"] + 1
+                if data["event"] is None:
+                    return
+                yield data["event"]
+                deadline = loop.time() + idle_timeout
+
+            yield TIMEOUT_EVENT
+        finally:
+            await pubsub.aclose()
+
+# shared instance - connected from the app lifespan
+progress_broker = ProgressBroker()
+
+async def reap_abandoned_sessions(interval: float = SESSION_REAP_INTERVAL, max_age: float = SESSION_MAX_AGE) -> None:
+    """close sessions whose endpoint never cleaned them up - runs for the lifetime of the app"""
+    loop = asyncio.get_running_loop()
+    while True:
+        await asyncio.sleep(interval)
+        cutoff = loop.time() - max_age
+        stale = [tracker for tracker in progress_tracker.values() if tracker.created_at < cutoff]
+        for tracker in stale:
+            tracker.cleanup()
+        if stale:
+            logger.info("🧹 Reaped %s abandoned progress sessions", len(stale))
@@ -1,43 +1,108 @@
-import asyncpraw
 import asyncio
-from typing import List, Dict, Any
+from collections import deque
+from typing import AsyncIterator, List, Dict, Any, Optional, Tuple
+import httpx
+import orjson
 from config import config
 import logging
-import re
+import time
 
-logging.basicConfig(level=logging.INFO)
 logger = logging.getLogger(__name__)
 
+REDDIT_TOKEN_URL = "https://www.reddit.com/api/v1/access_token"
+REDDIT_API_URL = "https://oauth.reddit.com"
+
 class AsyncRedditService:
     def __init__(self):
-        """setup async reddit connection (read-only)"""
-        self.reddit = None
-        self._initialized = False
-        logger.info("AsyncRedditService created - will initialize Reddit instance on first use")
+        """setup async reddit client (read-only, app-only oauth against reddit's json api)"""
+        self._client: Optional[httpx.AsyncClient] = None
+        self._token: Optional[str] = None
+        self._token_expires_at = 0.0
+        self._token_lock = asyncio.Lock()
+        self.max_retries = 3
+        # cap concurrent submission fetches across all requests so big batches don't trip reddit rate limits
+        self.max_concurrent_fetches = config.REDDIT_MAX_CONCURRENT_FETCHES
+        self._fetch_semaphore = asyncio.Semaphore(self.max_concurrent_fetches)
+        # post_id -> (fetched_at, task) - the comments and full-content endpoints hitting the same post
+        # within the ttl share one submission fetch instead of each paying for their own
+        self._submission_cache: Dict[str, Any] = {}
+        self.submission_cache_ttl = 120
+        self.submission_cache_size = 256
+        logger.info("AsyncRedditService created - will authenticate with Reddit on first use")
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """shared keep-alive client for every reddit call"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=20,
+                headers={"User-Agent": config.REDDIT_USER_AGENT},
+                limits=httpx.Limits(max_connections=100, max_keepalive_connections=30)
+            )
+        return self._client
     
-    async def _ensure_reddit_initialized(self):
-        """Initialize Reddit instance if not already done"""
-        if not self._initialized:
+    async def _ensure_token(self) -> str:
+        """get an app-only oauth token, refreshing it a minute before it expires"""
+        if self._token and time.monotonic() < self._token_expires_at:
+            return self._token
+        
+        async with self._token_lock:
+            # another request may have refreshed it while we waited
+            if self._token and time.monotonic() < self._token_expires_at:
+                return self._token
             try:
-                self.reddit = asyncpraw.Reddit(
-                    client_id=config.REDDIT_CLIENT_ID,
-                    client_secret=config.REDDIT_CLIENT_SECRET,
-                    user_agent=config.REDDIT_USER_AGENT,
-                    check_for_async=False
+                response = await self.client.post(
+                    REDDIT_TOKEN_URL,
+                    data={"grant_type": "client_credentials"},
+                    auth=(config.REDDIT_CLIENT_ID or "", config.REDDIT_CLIENT_SECRET or "")
                 )
-                self._initialized = True
-                logger.info("Async Reddit instance initialized successfully")
+                response.raise_for_status()
+                data = response.json()
+                self._token = data["access_token"]
+                self._token_expires_at = time.monotonic() + data.get("expires_in", 3600) - 60
+                logger.info("Reddit access token acquired")
             except Exception as e:
-                logger.error(f"Failed to initialize Async Reddit instance: {e}")
+                logger.error(f"Failed to authenticate with Reddit: {e}")
                 raise
+        return self._token
+    
+    async def _get_json(self, path: str, params: Optional[Dict[str, Any]] = None) -> Any:
+        """
+        GET a reddit json endpoint, retrying rate limits and server errors with backoff
+        """
+        params = {**(params or {}), "raw_json": 1}  # raw_json=1: text comes back unescaped
+        for attempt in range(self.max_retries + 1):
+            token = await self._ensure_token()
+            response = await self.client.get(
+                f"{REDDIT_API_URL}{path}",
+                params=params,
+                headers={"Authorization": f"bearer {token}"}
+            )
+            
+            if attempt < self.max_retries:
+                if response.status_code == 401:
+                    # token revoked or expired early - get a new one
+                    self._token = None
+                    continue
+                if response.status_code == 429 or response.status_code >= 500:
+                    try:
+                        delay = float(response.headers.get("retry-after", 2 ** attempt))
+                    except ValueError:
+                        delay = 2 ** attempt
+                    delay = min(delay, 10)
+                    logger.warning(f"Reddit returned {response.status_code} for {path}, retrying in {delay}s")
+                    await asyncio.sleep(delay)
+                    continue
+            
+            response.raise_for_status()
+            # listings with comment trees run to hundreds of kb - parsed in c rather than with stdlib json
+            return orjson.loads(response.content)
     
     async def search_course_info(self, keyword: str, limit: int = 100) -> Dict[str, Any]:
         """
         search for posts about a course in r/ucr
         """
         try:
-            await self._ensure_reddit_initialized()
-            
             results = {
                 "keyword": keyword,
                 "subreddits": {},
@@ -48,12 +113,12 @@ class AsyncRedditService:
             target_subreddits = ["ucr"]
             
             for subreddit_name in target_subreddits:
-                logger.info(f"Searching r/{subreddit_name} for: {keyword}")
+                logger.info("Searching r/%s for: %s", subreddit_name, keyword)
                 subreddit_posts = await self._search_subreddit(subreddit_name, keyword, limit)
                 results["subreddits"][subreddit_name] = subreddit_posts
                 results["total_posts"] += len(subreddit_posts["posts"])
             
-            logger.info(f"Search completed. Total posts found: {results['total_posts']}")
+            logger.info("Search completed. Total posts found: %s", results['total_posts'])
             return results
             
         except Exception as e:
@@ -65,33 +130,49 @@ class AsyncRedditService:
         search a specific subreddit for mentions of the keyword
         """
         try:
-            subreddit = await self.reddit.subreddit(subreddit_name)
-            
-            # search the subreddit
-            search_results = subreddit.search(keyword, sort="relevance", time_filter="all", limit=limit)
-            
             posts = []
-            async for submission in search_results:
-                try:
-                    # get basic info from each post
-                    post_data = {
-                        "id": submission.id,
-                        "title": submission.title,
-                        "score": submission.score,
-                        "upvote_ratio": submission.upvote_ratio,
-                        "num_comments": submission.num_comments,
-                        "created_utc": submission.created_utc,
-                        "author": str(submission.author) if submission.author else "[deleted]",
-                        "url": f"https://reddit.com{submission.permalink}",
-                        "selftext": submission.selftext[:500] if submission.selftext else "",  # limit text length
-                        "is_self": submission.is_self,
-                        "link_flair_text": submission.link_flair_text,
-                        "subreddit": str(submission.subreddit)
-                    }
-                    posts.append(post_data)
-                except Exception as e:
-                    logger.warning(f"Error processing post {submission.id}: {e}")
-                    continue
+            after = None
+            
+            # reddit pages search results 100 at a time
+            while len(posts) < limit:
+                params = {
+                    "q": keyword,
+                    "restrict_sr": 1,
+                    "sort": "relevance",
+                    "t": "all",
+                    "limit": min(100, limit - len(posts))
+                }
+                if after:
+                    params["after"] = after
+                listing = await self._get_json(f"/r/{subreddit_name}/search", params)
+                children = listing["data"]["children"]
+                
+                for child in children:
+                    submission = child["data"]
+                    try:
+                        # get basic info from each post
+                        post_data = {
+                            "id": submission["id"],
+                            "title": submission["title"],
+                            "score": submission["score"],
+                            "upvote_ratio": submission["upvote_ratio"],
+                            "num_comments": submission["num_comments"],
+                            "created_utc": submission["created_utc"],
+                            "author": submission.get("author") or "[deleted]",
+                            "url": f"https://reddit.com{submission['permalink']}",
+                            "selftext": submission["selftext"][:500] if submission.get("selftext") else "",  # limit text length
+                            "is_self": submission["is_self"],
+                            "link_flair_text": submission.get("link_flair_text"),
+                            "subreddit": submission["subreddit"]
+                        }
+                        posts.append(post_data)
+                    except Exception as e:
+                        logger.warning(f"Error processing post {submission.get('id')}: {e}")
+                        continue
+                
+                after = listing["data"].get("after")
+                if not after or not children:
+                    break
             
             return {
                 "subreddit_name": subreddit_name,
@@ -108,25 +189,72 @@ class AsyncRedditService:
                 "error": str(e)
             }
     
+    @staticmethod
+    def _flatten_comments(children: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """breadth-first flatten of a comment tree, dropping "load more" stubs (same order praw's comments.list() gave)"""
+        comments = []
+        queue = deque(children)
+        while queue:
+            child = queue.popleft()
+            if child.get("kind") != "t1":
+                continue
+            comment = child["data"]
+            comments.append(comment)
+            replies = comment.get("replies")
+            if replies:
+                queue.extend(replies["data"]["children"])
+        return comments
+    
+    async def _load_submission(self, post_id: str) -> Tuple[Dict[str, Any], List[Dict[str, Any]]]:
+        """fetch a post and its whole loaded comment tree in one request"""
+        post_listing, comment_listing = await self._get_json(f"/comments/{post_id}")
+        submission = post_listing["data"]["children"][0]["data"]
+        return submission, self._flatten_comments(comment_listing["data"]["children"])
+    
+    async def _get_submission(self, post_id: str):
+        """
+        get (submission, flattened comments) for a post, reusing a recent or in-flight fetch of the same id
+        """
+        now = time.monotonic()
+        cached = self._submission_cache.get(post_id)
+        if cached and now - cached[0] < self.submission_cache_ttl:
+            task = cached[1]
+        else:
+            if len(self._submission_cache) >= self.submission_cache_size:
+                # drop expired entries first, then the oldest ones if still full
+                for key in [k for k, (ts, _) in self._submission_cache.items() if now - ts >= self.submission_cache_ttl]:
+                    del self._submission_cache[key]
+                while len(self._submission_cache) >= self.submission_cache_size:
+                    del self._submission_cache[next(iter(self._submission_cache))]
+            task = asyncio.ensure_future(self._load_submission(post_id))
+            self._submission_cache[post_id] = (now, task)
+        
+        try:
+            # shield so one cancelled request doesn't cancel the fetch other callers are waiting on
+            return await asyncio.shield(task)
+        except Exception:
+            # don't keep failures around - the next request should retry
+            if self._submission_cache.get(post_id, (None, None))[1] is task:
+                del self._submission_cache[post_id]
+            raise
+    
     async def get_post_comments(self, post_id: str, limit: int = 50) -> List[Dict[str, Any]]:
         """
         get comments from a specific post
         """
         try:
-            await self._ensure_reddit_initialized()
-            submission = await self.reddit.submission(id=post_id)
-            await submission.comments.replace_more(limit=0)  # remove "more comments" objects
+            _, all_comments = await self._get_submission(post_id)
             
             comments = []
-            for comment in submission.comments.list()[:limit]:
+            for comment in all_comments[:limit]:
                 try:
-                    if hasattr(comment, 'body') and comment.body not in ['[deleted]', '[removed]']:
+                    if 'body' in comment and comment['body'] not in ['[deleted]', '[removed]']:
                         comment_data = {
-                            "id": comment.id,
-                            "body": comment.body[:300],  # limit comment length
-                            "score": comment.score,
-                            "created_utc": comment.created_utc,
-                            "author": str(comment.author) if comment.author else "[deleted]"
+                            "id": comment["id"],
+                            "body": comment["body"][:300],  # limit comment length
+                            "score": comment["score"],
+                            "created_utc": comment["created_utc"],
+                            "author": comment.get("author") or "[deleted]"
                         }
                         comments.append(comment_data)
                 except Exception as e:
@@ -144,36 +272,34 @@ class AsyncRedditService:
         get full post content and comments for ai analysis (no text limits)
         """
         try:
-            await self._ensure_reddit_initialized()
-            submission = await self.reddit.submission(id=post_id)
-            await submission.comments.replace_more(limit=0)
+            submission, all_comments = await self._get_submission(post_id)
             
             # get full post content (no truncation for ai)
             post_content = {
-                "id": submission.id,
-                "title": submission.title,
-                "selftext": submission.selftext,  # full text, no limits
-                "score": submission.score,
-                "upvote_ratio": submission.upvote_ratio,
-                "num_comments": submission.num_comments,
-                "created_utc": submission.created_utc,
-                "author": str(submission.author) if submission.author else "[deleted]",
-                "url": f"https://reddit.com{submission.permalink}",
-                "subreddit": str(submission.subreddit),
-                "link_flair_text": submission.link_flair_text
+                "id": submission["id"],
+                "title": submission["title"],
+                "selftext": submission.get("selftext", ""),  # full text, no limits
+                "score": submission["score"],
+                "upvote_ratio": submission["upvote_ratio"],
+                "num_comments": submission["num_comments"],
+                "created_utc": submission["created_utc"],
+                "author": submission.get("author") or "[deleted]",
+                "url": f"https://reddit.com{submission['permalink']}",
+                "subreddit": submission["subreddit"],
+                "link_flair_text": submission.get("link_flair_text")
             }
             
             # get full comments (no truncation for ai)
             comments = []
-            for comment in submission.comments.list()[:max_comments]:
+            for comment in all_comments[:max_comments]:
                 try:
-                    if hasattr(comment, 'body') and comment.body not in ['[deleted]', '[removed]']:
+                    if 'body' in comment and comment['body'] not in ['[deleted]', '[removed]']:
                         comment_data = {
-                            "id": comment.id,
-                            "body": comment.body,  # full comment, no limits
-                            "score": comment.score,
-                            "created_utc": comment.created_utc,
-                            "author": str(comment.author) if comment.author else "[deleted]"
+                            "id": comment["id"],
+                            "body": comment["body"],  # full comment, no limits
+                            "score": comment["score"],
+                            "created_utc": comment["created_utc"],
+                            "author": comment.get("author") or "[deleted]"
                         }
                         comments.append(comment_data)
                 except Exception as e:
@@ -196,42 +322,53 @@ class AsyncRedditService:
                 "comments": []
             }
     
+    async def iter_posts_for_ai(self, post_ids: List[str], max_comments_per_post: int = 50) -> AsyncIterator[Tuple[int, Dict[str, Any]]]:
+        """
+        yield (position in post_ids, {"post", "comments"}) for each post as soon as its fetch finishes,
+        so callers can work on the early posts while the slow ones are still downloading
+        """
+        # search results can list the same post twice - fetch each one once, keeping order
+        post_ids = list(dict.fromkeys(post_ids))
+        
+        async def fetch(index: int, post_id: str) -> Tuple[int, Dict[str, Any]]:
+            async with self._fetch_semaphore:
+                try:
+                    return index, await self.get_full_post_content_for_ai(post_id, max_comments_per_post)
+                except Exception as e:
+                    return index, {"success": False, "error": str(e)}
+        
+        # 🚀 PARALLEL PROCESSING - Fetch posts concurrently, bounded by the fetch semaphore
+        # (no reddit.info() batching - /comments/{id} already returns the post with its comments,
+        # so a batched metadata call would add a request rather than save one)
+        tasks = [asyncio.create_task(fetch(i, post_id)) for i, post_id in enumerate(post_ids)]
+        try:
+            for next_done in asyncio.as_completed(tasks):
+                index, result = await next_done
+                if result["success"]:
+                    yield index, {
+                        "post": result["post"],
+                        "comments": result["comments"]
+                    }
+                else:
+                    logger.warning(f"Failed to get content for post {post_ids[index]}: {result.get('error', 'Unknown error')}")
+        finally:
+            # the consumer stopped early (error/cancel) - don't leave fetches running
+            for task in tasks:
+                task.cancel()
+    
     async def get_multiple_posts_for_ai(self, post_ids: List[str], max_comments_per_post: int = 50) -> Dict[str, Any]:
         """
         get full content from multiple posts for ai analysis
         """
         try:
-            await self._ensure_reddit_initialized()
-            logger.info(f"Getting full content for {len(post_ids)} posts with max {max_comments_per_post} comments each")
+            logger.info("Getting full content for %s posts with max %s comments each", len(post_ids), max_comments_per_post)
             
-            # 🚀 PARALLEL PROCESSING - Fetch all posts simultaneously!
-            logger.info("Fetching all posts in parallel...")
-            tasks = [
-                self.get_full_post_content_for_ai(post_id, max_comments_per_post) 
-                for post_id in post_ids
-            ]
+            logger.info("Fetching posts in parallel (max %s at a time)...", self.max_concurrent_fetches)
             
-            # Wait for all posts to complete simultaneously
-            results = await asyncio.gather(*tasks, return_exceptions=True)
-            
-            posts_data = []
-            for i, result in enumerate(results):
-                try:
-                    if isinstance(result, Exception):
-                        logger.warning(f"Error processing post {post_ids[i]}: {result}")
-                        continue
-                        
-                    if result["success"]:
-                        posts_data.append({
-                            "post": result["post"],
-                            "comments": result["comments"]
-                        })
-                    else:
-                        logger.warning(f"Failed to get content for post {post_ids[i]}: {result.get('error', 'Unknown error')}")
-                        
-                except Exception as e:
-                    logger.warning(f"Error processing result for post {post_ids[i]}: {e}")
-                    continue
+            # posts arrive in completion order - put them back in search order
+            arrived = [item async for item in self.iter_posts_for_ai(post_ids, max_comments_per_post)]
+            arrived.sort(key=lambda item: item[0])
+            posts_data = [post_data for _, post_data in arrived]
             
             return {
                 "success": True,
@@ -247,106 +384,126 @@ class AsyncRedditService:
                 "data": []
             }
     
-    def _is_main_topic_about_course(self, post_data: Dict[str, Any], search_keyword: str) -> bool:
-        """
-        Check if the searched course is the MAIN topic of discussion in this post
-        """
-        post = post_data.get("post", {})
-        comments = post_data.get("comments", [])
-        
-        course_code = search_keyword.lower().replace(' ', '').replace('-', '')
-        title_lower = post.get("title", "").lower()
-        content_lower = post.get("selftext", "").lower()
-        
-        # Check if this is a list post that just mentions multiple classes
-        list_indicators = [
-            'anybody have these classes',
-            'anyone take these',
-            'has anyone taken',
-            'schedule help',
-            'class recommendations',
-            'which classes',
-            'what classes',
-            'need help choosing',
-            'course selection',
-            'registration help',
-            'what should i take'
-        ]
-        
-        is_list_post = any(indicator in title_lower or indicator in content_lower 
-                          for indicator in list_indicators)
-        
-        if is_list_post:
-            # For list posts, check if the discussion is actually focused on our course
-            all_text = f"{title_lower} {content_lower} {' '.join(c.get('body', '').lower() for c in comments)}"
-            course_code_matches = len(re.findall(course_code, all_text))
-            total_words = len(all_text.split())
-            
-            # If the course is mentioned less than 0.5% of all words in a list post, it's probably not the main topic
-            if total_words > 0 and course_code_matches / total_words < 0.005:
-                return False
-        
-        # Check if title is focused on our specific course
-        title_focused_keywords = [
-            'review', 'experience', 'professor', 'prof', 'difficulty', 'tips', 
-            'advice', 'grade', 'exam', 'final', 'midterm', 'homework', 'assignment',
-            'how is', 'taking', 'took', 'thoughts on', 'opinions on', 'recommend',
-            'easy', 'hard', 'worth it', 'skip', 'avoid'
-        ]
-        
-        title_focused_on_course = (course_code in title_lower and 
-                                  any(keyword in title_lower for keyword in title_focused_keywords))
-        
-        if title_focused_on_course:
-            return True
-        
-        # Check if post content is substantially about our course
-        if content_lower and len(content_lower) > 50:
-            course_mentions = len(re.findall(course_code, content_lower))
-            content_words = len(content_lower.split())
-            
-            # Course should be mentioned at least 1% of the time in substantial posts
-            if content_words > 0 and course_mentions / content_words >= 0.01:
-                return True
-        
-        # Check if comments are discussing our course specifically
-        relevant_comments = [
-            c for c in comments 
-            if course_code in c.get('body', '').lower() and len(c.get('body', '')) > 30
-        ]
-        
-        # If we have substantial comments about our course, it's likely the main topic
-        if len(relevant_comments) >= 2:
-            return True
-        
-        # Final check: if course is in title and there's any meaningful discussion, include it
-        if (course_code in title_lower and 
-            (len(content_lower) > 20 or len(comments) > 2)):
-            return True
-        
-        return False
-    
     def filter_posts_for_main_topic(self, posts_data: List[Dict[str, Any]], search_keyword: str) -> List[Dict[str, Any]]:
         """
         Filter posts to only include those where the searched course is the main topic
         """
-        if not posts_data or not search_keyword:
-            return posts_data
-        
-        logger.info(f"Filtering {len(posts_data)} posts for main topic relevance to '{search_keyword}'")
+        return filter_posts_for_main_topic(posts_data, search_keyword)
+
+    async def close(self):
+        """Close the pooled reddit http client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+
+# pure text heuristics - plain functions, usable without the service instance
+
+# phrases that mark a post as a "which of these classes" list rather than a discussion of one course
+LIST_POST_INDICATORS = (
+    'anybody have these classes',
+    'anyone take these',
+    'has anyone taken',
+    'schedule help',
+    'class recommendations',
+    'which classes',
+    'what classes',
+    'need help choosing',
+    'course selection',
+    'registration help',
+    'what should i take'
+)
+
+# title words that mean the post is about the experience of taking the course
+TITLE_FOCUSED_KEYWORDS = (
+    'review', 'experience', 'professor', 'prof', 'difficulty', 'tips', 
+    'advice', 'grade', 'exam', 'final', 'midterm', 'homework', 'assignment',
+    'how is', 'taking', 'took', 'thoughts on', 'opinions on', 'recommend',
+    'easy', 'hard', 'worth it', 'skip', 'avoid'
+)
+
+def is_main_topic_about_course(post_data: Dict[str, Any], search_keyword: str) -> bool:
+    """
+    Check if the searched course is the MAIN topic of discussion in this post
+    """
+    post = post_data.get("post", {})
+    comments = post_data.get("comments", [])
+    
+    # the course code is matched literally - str.count/`in` run in c and don't treat
+    # characters like "+" or "." in the keyword as regex syntax
+    course_code = search_keyword.lower().replace(' ', '').replace('-', '')
+    title_lower = post.get("title", "").lower()
+    content_lower = post.get("selftext", "").lower()
+    comment_bodies = [c.get('body', '') for c in comments]
+    # comments are most of the text, so they're only lowercased once a check actually reads them
+    # (most posts are decided by the title or post body first)
+    comment_bodies_lower = None
+    
+    # Check if this is a list post that just mentions multiple classes
+    is_list_post = any(indicator in title_lower or indicator in content_lower 
+                      for indicator in LIST_POST_INDICATORS)
+    
+    if is_list_post:
+        comment_bodies_lower = [body.lower() for body in comment_bodies]
+        # For list posts, check if the discussion is actually focused on our course
+        all_text = f"{title_lower} {content_lower} {' '.join(comment_bodies_lower)}"
+        course_code_matches = all_text.count(course_code)
+        total_words = len(all_text.split())
         
-        filtered_posts = []
-        for post_data in posts_data:
-            if self._is_main_topic_about_course(post_data, search_keyword):
-                filtered_posts.append(post_data)
+        # If the course is mentioned less than 0.5% of all words in a list post, it's probably not the main topic
+        if total_words > 0 and course_code_matches / total_words < 0.005:
+            return False
+    
+    # Check if title is focused on our specific course
+    title_focused_on_course = (course_code in title_lower and 
+                              any(keyword in title_lower for keyword in TITLE_FOCUSED_KEYWORDS))
+    
+    if title_focused_on_course:
+        return True
+    
+    # Check if post content is substantially about our course
+    if content_lower and len(content_lower) > 50:
+        course_mentions = content_lower.count(course_code)
+        content_words = len(content_lower.split())
         
-        logger.info(f"Filtered to {len(filtered_posts)} posts that are actually about '{search_keyword}'")
-        return filtered_posts
+        # Course should be mentioned at least 1% of the time in substantial posts
+        if content_words > 0 and course_mentions / content_words >= 0.01:
+            return True
+    
+    # Check if comments are discussing our course specifically
+    if comment_bodies_lower is None:
+        comment_bodies_lower = [body.lower() for body in comment_bodies]
+    relevant_comments = sum(
+        1 for body, body_lower in zip(comment_bodies, comment_bodies_lower)
+        if course_code in body_lower and len(body) > 30
+    )
+    
+    # If we have substantial comments about our course, it's likely the main topic
+    if relevant_comments >= 2:
+        return True
+    
+    # Final check: if course is in title and there's any meaningful discussion, include it
+    if (course_code in title_lower and 
+        (len(content_lower) > 20 or len(comments) > 2)):
+        return True
+    
+    return False
 
-    async def close(self):
-        """Close the async reddit session"""
-        if self.reddit and self._initialized:
-            await self.reddit.close()
+def filter_posts_for_main_topic(posts_data: List[Dict[str, Any]], search_keyword: str) -> List[Dict[str, Any]]:
+    """
+    Filter posts to only include those where the searched course is the main topic
+    """
+    if not posts_data or not search_keyword:
+        return posts_data
+    
+    logger.info("Filtering %s posts for main topic relevance to '%s'", len(posts_data), search_keyword)
+    
+    filtered_posts = []
+    for post_data in posts_data:
+        if is_main_topic_about_course(post_data, search_keyword):
+            filtered_posts.append(post_data)
+    
+    logger.info("Filtered to %s posts that are actually about '%s'", len(filtered_posts), search_keyword)
+    return filtered_posts
 
 # create a global instance
 reddit_service = AsyncRedditService() 
\ No newline at end of file
@@ -15,17 +15,80 @@ Provides methods to:
 
 import httpx
 import asyncio
-import json
+import re
 from typing import Dict, Any, List, Optional
 import logging
+import orjson
+from cache import SingleFlight, TTLCache, response_cache
 from config import config
 
-logging.basicConfig(level=logging.INFO)
+try:
+    import h2  # noqa: F401 - httpx needs it to speak http/2
+    HTTP2_AVAILABLE = True
+except ImportError:  # optional - without it the pooled client stays on http/1.1 keep-alive
+    HTTP2_AVAILABLE = False
+
 logger = logging.getLogger(__name__)
 
+# professor lookups/reviews are cached in the shared response cache (redis when configured) -
+# rmp data changes slowly, and "no such professor" is re-checked sooner in case they get added
+RMP_PROFESSOR_CACHE_TTL = 24 * 3600
+RMP_NOT_FOUND_CACHE_TTL = 3600
+# professors per batched graphql request - keeps each response (up to 1000 ratings per professor) a sane size
+RMP_BATCH_SIZE = 10
+# school searches are cached too - the school list basically never changes
+RMP_SCHOOL_CACHE_TTL = 24 * 3600
+# every analysis defaults to this school, so it's resolved once at startup
+UCR_SCHOOL_NAME = "University of California Riverside"
+
+# selections run once per professor in a batched request (see batch_query)
+TEACHER_SEARCH_SELECTION = '''newSearch {
+    teachers(query: $query, first: 8, after: "") {
+      edges {
+        node {
+          id
+          legacyId
+          avgRating
+          numRatings
+          wouldTakeAgainPercent
+          avgDifficulty
+          department
+          firstName
+          lastName
+          school {
+            name
+            id
+          }
+          isSaved
+        }
+      }
+    }
+  }'''
+
+TEACHER_COMMENTS_SELECTION = '''node(id: $id) {
+    __typename
+    ... on Teacher {
+      ratings(first: 1000) {
+        edges {
+          node {
+            comment
+            class
+            date
+            helpfulRating
+            difficultyRating
+            grade
+            wouldTakeAgain
+            ratingTags
+            clarityRating
+          }
+        }
+      }
+    }
+  }'''
+
 class RateMyProfessorService:
-    def __init__(self):
-        """Initialize the RMP service"""
+    def __init__(self, max_concurrency: Optional[int] = None):
+        """Initialize the RMP service (max_concurrency defaults to RMP_MAX_CONCURRENT_REQUESTS)"""
         self.api_url = "https://www.ratemyprofessors.com/graphql"
         self.headers = {
             "User-Agent": "Mozilla/5.0 (Windows NT 10.0; Win64; x64; rv:129.0) Gecko/20100101 Firefox/129.0",
@@ -39,6 +102,17 @@ class RateMyProfessorService:
             "Sec-Fetch-Site": "same-origin",
             "Priority": "u=4",
         }
+        # one pooled client for every rmp call - created on first use, closed from the app lifespan
+        self._client: Optional[httpx.AsyncClient] = None
+        # professors are looked up in parallel - cap in-flight graphql calls so rmp doesn't rate limit us
+        self.max_concurrency = max_concurrency or config.RMP_MAX_CONCURRENT_REQUESTS
+        self._request_semaphore = asyncio.Semaphore(self.max_concurrency)
+        # school name -> best matching school; every analysis resolves the same one or two schools
+        self._school_cache = TTLCache(maxsize=64, ttl=RMP_SCHOOL_CACHE_TTL)
+        self._school_lookups = SingleFlight()
+        # normalized search text -> school search results (only non-empty ones are cached)
+        self._school_searches = TTLCache(maxsize=256, ttl=RMP_SCHOOL_CACHE_TTL)
+        self._school_search_lookups = SingleFlight()
         
         # GraphQL query for getting professor reviews/comments
         self.TEACHER_COMMENTS_QUERY = '''
@@ -236,32 +310,81 @@ class RateMyProfessorService:
         
         logger.info("RateMyProfessorService initialized with comprehensive GraphQL queries")
     
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """
+        shared keep-alive client, so lookups reuse connections instead of a new tls handshake per query
+        over http/2 (when h2 is installed) concurrent lookups are multiplexed on one connection
+        """
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(
+                timeout=15,
+                headers=self.headers,
+                http2=HTTP2_AVAILABLE,
+                limits=httpx.Limits(max_connections=200, max_keepalive_connections=100)
+            )
+        return self._client
+    
+    async def close(self):
+        """Close the pooled http client"""
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
     async def _gql_request(self, query: str, variables: dict) -> Dict[str, Any]:
         """Send GraphQL request with proper formatting"""
         try:
-            async with httpx.AsyncClient(timeout=15) as client:
-                response = await client.post(
+            async with self._request_semaphore:
+                response = await self.client.post(
                     self.api_url,
-                    json={"query": query, "variables": variables},
-                    headers=self.headers
+                    content=orjson.dumps({"query": query, "variables": variables})
                 )
-                response.raise_for_status()
-                
-                data = response.json()
-                if "errors" in data:
-                    logger.error(f"GraphQL errors: {data['errors']}")
-                    raise Exception(f"GraphQL errors: {data['errors']}")
-                
-                return data["data"]
-                
+            response.raise_for_status()
+            
+            data = orjson.loads(response.content)
+            if "errors" in data:
+                logger.error(f"GraphQL errors: {data['errors']}")
+                raise Exception(f"GraphQL errors: {data['errors']}")
+            
+            return data["data"]
+            
         except Exception as e:
             logger.error(f"GraphQL request failed: {e}")
             raise
     
+    async def batch_query(self, selection: str, variable_types: Dict[str, str], queries: List[Dict[str, Any]]) -> List[Dict[str, Any]]:
+        """
+        Run one selection for several sets of variables in a single GraphQL request.
+        Copy i is aliased q{i} with its variables suffixed ($id -> $id0), and each copy's data is returned in order
+        """
+        definitions = []
+        fields = []
+        variables = {}
+        for i, query_variables in enumerate(queries):
+            for name, type_name in variable_types.items():
+                definitions.append(f"${name}{i}: {type_name}")
+                variables[f"{name}{i}"] = query_variables[name]
+            fields.append(f"q{i}: " + re.sub(r"\$(\w+)", lambda m: f"${m.group(1)}{i}", selection))
+        
+        document = f"query BatchQuery({', '.join(definitions)}) {{\n  " + "\n  ".join(fields) + "\n}"
+        data = await self._gql_request(document, variables)
+        return [data[f"q{i}"] for i in range(len(queries))]
+    
     async def search_schools(self, query: str) -> List[Dict[str, Any]]:
+        """
+        Search schools by name - results are cached for a day per normalized query and
+        concurrent searches for the same text share one graphql call
+        """
+        key = " ".join(query.lower().split())
+        schools = self._school_searches.get(key)
+        if schools is not None:
+            return schools
+        return await self._school_search_lookups.run(key, lambda: self._search_schools(key, query))
+    
+    async def _search_schools(self, key: str, query: str) -> List[Dict[str, Any]]:
         """Search schools by name using GraphQL"""
         try:
-            logger.info(f"Searching schools for: {query}")
+            logger.info("Searching schools for: %s", query)
             
             variables = {
                 "query": {
@@ -286,63 +409,98 @@ class RateMyProfessorService:
                 }
                 schools.append(school)
             
-            logger.info(f"Found {len(schools)} schools")
+            logger.info("Found %s schools", len(schools))
+            # empty results (and errors below) aren't cached, so they're retried next time
+            if schools:
+                self._school_searches.set(key, schools)
             return schools
             
         except Exception as e:
             logger.error(f"Failed to search schools: {e}")
             return []
     
+    async def resolve_school(self, school_name: str) -> Optional[Dict[str, Any]]:
+        """
+        Best matching school for a name (None if there's no match) - cached for a day, and
+        concurrent callers share one lookup so an early warm-up call is never repeated
+        """
+        key = school_name.strip().lower()
+        school = self._school_cache.get(key)
+        if school is not None:
+            return school
+        return await self._school_lookups.run(key, lambda: self._lookup_school(key, school_name))
+    
+    async def _lookup_school(self, key: str, school_name: str) -> Optional[Dict[str, Any]]:
+        schools = await self.search_schools(school_name)
+        if not schools:
+            return None
+        # Use the first matching school
+        self._school_cache.set(key, schools[0])
+        return schools[0]
+    
     async def search_professors(self, school_id: str, query: str) -> List[Dict[str, Any]]:
-        """Search professors within a specific school using GraphQL"""
+        """Search professors within a specific school using GraphQL ([] if the search fails)"""
         try:
-            logger.info(f"Searching professors in school {school_id} for: {query}")
-            
-            variables = {
-                "query": {
-                    "text": query,
-                    "schoolID": school_id,
-                    "fallback": True,
-                    "departmentID": None
-                },
-                "schoolID": school_id,
-                "includeSchoolFilter": True
-            }
-            
-            data = await self._gql_request(self.TEACHER_QUERY, variables)
-            professors = []
-            
-            for edge in data["search"]["teachers"]["edges"]:
-                node = edge["node"]
-                professor = {
-                    "id": node["id"],
-                    "legacyId": node["legacyId"],
-                    "firstName": node["firstName"],
-                    "lastName": node["lastName"],
-                    "department": node["department"],
-                    "avgRating": node["avgRating"],
-                    "avgDifficulty": node["avgDifficulty"],
-                    "numRatings": node["numRatings"],
-                    "wouldTakeAgainPercent": node["wouldTakeAgainPercent"],
-                    "school": {
-                        "id": node["school"]["id"],
-                        "name": node["school"]["name"]
-                    },
-                    "isSaved": node["isSaved"]
-                }
-                professors.append(professor)
-            
-            logger.info(f"Found {len(professors)} professors")
-            return professors
-            
+            return await self._search_professors(school_id, query)
         except Exception as e:
             logger.error(f"Failed to search professors: {e}")
             return []
     
+    async def _search_professors(self, school_id: str, query: str) -> List[Dict[str, Any]]:
+        """search_professors, but raising when rmp can't be reached - callers can tell a failed search from no match"""
+        logger.info("Searching professors in school %s for: %s", school_id, query)
+        
+        variables = {
+            "query": self._teacher_search_variables(school_id, query),
+            "schoolID": school_id,
+            "includeSchoolFilter": True
+        }
+        
+        data = await self._gql_request(self.TEACHER_QUERY, variables)
+        professors = self._parse_teacher_search(data["search"]["teachers"])
+        
+        logger.info("Found %s professors", len(professors))
+        return professors
+    
+    @staticmethod
+    def _teacher_search_variables(school_id: str, query: str) -> Dict[str, Any]:
+        """the TeacherSearchQuery input for a name at a school - shared by single and batched searches"""
+        return {
+            "text": query,
+            "schoolID": school_id,
+            "fallback": True,
+            "departmentID": None
+        }
+    
+    @staticmethod
+    def _parse_teacher_search(teachers: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """professor dicts from a newSearch.teachers result"""
+        professors = []
+        for edge in teachers["edges"]:
+            node = edge["node"]
+            professor = {
+                "id": node["id"],
+                "legacyId": node["legacyId"],
+                "firstName": node["firstName"],
+                "lastName": node["lastName"],
+                "department": node["department"],
+                "avgRating": node["avgRating"],
+                "avgDifficulty": node["avgDifficulty"],
+                "numRatings": node["numRatings"],
+                "wouldTakeAgainPercent": node["wouldTakeAgainPercent"],
+                "school": {
+                    "id": node["school"]["id"],
+                    "name": node["school"]["name"]
+                },
+                "isSaved": node["isSaved"]
+            }
+            professors.append(professor)
+        return professors
+    
     async def get_all_professors_at_school(self, school_id: str) -> List[Dict[str, Any]]:
         """Get complete list of all professors at a school"""
         try:
-            logger.info(f"Getting all professors at school {school_id}")
+            logger.info("Getting all professors at school %s", school_id)
             
             variables = {
                 "query": {
@@ -377,7 +535,7 @@ class RateMyProfessorService:
                 }
                 professors.append(professor)
             
-            logger.info(f"Found {len(professors)} total professors")
+            logger.info("Found %s total professors", len(professors))
             return professors
             
         except Exception as e:
@@ -387,7 +545,7 @@ class RateMyProfessorService:
     async def get_professor_id(self, professor_name: str, school_id: str) -> Optional[str]:
         """Get professor ID given name and school"""
         try:
-            logger.info(f"Getting professor ID for {professor_name} at school {school_id}")
+            logger.info("Getting professor ID for %s at school %s", professor_name, school_id)
             
             variables = {
                 "query": {
@@ -405,7 +563,7 @@ class RateMyProfessorService:
             edges = data["search"]["teachers"]["edges"]
             if edges:
                 professor_id = edges[0]["node"]["id"]
-                logger.info(f"Found professor ID: {professor_id}")
+                logger.info("Found professor ID: %s", professor_id)
                 return professor_id
             
             return None
@@ -415,43 +573,95 @@ class RateMyProfessorService:
             return None
     
     async def get_professor_comments(self, professor_id: str) -> List[Dict[str, Any]]:
-        """Get all reviews/comments for a specific professor"""
+        """Get all reviews/comments for a specific professor (cached for a day)"""
+        cache_key = f"rmp:comments:v1:{professor_id}"
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return orjson.loads(cached)
+        
         try:
-            logger.info(f"Getting comments for professor {professor_id}")
-            
-            variables = {"id": professor_id}
-            data = await self._gql_request(self.TEACHER_COMMENTS_QUERY, variables)
-            
-            comments = []
-            ratings_edges = data["node"]["ratings"]["edges"]
-            
-            for edge in ratings_edges:
-                node = edge["node"]
-                comment = {
-                    "comment": node.get("comment", ""),
-                    "class": node.get("class", ""),
-                    "date": node.get("date", ""),
-                    "helpfulRating": node.get("helpfulRating"),
-                    "difficultyRating": node.get("difficultyRating"),
-                    "clarityRating": node.get("clarityRating", 0),
-                    "helpfulnessRating": node.get("helpfulRating", 0),
-                    "grade": node.get("grade", ""),
-                    "wouldTakeAgain": node.get("wouldTakeAgain"),
-                    "ratingTags": node.get("ratingTags", "")
-                }
-                comments.append(comment)
-            
-            logger.info(f"Retrieved {len(comments)} comments")
-            return comments
-            
+            comments = await self._fetch_professor_comments(professor_id)
         except Exception as e:
             logger.error(f"Failed to get professor comments: {e}")
             return []
+        
+        await response_cache.set(cache_key, orjson.dumps(comments), RMP_PROFESSOR_CACHE_TTL)
+        return comments
+    
+    async def _fetch_professor_comments(self, professor_id: str) -> List[Dict[str, Any]]:
+        logger.info("Getting comments for professor %s", professor_id)
+        
+        variables = {"id": professor_id}
+        data = await self._gql_request(self.TEACHER_COMMENTS_QUERY, variables)
+        
+        comments = self._parse_comments(data["node"])
+        logger.info("Retrieved %s comments", len(comments))
+        return comments
+    
+    async def get_comments_for_professors(self, professor_ids: List[str]) -> Dict[str, List[Dict[str, Any]]]:
+        """
+        Reviews for several professors, by id - cached ones come from the cache and the rest are
+        fetched RMP_BATCH_SIZE professors per graphql request (per professor if a batch fails)
+        """
+        professor_ids = list(dict.fromkeys(professor_ids))
+        cached = await asyncio.gather(*[response_cache.get(f"rmp:comments:v1:{prof_id}") for prof_id in professor_ids])
+        comments_by_id = {prof_id: orjson.loads(hit) for prof_id, hit in zip(professor_ids, cached) if hit is not None}
+        missing = [prof_id for prof_id in professor_ids if prof_id not in comments_by_id]
+        
+        async def fetch_batch(batch: List[str]) -> None:
+            if len(batch) > 1:
+                try:
+                    nodes = await self.batch_query(TEACHER_COMMENTS_SELECTION, {"id": "ID!"}, [{"id": prof_id} for prof_id in batch])
+                except Exception as e:
+                    logger.warning("Batched RMP comments request failed, fetching one by one: %s", e)
+                else:
+                    unparsed = []
+                    for prof_id, node in zip(batch, nodes):
+                        try:
+                            comments = self._parse_comments(node)
+                        except Exception as e:
+                            # a null node (professor since removed) or a malformed one - retry just that professor
+                            logger.warning("Unparseable batched RMP comments for %s, fetching alone: %s", prof_id, e)
+                            unparsed.append(prof_id)
+                            continue
+                        comments_by_id[prof_id] = comments
+                        await response_cache.set(f"rmp:comments:v1:{prof_id}", orjson.dumps(comments), RMP_PROFESSOR_CACHE_TTL)
+                    batch = unparsed
+            results = await asyncio.gather(*[self.get_professor_comments(prof_id) for prof_id in batch])
+            comments_by_id.update(zip(batch, results))
+        
+        await asyncio.gather(*[
+            fetch_batch(missing[i:i + RMP_BATCH_SIZE]) for i in range(0, len(missing), RMP_BATCH_SIZE)
+        ])
+        return comments_by_id
+    
+    @staticmethod
+    def _parse_comments(node: Dict[str, Any]) -> List[Dict[str, Any]]:
+        """review dicts from a Teacher node's ratings"""
+        comments = []
+        ratings_edges = node["ratings"]["edges"]
+        
+        for edge in ratings_edges:
+            node = edge["node"]
+            comment = {
+                "comment": node.get("comment", ""),
+                "class": node.get("class", ""),
+                "date": node.get("date", ""),
+                "helpfulRating": node.get("helpfulRating"),
+                "difficultyRating": node.get("difficultyRating"),
+                "clarityRating": node.get("clarityRating", 0),
+                "helpfulnessRating": node.get("helpfulRating", 0),
+                "grade": node.get("grade", ""),
+                "wouldTakeAgain": node.get("wouldTakeAgain"),
+                "ratingTags": node.get("ratingTags", "")
+            }
+            comments.append(comment)
+        return comments
     
     async def get_professor_summary(self, prof_id: str) -> Optional[Dict[str, Any]]:
         """Get summary stats for a professor"""
         try:
-            logger.info(f"Getting professor summary for: {prof_id}")
+            logger.info("Getting professor summary for: %s", prof_id)
             
             # Use the comments query to get professor info
             variables = {"id": prof_id}
@@ -476,7 +686,7 @@ class RateMyProfessorService:
     async def get_professor_ratings(self, prof_id: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
         """Get paginated list of a professor's ratings"""
         try:
-            logger.info(f"Getting ratings for professor {prof_id}")
+            logger.info("Getting ratings for professor %s", prof_id)
             
             # Use the comments query which gives us all ratings
             comments = await self.get_professor_comments(prof_id)
@@ -512,7 +722,7 @@ class RateMyProfessorService:
     async def get_ratings_by_course(self, prof_id: str, course: str, limit: int = 50, cursor: Optional[str] = None) -> Dict[str, Any]:
         """Get ratings filtered by course name or number"""
         try:
-            logger.info(f"Getting course ratings for professor {prof_id}, course: {course}")
+            logger.info("Getting course ratings for professor %s, course: %s", prof_id, course)
             
             # Get all comments and filter by course
             all_comments = await self.get_professor_comments(prof_id)
@@ -544,7 +754,7 @@ class RateMyProfessorService:
                 }
                 ratings.append(rating)
             
-            logger.info(f"Retrieved {len(ratings)} course-specific ratings")
+            logger.info("Retrieved %s course-specific ratings", len(ratings))
             return {
                 "ratings": ratings,
                 "pageInfo": {
@@ -631,7 +841,7 @@ class RateMyProfessorService:
     async def professor_teaches_course(self, prof_id: str, course_code: str) -> bool:
         """Fast validation: Check if professor teaches a specific course"""
         try:
-            logger.info(f"Checking if professor {prof_id} teaches {course_code}")
+            logger.info("Checking if professor %s teaches %s", prof_id, course_code)
             
             # Get all courses this professor teaches
             courses = await self.get_professor_courses_fast(prof_id)
@@ -640,10 +850,10 @@ class RateMyProfessorService:
             course_lower = course_code.lower()
             for taught_course in courses:
                 if course_lower in taught_course.lower() or taught_course.lower() in course_lower:
-                    logger.info(f"✅ Professor teaches {course_code} (found: {taught_course})")
+                    logger.info("✅ Professor teaches %s (found: %s)", course_code, taught_course)
                     return True
             
-            logger.info(f"❌ Professor does not teach {course_code}")
+            logger.info("❌ Professor does not teach %s", course_code)
             return False
             
         except Exception as e:
@@ -653,7 +863,7 @@ class RateMyProfessorService:
     async def get_professor_courses_fast(self, prof_id: str) -> List[str]:
         """Fast method to get just course names without full review data"""
         try:
-            logger.info(f"Getting courses (fast) for professor {prof_id}")
+            logger.info("Getting courses (fast) for professor %s", prof_id)
             
             variables = {"id": prof_id}
             data = await self._gql_request(self.GET_PROFESSOR_COURSES_QUERY, variables)
@@ -668,7 +878,7 @@ class RateMyProfessorService:
                     course_set.add(course.strip())
             
             courses = list(course_set)
-            logger.info(f"Found {len(courses)} distinct courses (fast)")
+            logger.info("Found %s distinct courses (fast)", len(courses))
             return courses
             
         except Exception as e:
@@ -678,7 +888,7 @@ class RateMyProfessorService:
     async def get_professor_courses(self, prof_id: str, sample: int = 300) -> List[Dict[str, Any]]:
         """Get a deduplicated list of course codes with counts for a professor"""
         try:
-            logger.info(f"Getting courses for professor {prof_id}")
+            logger.info("Getting courses for professor %s", prof_id)
             
             comments = await self.get_professor_comments(prof_id)
             
@@ -691,7 +901,7 @@ class RateMyProfessorService:
             courses = [{"course": course, "count": count} for course, count in course_counts.items()]
             courses.sort(key=lambda x: x["count"], reverse=True)
             
-            logger.info(f"Found {len(courses)} distinct courses")
+            logger.info("Found %s distinct courses", len(courses))
             return courses
             
         except Exception as e:
@@ -704,60 +914,21 @@ class RateMyProfessorService:
         This is the main method for the UCR course guide integration
         """
         try:
-            logger.info(f"Searching RMP data for professors at {school_name}: {professor_names}")
+            logger.info("Searching RMP data for professors at %s: %s", school_name, professor_names)
             
             # First, find the school
-            schools = await self.search_schools(school_name)
-            if not schools:
-                logger.warning(f"No schools found for: {school_name}")
+            school = await self.resolve_school(school_name)
+            if school is None:
+                logger.warning("No schools found for: %s", school_name)
                 return {"school_found": False, "professors": []}
             
-            # Use the first matching school
-            school = schools[0]
             school_id = school["id"]
-            logger.info(f"Using school: {school['name']} (ID: {school_id})")
+            logger.info("Using school: %s (ID: %s)", school['name'], school_id)
             
-            # Search for each professor
-            professor_results = []
-            for prof_name in professor_names:
-                if not prof_name or not prof_name.strip():
-                    continue
-                    
-                try:
-                    # Search for this professor
-                    professors = await self.search_professors(school_id, prof_name.strip())
-                    
-                    if professors:
-                        # Take the first match (usually most relevant)
-                        professor = professors[0]
-                        
-                        # Format the response with additional calculated fields
-                        formatted_professor = {
-                            **professor,
-                            "formattedName": f"{professor['firstName']} {professor['lastName']}",
-                            "link": f"https://www.ratemyprofessors.com/professor/{professor['legacyId']}"
-                        }
-                        
-                        professor_results.append({
-                            "search_name": prof_name,
-                            "found": True,
-                            "professor": formatted_professor
-                        })
-                    else:
-                        professor_results.append({
-                            "search_name": prof_name,
-                            "found": False,
-                            "professor": None
-                        })
-                        
-                except Exception as e:
-                    logger.error(f"Error searching for professor {prof_name}: {e}")
-                    professor_results.append({
-                        "search_name": prof_name,
-                        "found": False,
-                        "professor": None,
-                        "error": str(e)
-                    })
+            # Search for every professor at once - cache misses share batched requests
+            professor_results = await self.lookup_professors(school_id, [
+                prof_name for prof_name in professor_names if prof_name and prof_name.strip()
+            ])
             
             return {
                 "school_found": True,
@@ -771,12 +942,114 @@ class RateMyProfessorService:
             logger.error(f"Failed to search professors for course: {e}")
             return {"school_found": False, "professors": [], "error": str(e)}
 
+    async def lookup_professor(self, school_id: str, prof_name: str) -> Dict[str, Any]:
+        """
+        Search one professor at a school - {"search_name", "found", "professor"} (never raises)
+        results are cached per (school, name), failed searches are not
+        """
+        cache_key = f"rmp:prof:v1:{school_id}:{prof_name.strip().lower()}"
+        cached = await response_cache.get(cache_key)
+        if cached is not None:
+            return {**orjson.loads(cached), "search_name": prof_name}
+        
+        result = await self._lookup_professor(school_id, prof_name)
+        if "error" not in result:
+            ttl = RMP_PROFESSOR_CACHE_TTL if result["found"] else RMP_NOT_FOUND_CACHE_TTL
+            await response_cache.set(cache_key, orjson.dumps(result), ttl)
+        return result
+    
+    async def lookup_professors(self, school_id: str, prof_names: List[str]) -> List[Dict[str, Any]]:
+        """
+        lookup_professor for several names (results in the same order) - cache misses are searched
+        RMP_BATCH_SIZE names per graphql request, falling back to one request per name if a batch fails
+        """
+        cache_keys = [f"rmp:prof:v1:{school_id}:{prof_name.strip().lower()}" for prof_name in prof_names]
+        cached = await asyncio.gather(*[response_cache.get(cache_key) for cache_key in cache_keys])
+        results: List[Optional[Dict[str, Any]]] = [
+            {**orjson.loads(hit), "search_name": prof_name} if hit is not None else None
+            for prof_name, hit in zip(prof_names, cached)
+        ]
+        missing = [i for i, result in enumerate(results) if result is None]
+        
+        async def lookup_batch(batch: List[int]) -> None:
+            if len(batch) > 1:
+                try:
+                    searches = await self.batch_query(
+                        TEACHER_SEARCH_SELECTION,
+                        {"query": "TeacherSearchQuery!"},
+                        [{"query": self._teacher_search_variables(school_id, prof_names[i].strip())} for i in batch]
+                    )
+                except Exception as e:
+                    logger.warning("Batched RMP professor search failed, searching one by one: %s", e)
+                else:
+                    unparsed = []
+                    for i, search in zip(batch, searches):
+                        try:
+                            result = self._professor_search_result(prof_names[i], self._parse_teacher_search(search["teachers"]))
+                        except Exception as e:
+                            # a null or malformed alias - search that name alone instead of failing the batch
+                            logger.warning("Unparseable batched RMP search for %s, searching alone: %s", prof_names[i], e)
+                            unparsed.append(i)
+                            continue
+                        ttl = RMP_PROFESSOR_CACHE_TTL if result["found"] else RMP_NOT_FOUND_CACHE_TTL
+                        await response_cache.set(cache_keys[i], orjson.dumps(result), ttl)
+                        results[i] = result
+                    batch = unparsed
+            lookups = await asyncio.gather(*[self.lookup_professor(school_id, prof_names[i]) for i in batch])
+            for i, result in zip(batch, lookups):
+                results[i] = result
+        
+        await asyncio.gather(*[
+            lookup_batch(missing[i:i + RMP_BATCH_SIZE]) for i in range(0, len(missing), RMP_BATCH_SIZE)
+        ])
+        return results
+    
+    async def _lookup_professor(self, school_id: str, prof_name: str) -> Dict[str, Any]:
+        try:
+            # Search for this professor - a failed search raises, so it isn't cached as "not found"
+            professors = await self._search_professors(school_id, prof_name.strip())
+            return self._professor_search_result(prof_name, professors)
+            
+        except Exception as e:
+            logger.error(f"Error searching for professor {prof_name}: {e}")
+            return {
+                "search_name": prof_name,
+                "found": False,
+                "professor": None,
+                "error": str(e)
+            }
+    
+    @staticmethod
+    def _professor_search_result(prof_name: str, professors: List[Dict[str, Any]]) -> Dict[str, Any]:
+        """the lookup_professor result for a name, given its search matches"""
+        if professors:
+            # Take the first match (usually most relevant)
+            professor = professors[0]
+            
+            # Format the response with additional calculated fields
+            formatted_professor = {
+                **professor,
+                "formattedName": f"{professor['firstName']} {professor['lastName']}",
+                "link": f"https://www.ratemyprofessors.com/professor/{professor['legacyId']}"
+            }
+            
+            return {
+                "search_name": prof_name,
+                "found": True,
+                "professor": formatted_professor
+            }
+        return {
+            "search_name": prof_name,
+            "found": False,
+            "professor": None
+        }
+
     async def get_professors_with_reviews(self, school_name: str, professor_names: List[str], course_filter: Optional[str] = None) -> Dict[str, Any]:
         """
         🆕 ENHANCED: Get professors with their complete RMP reviews for course analysis
         """
         try:
-            logger.info(f"Getting professors with reviews for {school_name}: {professor_names}")
+            logger.info("Getting professors with reviews for %s: %s", school_name, professor_names)
             
             # First get basic professor data
             basic_results = await self.search_professors_for_course(school_name, professor_names)
@@ -784,52 +1057,14 @@ class RateMyProfessorService:
             if not basic_results.get("school_found"):
                 return basic_results
             
-            # Now fetch detailed reviews for each found professor
-            enhanced_professors = []
-            
-            for prof_result in basic_results["professors"]:
-                if not prof_result["found"]:
-                    enhanced_professors.append(prof_result)
-                    continue
-                
-                professor = prof_result["professor"]
-                prof_id = professor["id"]
-                
-                try:
-                    # Get all reviews for this professor
-                    all_comments = await self.get_professor_comments(prof_id)
-                    
-                    # Filter by course if specified
-                    filtered_comments = all_comments
-                    if course_filter:
-                        filtered_comments = [
-                            comment for comment in all_comments
-                            if course_filter.lower() in comment.get("class", "").lower()
-                        ]
-                    
-                    # Add review data to professor info
-                    enhanced_professor = {
-                        **prof_result,
-                        "professor": {
-                            **professor,
-                            "all_reviews_count": len(all_comments),
-                            "course_specific_reviews_count": len(filtered_comments) if course_filter else len(all_comments),
-                            "all_reviews": all_comments,
-                            "course_specific_reviews": filtered_comments if course_filter else all_comments,
-                            "courses_taught": list(set([comment.get("class", "") for comment in all_comments if comment.get("class")]))
-                        }
-                    }
-                    
-                    enhanced_professors.append(enhanced_professor)
-                    logger.info(f"Added {len(filtered_comments)} reviews for {professor['formattedName']}")
-                    
-                except Exception as e:
-                    logger.error(f"Error getting reviews for {professor['formattedName']}: {e}")
-                    # Still include professor without reviews
-                    enhanced_professors.append({
-                        **prof_result,
-                        "review_error": str(e)
-                    })
+            # Now fetch detailed reviews for every found professor (batched, see get_comments_for_professors)
+            comments_by_id = await self.get_comments_for_professors([
+                prof_result["professor"]["id"] for prof_result in basic_results["professors"] if prof_result["found"]
+            ])
+            enhanced_professors = [
+                self._add_professor_reviews(prof_result, course_filter, comments_by_id)
+                for prof_result in basic_results["professors"]
+            ]
             
             return {
                 **basic_results,
@@ -842,44 +1077,78 @@ class RateMyProfessorService:
             logger.error(f"Failed to get professors with reviews: {e}")
             return {"school_found": False, "professors": [], "error": str(e)}
 
+    def _add_professor_reviews(self, prof_result: Dict[str, Any], course_filter: Optional[str], comments_by_id: Dict[str, List[Dict[str, Any]]]) -> Dict[str, Any]:
+        """attach the professor's reviews (course-filtered when asked) to a lookup_professor result"""
+        if not prof_result["found"]:
+            return prof_result
+        
+        professor = prof_result["professor"]
+        prof_id = professor["id"]
+        
+        try:
+            # All reviews for this professor
+            all_comments = comments_by_id.get(prof_id, [])
+            
+            # Filter by course if specified
+            filtered_comments = all_comments
+            if course_filter:
+                filtered_comments = [
+                    comment for comment in all_comments
+                    if course_filter.lower() in comment.get("class", "").lower()
+                ]
+            
+            logger.info("Added %s reviews for %s", len(filtered_comments), professor['formattedName'])
+            
+            # Add review data to professor info
+            return {
+                **prof_result,
+                "professor": {
+                    **professor,
+                    "all_reviews_count": len(all_comments),
+                    "course_specific_reviews_count": len(filtered_comments) if course_filter else len(all_comments),
+                    "all_reviews": all_comments,
+                    "course_specific_reviews": filtered_comments if course_filter else all_comments,
+                    "courses_taught": list(set([comment.get("class", "") for comment in all_comments if comment.get("class")]))
+                }
+            }
+            
+        except Exception as e:
+            logger.error(f"Error getting reviews for {professor['formattedName']}: {e}")
+            # Still include professor without reviews
+            return {
+                **prof_result,
+                "review_error": str(e)
+            }
+
     async def bulk_professor_lookup(self, professor_list: List[Dict[str, Any]], school_id: str) -> List[Dict[str, Any]]:
         """
         🆕 Efficiently lookup multiple professors and get their basic data
         """
         try:
-            logger.info(f"Bulk lookup for {len(professor_list)} professors")
+            logger.info("Bulk lookup for %s professors", len(professor_list))
             
             results = []
-            
-            # Process in batches to avoid overwhelming the API
-            batch_size = 5
-            for i in range(0, len(professor_list), batch_size):
-                batch = professor_list[i:i + batch_size]
-                batch_tasks = []
-                
-                for prof_info in batch:
-                    prof_name = prof_info.get("name", prof_info.get("formattedName", ""))
-                    if prof_name:
-                        task = self.search_professors(school_id, prof_name)
-                        batch_tasks.append((prof_name, task))
-                
-                # Execute batch in parallel
-                batch_results = await asyncio.gather(*[task for _, task in batch_tasks], return_exceptions=True)
-                
-                # Process batch results
-                for (prof_name, _), result in zip(batch_tasks, batch_results):
-                    if isinstance(result, Exception):
-                        logger.error(f"Error searching for {prof_name}: {result}")
-                        results.append({"name": prof_name, "found": False, "error": str(result)})
-                    elif result and len(result) > 0:
-                        results.append({"name": prof_name, "found": True, "professor": result[0]})
-                    else:
-                        results.append({"name": prof_name, "found": False, "professor": None})
-                
-                # Small delay between batches
-                await asyncio.sleep(0.5)
-            
-            logger.info(f"Bulk lookup completed: {len([r for r in results if r['found']])} found out of {len(results)}")
+            prof_names = [
+                prof_name for prof_name in (
+                    prof_info.get("name", prof_info.get("formattedName", "")) for prof_info in professor_list
+                ) if prof_name
+            ]
+            
+            # Search everyone at once - the request semaphore keeps at most max_concurrency searches in flight
+            search_results = await asyncio.gather(*[
+                self._search_professors(school_id, prof_name) for prof_name in prof_names
+            ], return_exceptions=True)
+            
+            for prof_name, result in zip(prof_names, search_results):
+                if isinstance(result, Exception):
+                    logger.error(f"Error searching for {prof_name}: {result}")
+                    results.append({"name": prof_name, "found": False, "error": str(result)})
+                elif result and len(result) > 0:
+                    results.append({"name": prof_name, "found": True, "professor": result[0]})
+                else:
+                    results.append({"name": prof_name, "found": False, "professor": None})
+            
+            logger.info("Bulk lookup completed: %s found out of %s", len([r for r in results if r['found']]), len(results))
             return results
             
         except Exception as e:
@@ -891,7 +1160,7 @@ class RateMyProfessorService:
         🆕 MAIN INTEGRATION METHOD: Get complete professor data for a specific course
         """
         try:
-            logger.info(f"Getting course-specific professor data for {course_code}")
+            logger.info("Getting course-specific professor data for %s", course_code)
             
             # Get professors with all their reviews
             professor_data = await self.get_professors_with_reviews(
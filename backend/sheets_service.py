@@ -1,9 +1,13 @@
-import requests
+import asyncio
+import httpx
 import csv
 import io
-from typing import List, Dict, Optional
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Any, Callable, FrozenSet, List, Dict, Optional
 from dataclasses import dataclass
 import logging
+from cache import SingleFlight, TTLCache
 
 logger = logging.getLogger(__name__)
 
@@ -24,6 +28,122 @@ class SheetsService:
     def __init__(self):
         self.cache = {}
         self.cache_timeout = 3600  # 1 hour cache
+        # values derived from the csv (class list, per-class reviews/summaries, ai text), stamped with
+        # the csv they came from - bounded, since per-class keys come straight from user input
+        self._derived = TTLCache(maxsize=512, ttl=self.cache_timeout)
+        self._refreshing = False
+        # async client for the csv download - created on first use
+        self._client: Optional[httpx.AsyncClient] = None
+        self._refresh_task: Optional[asyncio.Task] = None
+        # blocking sheet work gets its own small pool - when google sheets is slow, requests queue
+        # here instead of filling the default executor every other to_thread call shares
+        self._executor = ThreadPoolExecutor(max_workers=4, thread_name_prefix="sheets")
+        # concurrent cold lookups for the same key share one build instead of each parsing the sheet
+        self._inflight = SingleFlight()
+    
+    @property
+    def client(self) -> httpx.AsyncClient:
+        """keep-alive async client for the csv export (google answers with a redirect to the file)"""
+        if self._client is None or self._client.is_closed:
+            self._client = httpx.AsyncClient(timeout=30, follow_redirects=True)
+        return self._client
+    
+    async def run_blocking(self, fn: Callable[..., Any], *args: Any) -> Any:
+        """
+        await a blocking sheets method on the sheets thread pool
+        the csv is loaded on the event loop first, so pool threads only ever parse - if that
+        download fails they find no csv and fall back to their empty results, never downloading themselves
+        """
+        try:
+            await self.ensure_csv()
+        except Exception as e:
+            logger.error(f"Error downloading UCR class data: {e}")
+        return await asyncio.get_running_loop().run_in_executor(self._executor, fn, *args)
+    
+    async def close(self):
+        """stop the sheets thread pool (queued work is dropped, running calls finish on their own) and the http client"""
+        self._executor.shutdown(wait=False, cancel_futures=True)
+        if self._refresh_task is not None:
+            self._refresh_task.cancel()
+        if self._client is not None:
+            await self._client.aclose()
+            self._client = None
+    
+    async def ensure_csv(self) -> None:
+        """
+        make sure a csv is cached, downloading on the event loop instead of a pool thread
+        a cold cache waits for the download (shared by concurrent callers), a stale one refreshes in the background
+        """
+        cached = self.cache.get("csv")
+        if not cached:
+            await self._inflight.run("csv", self._adownload_csv)
+            return
+        if time.monotonic() - cached[0] <= self.cache_timeout:
+            return
+        if self._refreshing:
+            return
+        self._refreshing = True
+        self._refresh_task = asyncio.create_task(self._arefresh())
+    
+    async def refresh(self) -> int:
+        """re-download the sheet now and rebuild the startup lookups - returns the number of indexed classes"""
+        await self._inflight.run("csv", self._adownload_csv)
+        await self.run_blocking(self.warm_up)
+        return len(self.get_ai_index())
+    
+    async def _arefresh(self):
+        try:
+            await self._adownload_csv()
+        except Exception as e:
+            logger.warning(f"Background refresh of UCR class data failed, keeping stale copy: {e}")
+        finally:
+            self._refreshing = False
+    
+    async def _adownload_csv(self):
+        """download the sheet csv export and reset everything derived from the old copy"""
+        logger.info("Downloading UCR class data from Google Sheets")
+        response = await self.client.get(self.UCR_DATABASE_URL)
+        response.raise_for_status()
+        
+        self.cache = {"csv": (time.monotonic(), response.text)}
+        self._derived.clear()
+    
+    def _get_csv_text(self) -> str:
+        """
+        the cached sheet csv, stale or not - ensure_csv (via run_blocking) downloads and refreshes it,
+        so pool threads never wait on google sheets
+        """
+        cached = self.cache.get("csv")
+        if not cached:
+            raise RuntimeError("UCR class data hasn't been downloaded")
+        return cached[1]
+    
+    def _cached(self, key: str, build: Callable[[str], Any]) -> Any:
+        """memoize a value derived from the current csv - dropped when the csv is refreshed"""
+        text = self._get_csv_text()
+        csv_entry = self.cache.get("csv")
+        hit = self._derived.get(key)
+        if hit and csv_entry and hit[0] == csv_entry[0]:
+            return hit[1]
+        
+        value = build(text)
+        if csv_entry:
+            self._derived.set(key, (csv_entry[0], value))
+        return value
+    
+    def _peek(self, key: str) -> Optional[Any]:
+        """a derived value if it's cached against a fresh csv, else None - never downloads or parses"""
+        csv_entry = self.cache.get("csv")
+        hit = self._derived.get(key)
+        if csv_entry and hit and hit[0] == csv_entry[0] and time.monotonic() - csv_entry[0] <= self.cache_timeout:
+            return hit[1]
+        return None
+    
+    def warm_up(self) -> None:
+        """download the sheet and build the lookups every request needs - run once at startup"""
+        self.fetch_ucr_class_data()
+        self.get_class_set()
+        self.get_ai_index()
     
     def fetch_ucr_class_data(self) -> List[ClassReview]:
         """
@@ -31,123 +151,143 @@ class SheetsService:
         handles the grouped structure where class names in column a group multiple reviews
         """
         try:
-            logger.info("Fetching UCR class data from Google Sheets")
-            
-            # get csv data
-            response = requests.get(self.UCR_DATABASE_URL, timeout=30)
-            response.raise_for_status()
-            
-            # parse csv
-            csv_data = io.StringIO(response.text)
-            reader = csv.reader(csv_data)
-            
-            reviews = []
-            current_class = None
-            current_avg_difficulty = None
-            
-            # skip header row
-            next(reader, None)  # skip "Class, Average Difficulty, Additional Comments, etc."
-            
-            for row_num, row in enumerate(reader, start=2):
-                if len(row) < 3:  # need at least 3 columns
-                    continue
-                    
-                try:
-                    # column a: class code
-                    class_code = row[0].strip().upper() if row[0].strip() else None
-                    
-                    # column b: average difficulty (only when new class starts)
-                    avg_difficulty_str = row[1].strip() if len(row) > 1 else ""
-                    
-                    # column c: comments/reviews
-                    comments = row[2].strip() if len(row) > 2 else ""
-                    
-                    # column d: individual difficulty rating
-                    individual_difficulty = None
-                    if len(row) > 3 and row[3].strip():
+            return self._cached("reviews", self._parse_class_data)
+        except Exception as e:
+            logger.error(f"Error parsing UCR class data: {e}")
+            return []
+    
+    def _parse_class_data(self, csv_text: str) -> List[ClassReview]:
+        """parse the grouped sheet rows into ClassReview entries"""
+        logger.info("Parsing UCR class data")
+        
+        # parse csv
+        csv_data = io.StringIO(csv_text)
+        reader = csv.reader(csv_data)
+        
+        reviews = []
+        current_class = None
+        current_avg_difficulty = None
+        
+        # skip header row
+        next(reader, None)  # skip "Class, Average Difficulty, Additional Comments, etc."
+        
+        for row_num, row in enumerate(reader, start=2):
+            if len(row) < 3:  # need at least 3 columns
+                continue
+                
+            try:
+                # column a: class code
+                class_code = row[0].strip().upper() if row[0].strip() else None
+                
+                # column b: average difficulty (only when new class starts)
+                avg_difficulty_str = row[1].strip() if len(row) > 1 else ""
+                
+                # column c: comments/reviews
+                comments = row[2].strip() if len(row) > 2 else ""
+                
+                # column d: individual difficulty rating
+                individual_difficulty = None
+                if len(row) > 3 and row[3].strip():
+                    try:
+                        individual_difficulty = int(float(row[3].strip()))
+                    except ValueError:
+                        pass
+                
+                # column e: date
+                date = row[4].strip() if len(row) > 4 else ""
+                
+                # check if this row starts a new class
+                if class_code:
+                    current_class = class_code
+                    # parse average difficulty for this class
+                    current_avg_difficulty = None
+                    if avg_difficulty_str:
                         try:
-                            individual_difficulty = int(float(row[3].strip()))
+                            current_avg_difficulty = float(avg_difficulty_str)
                         except ValueError:
                             pass
+                
+                # only process rows that have either a class code or belong to current class
+                if current_class and comments:
+                    review = ClassReview(
+                        class_code=current_class,
+                        average_difficulty=current_avg_difficulty,
+                        additional_comments=comments,
+                        difficulty=individual_difficulty,
+                        date=date
+                    )
+                    reviews.append(review)
                     
-                    # column e: date
-                    date = row[4].strip() if len(row) > 4 else ""
-                    
-                    # check if this row starts a new class
-                    if class_code:
-                        current_class = class_code
-                        # parse average difficulty for this class
-                        current_avg_difficulty = None
-                        if avg_difficulty_str:
-                            try:
-                                current_avg_difficulty = float(avg_difficulty_str)
-                            except ValueError:
-                                pass
-                    
-                    # only process rows that have either a class code or belong to current class
-                    if current_class and comments:
-                        review = ClassReview(
-                            class_code=current_class,
-                            average_difficulty=current_avg_difficulty,
-                            additional_comments=comments,
-                            difficulty=individual_difficulty,
-                            date=date
-                        )
-                        reviews.append(review)
-                        
-                except Exception as e:
-                    logger.warning(f"Error parsing row {row_num} {row}: {e}")
-                    continue
-            
-            logger.info(f"Successfully fetched {len(reviews)} class reviews from UCR database")
-            return reviews
-            
-        except requests.RequestException as e:
-            logger.error(f"Error fetching UCR class data: {e}")
-            return []
-        except Exception as e:
-            logger.error(f"Error parsing UCR class data: {e}")
-            return []
+            except Exception as e:
+                logger.warning(f"Error parsing row {row_num} {row}: {e}")
+                continue
+        
+        logger.info("Successfully parsed %s class reviews from UCR database", len(reviews))
+        return reviews
     
     def get_available_classes(self) -> List[str]:
         """
         get list of all class codes in column a
         """
         try:
-            response = requests.get(self.UCR_DATABASE_URL, timeout=30)
-            response.raise_for_status()
-            
-            csv_data = io.StringIO(response.text)
-            reader = csv.reader(csv_data)
-            
-            # skip header
-            next(reader, None)
-            
-            available_classes = []
-            for row in reader:
-                if len(row) > 0 and row[0].strip():
-                    class_code = row[0].strip().upper()
-                    if class_code not in available_classes:
-                        available_classes.append(class_code)
-            
-            return available_classes
+            # copy so callers can't mutate the cached list
+            return list(self._cached("classes", self._parse_available_classes))
             
         except Exception as e:
             logger.error(f"Error getting available classes: {e}")
             return []
     
+    def _parse_available_classes(self, csv_text: str) -> List[str]:
+        """collect the distinct class codes from column a, in sheet order"""
+        reader = csv.reader(io.StringIO(csv_text))
+        
+        # skip header
+        next(reader, None)
+        
+        available_classes = {}
+        for row in reader:
+            if len(row) > 0 and row[0].strip():
+                available_classes.setdefault(row[0].strip().upper(), None)
+        
+        return list(available_classes)
+    
+    def get_class_set(self) -> FrozenSet[str]:
+        """column a class codes as a set, for O(1) membership checks - built once per sheet refresh"""
+        try:
+            return self._cached("class_set", lambda text: frozenset(self._parse_available_classes(text)))
+        except Exception as e:
+            logger.error(f"Error getting UCR class set: {e}")
+            return frozenset()
+    
+    def has_class(self, class_code: str) -> Optional[bool]:
+        """
+        whether a class code is in column a, answered on the event loop - None when the class set
+        isn't built (or came out empty), since this never downloads or parses the sheet
+        """
+        classes = self._peek("class_set")
+        if not classes:
+            return None
+        return class_code.upper().strip() in classes
+    
     def get_class_reviews(self, class_code: str) -> List[ClassReview]:
         """
         get all reviews for a specific class
         first checks if class exists in column a, then parses reviews
+        cached per class until the sheet is refreshed
         """
         class_code_upper = class_code.upper().strip()
-        
+        try:
+            return list(self._cached(f"class_reviews:{class_code_upper}", lambda _: self._get_class_reviews(class_code_upper)))
+        except Exception as e:
+            logger.error(f"Error getting UCR reviews for {class_code_upper}: {e}")
+            return []
+    
+    def _get_class_reviews(self, class_code_upper: str) -> List[ClassReview]:
         # check if this class exists in column a
-        available_classes = self.get_available_classes()
-        
-        if class_code_upper not in available_classes:
-            logger.info(f"Class {class_code_upper} not found in UCR database. Available classes: {available_classes[:10]}...")
+        if class_code_upper not in self.get_class_set():
+            # listing the available classes copies the whole class list - only do it when the line is actually logged
+            if logger.isEnabledFor(logging.INFO):
+                logger.info("Class %s not found in UCR database. Available classes: %s...", class_code_upper, self.get_available_classes()[:10])
             return []
         
         # class exists, so get all reviews and filter for this class
@@ -159,13 +299,21 @@ class SheetsService:
             if review.class_code == class_code_upper
         ]
         
-        logger.info(f"Found {len(matching_reviews)} reviews for {class_code_upper}")
+        logger.info("Found %s reviews for %s", len(matching_reviews), class_code_upper)
         return matching_reviews
     
     def get_class_summary(self, class_code: str) -> Dict:
         """
         get a summary of class data including avg difficulty and recent comments
+        cached per class until the sheet is refreshed
         """
+        try:
+            return self._cached(f"summary:{class_code.upper().strip()}", lambda _: self._get_class_summary(class_code))
+        except Exception as e:
+            logger.error(f"Error summarizing UCR data for {class_code}: {e}")
+            return self._get_class_summary(class_code)
+    
+    def _get_class_summary(self, class_code: str) -> Dict:
         reviews = self.get_class_reviews(class_code)
         
         if not reviews:
@@ -201,9 +349,44 @@ class SheetsService:
     def format_for_ai_analysis(self, class_code: str) -> str:
         """
         format class data specifically for ai analysis
+        a lookup in the per-class index, which is built once per sheet refresh
         """
-        reviews = self.get_class_reviews(class_code)
+        try:
+            return self.get_ai_index().get(class_code.upper().strip(), "")
+        except Exception as e:
+            logger.error(f"Error formatting UCR data for {class_code}: {e}")
+            return ""
+    
+    async def aformat_for_ai_analysis(self, class_code: str) -> str:
+        """
+        async format_for_ai_analysis for the request handlers
+        answered on the event loop once the index is built - only a download/parse goes to the sheets pool
+        """
+        index = self._peek("ai_index")
+        if index is None:
+            index = await self._inflight.run("ai_index", lambda: self.run_blocking(self.get_ai_index))
+        return index.get(class_code.upper().strip(), "")
+    
+    def get_ai_index(self) -> Dict[str, str]:
+        """class code -> ai-formatted text for every class in the sheet"""
+        try:
+            return self._cached("ai_index", self._build_ai_index)
+        except Exception as e:
+            logger.error(f"Error indexing UCR data for ai analysis: {e}")
+            return {}
+    
+    def _build_ai_index(self, csv_text: str) -> Dict[str, str]:
+        """format every class in one pass over the parsed reviews"""
+        reviews_by_class: Dict[str, List[ClassReview]] = {}
+        for review in self.fetch_ucr_class_data():
+            reviews_by_class.setdefault(review.class_code, []).append(review)
         
+        index = {class_code: self._format_for_ai_analysis(class_code, reviews) for class_code, reviews in reviews_by_class.items()}
+        logger.info("Indexed UCR data for %s classes", len(index))
+        return index
+    
+    def _format_for_ai_analysis(self, class_code: str, reviews: List[ClassReview]) -> str:
+        """build the ai-formatted text for one class"""
         if not reviews:
             return ""
         
@@ -235,33 +418,47 @@ class SheetsService:
         
         With course_filter: Get all reviews for that specific course
         Without course_filter: Get reviews from popular courses for efficiency
+        cached per filter until the sheet is refreshed (every professor analysis uses the "" one)
         """
         try:
-            all_reviews = self.fetch_ucr_class_data()
-            
-            if course_filter:
-                # Filter reviews for specific course
-                course_upper = course_filter.upper()
-                filtered_reviews = [r for r in all_reviews if r.class_code.upper() == course_upper]
-                logger.info(f"📚 Found {len(filtered_reviews)} reviews for course {course_upper}")
-                return filtered_reviews
-            else:
-                # Get reviews from popular course prefixes for efficiency
-                popular_prefixes = ['CS', 'MATH', 'PSYC', 'BIOL', 'CHEM', 'PHYS', 'ENGL', 'HIST', 'ECON', 'STAT']
-                filtered_reviews = []
-                
-                for review in all_reviews:
-                    course_prefix = ''.join([c for c in review.class_code if c.isalpha()]).upper()
-                    if course_prefix in popular_prefixes:
-                        filtered_reviews.append(review)
-                
-                logger.info(f"📚 Found {len(filtered_reviews)} reviews from popular courses for professor analysis")
-                return filtered_reviews
-                
+            return self._cached(
+                f"prof_reviews:{course_filter.upper().strip()}",
+                lambda _: self._select_reviews_for_professor_analysis(course_filter)
+            )
         except Exception as e:
             logger.error(f"Failed to get reviews for professor analysis: {e}")
             return []
     
+    async def aget_reviews_for_professor_analysis(self, course_filter: str = "") -> List[ClassReview]:
+        """async get_reviews_for_professor_analysis - cache hits skip the thread pool"""
+        key = f"prof_reviews:{course_filter.upper().strip()}"
+        hit = self._peek(key)
+        if hit is not None:
+            return hit
+        return await self._inflight.run(key, lambda: self.run_blocking(self.get_reviews_for_professor_analysis, course_filter))
+    
+    def _select_reviews_for_professor_analysis(self, course_filter: str) -> List[ClassReview]:
+        all_reviews = self.fetch_ucr_class_data()
+        
+        if course_filter:
+            # Filter reviews for specific course
+            course_upper = course_filter.upper()
+            filtered_reviews = [r for r in all_reviews if r.class_code.upper() == course_upper]
+            logger.info("📚 Found %s reviews for course %s", len(filtered_reviews), course_upper)
+            return filtered_reviews
+        
+        # Get reviews from popular course prefixes for efficiency
+        popular_prefixes = ['CS', 'MATH', 'PSYC', 'BIOL', 'CHEM', 'PHYS', 'ENGL', 'HIST', 'ECON', 'STAT']
+        filtered_reviews = []
+        
+        for review in all_reviews:
+            course_prefix = ''.join([c for c in review.class_code if c.isalpha()]).upper()
+            if course_prefix in popular_prefixes:
+                filtered_reviews.append(review)
+        
+        logger.info("📚 Found %s reviews from popular courses for professor analysis", len(filtered_reviews))
+        return filtered_reviews
+    
     def format_reviews_for_professor_ai(self, reviews: List[ClassReview], professor_name: str, course_filter: str = "") -> str:
         """
         🎯 FORMAT REVIEWS for AI to find professor mentions
@@ -270,7 +467,7 @@ class SheetsService:
             return ""
         
         context = f"with course filter {course_filter}" if course_filter else "across all courses"
-        formatted_data = f"UCR Class Reviews for Professor Analysis ({professor_name} {context})\n\n"
+        parts = [f"UCR Class Reviews for Professor Analysis ({professor_name} {context})\n\n"]
         
         # Group by course for better organization
         by_course = {}
@@ -282,18 +479,18 @@ class SheetsService:
         
         # Format each course's reviews
         for course, course_reviews in by_course.items():
-            formatted_data += f"=== {course} ===\n"
+            parts.append(f"=== {course} ===\n")
             
             for i, review in enumerate(course_reviews, 1):
-                formatted_data += f"Review {i}:\n"
+                parts.append(f"Review {i}:\n")
                 if review.date:
-                    formatted_data += f"Date: {review.date}\n"
+                    parts.append(f"Date: {review.date}\n")
                 if review.difficulty is not None:
-                    formatted_data += f"Difficulty: {review.difficulty}/10\n"
+                    parts.append(f"Difficulty: {review.difficulty}/10\n")
                 if review.additional_comments:
-                    formatted_data += f"Comments: {review.additional_comments}\n"
-                formatted_data += "\n"
+                    parts.append(f"Comments: {review.additional_comments}\n")
+                parts.append("\n")
             
-            formatted_data += "---\n\n"
+            parts.append("---\n\n")
         
-        return formatted_data 
\ No newline at end of file
+        return "".join(parts) 
\ No newline at end of file